@@ -0,0 +1,116 @@
+"""
+Accuracy and throughput check for the SecondBrain embedding backends.
+
+Encodes the same synthetic chunks with every backend and compares each one
+against the PyTorch baseline: per-text cosine similarity of the vectors and
+top-k neighbour agreement for a set of queries. Exits non-zero if a backend
+drops below --min-cosine, so it can gate a backend switch:
+
+    python benchmarks/embedding_backends.py --backends torch,onnx,onnx-int8 --output backends.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from run_benchmarks import git_commit, synthetic_text
+
+def neighbour_agreement(baseline, candidate, queries: int, k: int) -> float:
+    """Mean overlap of the top-k neighbours found with baseline and candidate vectors."""
+    import numpy as np
+
+    overlaps = []
+    for q in range(min(queries, len(baseline))):
+        expected = set(np.argsort(-(baseline @ baseline[q]))[1:k + 1])
+        found = set(np.argsort(-(candidate @ candidate[q]))[1:k + 1])
+        overlaps.append(len(expected & found) / k)
+    return float(np.mean(overlaps))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SecondBrain embedding backends against PyTorch")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8", help="Comma-separated backends to test")
+    parser.add_argument("--texts", type=int, default=512, help="Number of synthetic chunks to encode")
+    parser.add_argument("--chunk-bytes", type=int, default=900)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=50, help="Texts used as queries for neighbour agreement")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Lowest acceptable per-text cosine to torch")
+    parser.add_argument("--onnx-dir", help="Where exported ONNX models are kept (defaults to a temp dir)")
+    parser.add_argument("--output", default="embedding_backends.json")
+    args = parser.parse_args()
+
+    os.environ["SECONDBRAIN_ONNX_MODEL_DIR"] = args.onnx_dir or tempfile.mkdtemp(prefix="secondbrain-onnx-")
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    sys.path.insert(0, os.path.join(ROOT_DIR, "fastapi-server"))
+
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    from models.embedding_backends import create_backend
+
+    model_name = "all-MiniLM-L6-v2"
+    st_model = SentenceTransformer(model_name)
+    texts = [synthetic_text(args.chunk_bytes, seed=i) for i in range(args.texts)]
+
+    baseline = None
+    results = []
+    for name in ["torch"] + [b for b in args.backends.split(",") if b and b != "torch"]:
+        start = time.perf_counter()
+        backend = create_backend(name, st_model, model_name)
+        load_seconds = time.perf_counter() - start
+
+        # Warm up so one-off session and thread-pool setup is not measured
+        backend.encode(texts[:args.batch_size], batch_size=args.batch_size)
+        start = time.perf_counter()
+        vectors = np.asarray(backend.encode(texts, batch_size=args.batch_size), dtype=np.float32)
+        seconds = time.perf_counter() - start
+
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        if baseline is None:
+            baseline = vectors
+        cosines = (vectors * baseline).sum(axis=1)
+
+        result = {
+            "backend": name,
+            "load_seconds": load_seconds,
+            "encode_seconds": seconds,
+            "texts_per_second": len(texts) / seconds,
+            "mean_cosine_to_torch": float(cosines.mean()),
+            "min_cosine_to_torch": float(cosines.min()),
+            f"top{args.k}_agreement_with_torch": neighbour_agreement(baseline, vectors, args.queries, args.k),
+        }
+        result["speedup_vs_torch"] = result["texts_per_second"] / results[0]["texts_per_second"] if results else 1.0
+        results.append(result)
+        print(f"{name}: {result['texts_per_second']:.1f} texts/s ({result['speedup_vs_torch']:.2f}x), "
+              f"cosine mean {result['mean_cosine_to_torch']:.5f} min {result['min_cosine_to_torch']:.5f}, "
+              f"top-{args.k} agreement {result[f'top{args.k}_agreement_with_torch']:.3f}")
+
+    failures = [r["backend"] for r in results if r["min_cosine_to_torch"] < args.min_cosine]
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+        "failures": failures,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if failures:
+        print(f"Backends below min cosine {args.min_cosine}: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
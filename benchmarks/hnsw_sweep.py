@@ -0,0 +1,212 @@
+"""
+Recall-vs-latency sweep over the Chroma collection's distance space and HNSW parameters.
+
+Builds a scratch collection for every (space, M, construction ef) combination,
+then for every search ef measures recall@k against exact brute-force search
+and the per-query latency, so SECONDBRAIN_VECTOR_SPACE and SECONDBRAIN_HNSW_*
+can be picked from data rather than guessed:
+
+    python benchmarks/hnsw_sweep.py --chunks 100000 --output hnsw_sweep.json
+    python benchmarks/hnsw_sweep.py --snapshot snapshots/secondbrain-20260101-000000.sbsnap --target-recall 0.98
+
+Without --snapshot the corpus is synthetic clustered unit vectors; a snapshot
+of the real knowledge base (POST /documents/snapshot) gives numbers closer to
+production. Exact search with the NumPy vector store is measured as well, as
+the recall 1.0 reference point.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from run_benchmarks import git_commit, parse_int_list
+
+def clustered_unit_vectors(count: int, dim: int, clusters: int, seed: int = 0, latent_dim: int = 32):
+    """
+    Unit vectors around topic clusters in a low-dimensional subspace.
+
+    Sentence embeddings occupy far fewer effective dimensions than they have,
+    which is what makes HNSW work on them; isotropic noise would understate recall.
+    """
+    import numpy as np
+    # Centres and projection come from a fixed seed so corpus and queries share them
+    basis_rng = np.random.default_rng(12345)
+    centres = basis_rng.standard_normal((clusters, latent_dim)).astype(np.float32)
+    projection = basis_rng.standard_normal((latent_dim, dim)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    latent = centres[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, latent_dim)).astype(np.float32)
+    vectors = latent @ projection + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def load_snapshot_vectors(path: str):
+    import numpy as np
+    from db.snapshot import iter_snapshot
+    return np.concatenate([embeddings for _, _, _, embeddings in iter_snapshot(path)])
+
+def exact_top_k(corpus, queries, k: int, space: str):
+    """Row numbers of the true k nearest neighbours of every query under the given space."""
+    import numpy as np
+    if space == "cosine":
+        corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    squared_norms = (corpus ** 2).sum(axis=1)
+    neighbours = []
+    for start in range(0, len(queries), 64):
+        block = queries[start:start + 64]
+        scores = block @ corpus.T
+        if space == "l2":
+            # Smallest squared distance; the query's own norm does not change the order
+            scores = 2 * scores - squared_norms
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        neighbours.append(np.take_along_axis(top, order, axis=1))
+    return np.concatenate(neighbours)
+
+def fill_store(store, corpus, insert_batch: int) -> float:
+    """Insert the corpus with row numbers as IDs. Returns the seconds taken."""
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), insert_batch):
+        rows = range(offset, min(offset + insert_batch, len(corpus)))
+        store.add(ids=[str(row) for row in rows], embeddings=corpus[offset:offset + insert_batch],
+                  documents=["" for _ in rows], metadatas=[{"row": row} for row in rows])
+    return time.perf_counter() - start
+
+def measure(store, queries, truth, k: int) -> dict:
+    """Recall@k and single-query latency, querying one embedding at a time as the server does."""
+    timings, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = store.query(query_embeddings=[query], n_results=k, include=[])["ids"][0]
+        timings.append(time.perf_counter() - start)
+        hits += len(set(int(row) for row in found) & set(expected.tolist()))
+    timings.sort()
+    return {
+        "recall": hits / (len(queries) * k),
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+    }
+
+def open_chroma(path: str, hnsw: dict):
+    from chromadb.api.client import SharedSystemClient
+    from db.vector_stores import ChromaVectorStore
+
+    # Chroma reads ef_search when it loads an index and keeps loaded indexes for the
+    # life of the process, so drop them to make the new search ef take effect
+    SharedSystemClient.clear_system_cache()
+    return ChromaVectorStore(path, "hnsw_sweep", hnsw)
+
+def pick_operating_point(results, target_recall: float):
+    """The fastest HNSW setting that reaches the target recall, or the most accurate one if none does."""
+    hnsw_results = [r for r in results if r["store"] == "chroma"]
+    good = [r for r in hnsw_results if r["recall"] >= target_recall]
+    if good:
+        return min(good, key=lambda r: r["median_ms"])
+    return max(hnsw_results, key=lambda r: (r["recall"], -r["median_ms"]), default=None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Chroma HNSW parameters for recall against latency")
+    parser.add_argument("--snapshot", help="Take the corpus from a SecondBrain snapshot instead of synthetic vectors")
+    parser.add_argument("--chunks", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic embedding dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="Topic clusters in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query for recall@k")
+    parser.add_argument("--spaces", default="cosine,l2", help="Comma-separated spaces: cosine, l2, ip")
+    parser.add_argument("--m", type=parse_int_list, default=[8, 16, 32], help="HNSW max neighbours (M)")
+    parser.add_argument("--construction-ef", type=parse_int_list, default=[100, 200])
+    parser.add_argument("--search-ef", type=parse_int_list, default=[10, 20, 40, 80, 160])
+    parser.add_argument("--insert-batch", type=int, default=4000)
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Recall the recommended setting must reach")
+    parser.add_argument("--output", default="hnsw_sweep.json")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(ROOT_DIR, "fastapi-server"))
+    import numpy as np
+    from db.numpy_store import NumpyVectorStore
+    from db.vector_stores import directory_bytes
+
+    if args.snapshot:
+        vectors = load_snapshot_vectors(args.snapshot)
+        # Hold stored chunks out of the index to serve as queries
+        order = np.random.default_rng(0).permutation(len(vectors))
+        queries, corpus = vectors[order[:args.queries]], vectors[order[args.queries:]]
+    else:
+        corpus = clustered_unit_vectors(args.chunks, args.dim, args.clusters, seed=0)
+        queries = clustered_unit_vectors(args.queries, args.dim, args.clusters, seed=1)
+    print(f"Corpus: {len(corpus)} x {corpus.shape[1]}, {len(queries)} queries, recall@{args.k}")
+
+    workdir = tempfile.mkdtemp(prefix="secondbrain-hnsw-")
+    results = []
+    try:
+        exact = NumpyVectorStore(os.path.join(workdir, "numpy"), "hnsw_sweep")
+        fill_store(exact, corpus, args.insert_batch)
+        result = {"store": "numpy", "space": "cosine",
+                  **measure(exact, queries, exact_top_k(corpus, queries, args.k, "cosine"), args.k)}
+        results.append(result)
+        print(f"numpy exact: recall {result['recall']:.3f}, p50 {result['median_ms']:.2f} ms")
+
+        for space in filter(None, args.spaces.split(",")):
+            truth = exact_top_k(corpus, queries, args.k, space)
+            for m in args.m:
+                for construction_ef in args.construction_ef:
+                    path = os.path.join(workdir, f"{space}-{m}-{construction_ef}")
+                    hnsw = {"space": space, "max_neighbors": m, "ef_construction": construction_ef,
+                            "ef_search": args.search_ef[0]}
+                    build_seconds = fill_store(open_chroma(path, hnsw), corpus, args.insert_batch)
+                    index_bytes = directory_bytes(path)
+
+                    for search_ef in args.search_ef:
+                        store = open_chroma(path, {**hnsw, "ef_search": search_ef})
+                        result = {"store": "chroma", "space": space, "m": m, "construction_ef": construction_ef,
+                                  "search_ef": search_ef, "build_seconds": build_seconds,
+                                  "index_bytes": index_bytes, **measure(store, queries, truth, args.k)}
+                        results.append(result)
+                        print(f"{space} M={m} construction_ef={construction_ef} search_ef={search_ef}: "
+                              f"recall {result['recall']:.3f}, p50 {result['median_ms']:.2f} ms, "
+                              f"p95 {result['p95_ms']:.2f} ms")
+                    shutil.rmtree(path, ignore_errors=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    best = pick_operating_point(results, args.target_recall)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": len(corpus),
+            "dimension": int(corpus.shape[1]),
+            "args": vars(args),
+        },
+        "results": results,
+        "recommended": best,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if best is not None:
+        if best["recall"] >= args.target_recall:
+            print(f"\nFastest setting reaching recall {args.target_recall}", end="")
+        else:
+            print(f"\nNo setting reached recall {args.target_recall}; the most accurate one", end="")
+        print(f" (recall {best['recall']:.3f}, p50 {best['median_ms']:.2f} ms):")
+        print(f"  SECONDBRAIN_VECTOR_SPACE={best['space']}")
+        print(f"  SECONDBRAIN_HNSW_M={best['m']}")
+        print(f"  SECONDBRAIN_HNSW_CONSTRUCTION_EF={best['construction_ef']}")
+        print(f"  SECONDBRAIN_HNSW_SEARCH_EF={best['search_ef']}")
+        print("Then rebuild the collection: cd fastapi-server && python -m db.maintenance migrate")
+
+if __name__ == "__main__":
+    main()
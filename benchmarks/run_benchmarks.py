@@ -0,0 +1,265 @@
+"""
+Microbenchmarks for the SecondBrain ingest and retrieval hot paths.
+
+Runs offline against synthetic corpora in a temporary directory, so it never
+touches ./vector_store. Results are written as JSON so runs from different
+commits can be compared:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Word list for synthetic text; sentence shapes matter more than vocabulary here
+WORDS = (
+    "the a of to and in is it that for on was with as by this be are from or at an not "
+    "knowledge page video error code python server model vector query chunk token embedding "
+    "browser extension capture article transcript latency index search result answer context "
+    "database storage memory network request response cache batch worker process thread"
+).split()
+
+def synthetic_text(num_bytes: int, seed: int = 0) -> str:
+    """Generate roughly num_bytes of sentence-shaped text."""
+    rng = random.Random(seed)
+    sentences = []
+    size = 0
+    while size < num_bytes:
+        words = rng.choices(WORDS, k=rng.randint(6, 30))
+        sentence = " ".join(words).capitalize() + rng.choice([". ", ". ", ". ", "? ", "! ", ".\n"])
+        sentences.append(sentence)
+        size += len(sentence)
+    return "".join(sentences)[:num_bytes]
+
+def random_unit_vectors(count: int, dim: int, seed: int = 0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def time_call(fn, repeat: int):
+    """Run fn repeat times and return per-call timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "min_seconds": ordered[0],
+        "median_seconds": statistics.median(ordered),
+        "p95_seconds": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+def bench_chunk_text(sizes_kb, repeat):
+    from api.ingest import chunk_text
+
+    results = []
+    for size_kb in sizes_kb:
+        text = synthetic_text(int(size_kb * 1024), seed=size_kb)
+        chunk_count = len(list(chunk_text(text)))
+        stats = summarize(time_call(lambda: list(chunk_text(text)), repeat))
+        stats.update({
+            "benchmark": "chunk_text",
+            "params": {"size_kb": size_kb},
+            "chunks": chunk_count,
+            "mb_per_second": (len(text) / 1e6) / stats["median_seconds"],
+        })
+        results.append(stats)
+        print(f"chunk_text {size_kb} KB: {stats['median_seconds'] * 1000:.2f} ms ({stats['mb_per_second']:.2f} MB/s)")
+    return results
+
+def bench_embeddings(batch_sizes, repeat, loop):
+    from models.embedding_model import create_embeddings, create_embeddings_batch
+
+    results = []
+    texts = [synthetic_text(900, seed=i) for i in range(max(batch_sizes))]
+
+    # Warm up the model so the first measured call does not pay for lazy initialization
+    loop.run_until_complete(create_embeddings(texts[0], {}))
+
+    single = summarize(time_call(lambda: loop.run_until_complete(create_embeddings(texts[0], {})), repeat))
+    single.update({"benchmark": "create_embeddings", "params": {"batch_size": 1}, "texts_per_second": 1 / single["median_seconds"]})
+    results.append(single)
+    print(f"create_embeddings single: {single['median_seconds'] * 1000:.2f} ms")
+
+    for batch_size in batch_sizes:
+        batch = texts[:batch_size]
+        stats = summarize(time_call(lambda: loop.run_until_complete(create_embeddings_batch(batch)), repeat))
+        stats.update({
+            "benchmark": "create_embeddings_batch",
+            "params": {"batch_size": batch_size},
+            "texts_per_second": batch_size / stats["median_seconds"],
+        })
+        results.append(stats)
+        print(f"create_embeddings_batch {batch_size}: {stats['median_seconds'] * 1000:.2f} ms ({stats['texts_per_second']:.1f} texts/s)")
+    return results
+
+def bench_vector_db(collection_sizes, queries, insert_batch, dim, loop):
+    from db.vector_db import add_many_to_vector_db, get_vector_store, query_vector_db
+
+    results = []
+    stored = get_vector_store().count()
+    query_vectors = random_unit_vectors(queries, dim, seed=10**6)
+
+    for target in sorted(collection_sizes):
+        # Grow the collection to the target size, timing the inserts
+        insert_seconds = 0.0
+        inserted = 0
+        while stored < target:
+            count = min(insert_batch, target - stored)
+            vectors = random_unit_vectors(count, dim, seed=stored)
+            ids = [f"bench-{stored + i}" for i in range(count)]
+            texts = [f"synthetic chunk {stored + i}" for i in range(count)]
+            metadatas = [
+                {"source_url": f"https://bench.local/{(stored + i) // 8}", "document_id": str((stored + i) // 8), "chunk_index": (stored + i) % 8}
+                for i in range(count)
+            ]
+            start = time.perf_counter()
+            loop.run_until_complete(add_many_to_vector_db(ids=ids, texts=texts, embeddings=vectors, metadatas=metadatas))
+            insert_seconds += time.perf_counter() - start
+            inserted += count
+            stored += count
+
+        if inserted:
+            results.append({
+                "benchmark": "add_to_vector_db",
+                "params": {"collection_size": target, "insert_batch": insert_batch},
+                "inserted": inserted,
+                "seconds": insert_seconds,
+                "chunks_per_second": inserted / insert_seconds,
+            })
+            print(f"add_to_vector_db up to {target}: {inserted / insert_seconds:.0f} chunks/s")
+
+        query_iter = iter(query_vectors)
+        stats = summarize(time_call(
+            lambda: loop.run_until_complete(query_vector_db(next(query_iter).tolist(), limit=3, threshold=-1.0)),
+            queries
+        ))
+        stats.update({"benchmark": "query_vector_db", "params": {"collection_size": target, "limit": 3}})
+        results.append(stats)
+        print(f"query_vector_db at {target}: p50 {stats['median_seconds'] * 1000:.2f} ms, p95 {stats['p95_seconds'] * 1000:.2f} ms")
+
+    return results
+
+def result_key(result):
+    return result["benchmark"] + json.dumps(result["params"], sort_keys=True)
+
+def compare(results, baseline_path, tolerance):
+    """Print median time ratios against a baseline run and return the regressions."""
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nComparison with {baseline_path} (ratio = current / baseline, >1 is slower):")
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            continue
+        metric = "median_seconds" if "median_seconds" in result else "seconds"
+        current_value = result[metric]
+        previous_value = previous[metric]
+        if metric == "seconds":
+            # Insert runs can cover different row counts; compare per-chunk time
+            current_value /= result["inserted"]
+            previous_value /= previous["inserted"]
+        ratio = current_value / previous_value if previous_value else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"  {result['benchmark']} {result['params']}: {ratio:.2f}x{flag}")
+        if flag:
+            regressions.append({"benchmark": result["benchmark"], "params": result["params"], "ratio": ratio})
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return None
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SecondBrain ingest and retrieval hot paths")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Slowdown ratio above which a result is a regression")
+    parser.add_argument("--chunk-sizes-kb", type=parse_int_list, default=[1, 16, 256, 1024, 5120])
+    parser.add_argument("--embedding-batch-sizes", type=parse_int_list, default=[8, 32, 128])
+    parser.add_argument("--collection-sizes", type=parse_int_list, default=[1000, 10000, 100000],
+                        help="Collection sizes for query latency (add 1000000 for the full sweep)")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per collection size")
+    parser.add_argument("--insert-batch", type=int, default=4000)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension for synthetic vectors")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--vector-store", default="chroma", choices=["chroma", "numpy"],
+                        help="Vector store backend to benchmark")
+    parser.add_argument("--skip", default="", help="Comma-separated groups to skip: chunk,embed,vector")
+    args = parser.parse_args()
+    skip = set(args.skip.split(","))
+
+    workdir = tempfile.mkdtemp(prefix="secondbrain-bench-")
+    # Point every store at the scratch directory before the modules are imported
+    os.environ["SECONDBRAIN_VECTOR_STORE_PATH"] = os.path.join(workdir, "vector_store")
+    os.environ["SECONDBRAIN_VECTOR_STORE"] = args.vector_store
+    os.environ["SECONDBRAIN_JOB_QUEUE_PATH"] = os.path.join(workdir, "job_queue.sqlite3")
+    os.environ["SECONDBRAIN_KEYWORD_INDEX_PATH"] = os.path.join(workdir, "keyword_index.sqlite3")
+    os.environ["SECONDBRAIN_EMBEDDING_CACHE_DIR"] = os.path.join(workdir, "embedding_cache")
+    os.environ["SECONDBRAIN_EMBEDDING_CACHE_MAX_MB"] = "0"  # measure the model, not the cache
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    sys.path.insert(0, os.path.join(ROOT_DIR, "fastapi-server"))
+
+    loop = asyncio.new_event_loop()
+    results = []
+    try:
+        if "chunk" not in skip:
+            results += bench_chunk_text(args.chunk_sizes_kb, args.repeat)
+        if "embed" not in skip:
+            results += bench_embeddings(args.embedding_batch_sizes, args.repeat, loop)
+        if "vector" not in skip:
+            results += bench_vector_db(args.collection_sizes, args.queries, args.insert_batch, args.dim, loop)
+    finally:
+        loop.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.compare:
+        report["regressions"] = compare(results, args.compare, args.tolerance)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare and report["regressions"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Import and startup time budget for SecondBrain.
+
+Measures, in fresh interpreters against a scratch directory:
+- how long `import main` takes, with the slowest top-level imports
+- how long a uvicorn server takes to answer / (API up) and /ready (warm)
+
+Exits non-zero when a measurement is over its budget:
+
+    python benchmarks/startup_time.py --import-budget 1.5 --ready-budget 30
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from run_benchmarks import git_commit
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def scratch_env(workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT_DIR, env.get("PYTHONPATH")])),
+        "SECONDBRAIN_VECTOR_STORE_PATH": os.path.join(workdir, "vector_store"),
+        "SECONDBRAIN_JOB_QUEUE_PATH": os.path.join(workdir, "job_queue.sqlite3"),
+        "SECONDBRAIN_KEYWORD_INDEX_PATH": os.path.join(workdir, "keyword_index.sqlite3"),
+        "SECONDBRAIN_EMBEDDING_CACHE_DIR": os.path.join(workdir, "embedding_cache"),
+    })
+    env.setdefault("HF_HUB_OFFLINE", "1")
+    return env
+
+def measure_import(env: dict, workdir: str, repeat: int, top: int) -> dict:
+    """Time `import main` in fresh interpreters and list the slowest direct imports."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], env=env, cwd=workdir, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+
+    # Interpreter startup alone, so the import cost can be separated out
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], env=env, cwd=workdir, check=True)
+    interpreter_seconds = time.perf_counter() - start
+
+    trace = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], env=env, cwd=workdir,
+                           check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    modules = []
+    for line in trace.splitlines():
+        match = _IMPORT_LINE.match(line)
+        # Depth 1 and 2: main itself and what it imports directly
+        if match and len(match.group(3)) <= 3:
+            modules.append({"module": match.group(4), "cumulative_seconds": int(match.group(2)) / 1e6})
+    modules.sort(key=lambda m: m["cumulative_seconds"], reverse=True)
+
+    return {
+        # What importing the app adds on top of starting Python
+        "import_seconds": max(0.0, statistics.median(timings) - interpreter_seconds),
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "interpreter_seconds": interpreter_seconds,
+        "slowest_imports": modules[:top],
+    }
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for(url: str, deadline: float, ok_status=(200,)):
+    """Poll url until it answers with an accepted status; return False on timeout."""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status in ok_status:
+                    return True
+        except urllib.error.HTTPError as e:
+            if e.code in ok_status:
+                return True
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.05)
+    return False
+
+def measure_server(env: dict, workdir: str, timeout: float) -> dict:
+    """Start uvicorn and time how long until the API answers and until /ready reports warm."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = start + timeout
+        up = wait_for(f"{base_url}/", deadline)
+        up_seconds = time.perf_counter() - start if up else None
+        ready = up and wait_for(f"{base_url}/ready/", deadline)
+        ready_seconds = time.perf_counter() - start if ready else None
+
+        report = None
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready/", timeout=2) as response:
+                report = json.load(response)
+        except urllib.error.HTTPError as e:
+            report = json.load(e)
+        except Exception:
+            pass
+        return {"api_up_seconds": up_seconds, "ready_seconds": ready_seconds, "ready_report": report}
+    finally:
+        # SIGINT lets uvicorn run the shutdown hook, which also stops Streamlit
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SecondBrain import and startup time against a budget")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh-interpreter imports to time")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to report")
+    parser.add_argument("--import-budget", type=float, default=1.5,
+                        help="Max seconds `import main` adds on top of interpreter startup")
+    parser.add_argument("--api-budget", type=float, default=3.0, help="Max seconds until the API answers")
+    parser.add_argument("--ready-budget", type=float, default=60.0, help="Max seconds until /ready returns 200")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure the import")
+    parser.add_argument("--output", default="startup_time.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="secondbrain-startup-")
+    env = scratch_env(workdir)
+    try:
+        results = {"import": measure_import(env, workdir, args.repeat, args.top)}
+        imported = results["import"]
+        print(f"import main: {imported['import_seconds']:.2f}s on top of interpreter startup "
+              f"(median {imported['median_seconds']:.2f}s, interpreter alone {imported['interpreter_seconds']:.2f}s)")
+        for module in imported["slowest_imports"]:
+            print(f"  {module['cumulative_seconds']:.3f}s  {module['module']}")
+
+        if not args.skip_server:
+            results["server"] = measure_server(env, workdir, timeout=args.ready_budget + 10)
+            server = results["server"]
+            print(f"API up after {server['api_up_seconds']}s, ready after {server['ready_seconds']}s")
+            if server["ready_report"]:
+                for name, state in server["ready_report"]["components"].items():
+                    print(f"  {name}: {state}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    over_budget = []
+    if imported["import_seconds"] > args.import_budget:
+        over_budget.append(f"import {imported['import_seconds']:.2f}s > {args.import_budget}s")
+    if not args.skip_server:
+        if server["api_up_seconds"] is None or server["api_up_seconds"] > args.api_budget:
+            over_budget.append(f"API up {server['api_up_seconds']}s > {args.api_budget}s")
+        if server["ready_seconds"] is None or server["ready_seconds"] > args.ready_budget:
+            over_budget.append(f"ready {server['ready_seconds']}s > {args.ready_budget}s")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+        "over_budget": over_budget,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote results to {args.output}")
+
+    if over_budget:
+        print("Over budget: " + "; ".join(over_budget))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Semantic answer cache for SecondBrain.
+Reuses a previous LLM answer when a new question is close enough to a cached
+one and retrieval returned the same chunks.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from monitoring.metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_SIZE = int(os.environ.get("SECONDBRAIN_ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_MAX_DISTANCE = float(os.environ.get("SECONDBRAIN_ANSWER_CACHE_MAX_DISTANCE", "0.05"))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("SECONDBRAIN_ANSWER_CACHE_TTL_SECONDS", "86400"))
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+class _CacheEntry:
+    __slots__ = ("key", "embedding", "chunk_ids", "rank_floor", "response", "expires_at")
+
+    def __init__(self, key, embedding, chunk_ids, rank_floor, response, expires_at):
+        self.key = key
+        self.embedding = embedding
+        self.chunk_ids = chunk_ids
+        self.rank_floor = rank_floor
+        self.response = response
+        self.expires_at = expires_at
+
+class SemanticAnswerCache:
+    """
+    Cache of final answers keyed by question embedding and retrieved chunk IDs.
+
+    A lookup hits when a cached question for the same model lies within
+    max_distance (cosine distance) of the new question and retrieval returned
+    exactly the same chunk set. Each entry remembers the lowest similarity a
+    chunk needed to make its top-k (rank_floor), so newly ingested chunks that
+    would rank for the question evict it.
+    """
+
+    def __init__(self, max_size: int = ANSWER_CACHE_SIZE, max_distance: float = ANSWER_CACHE_MAX_DISTANCE,
+                 ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str, question_embedding, chunk_ids: Iterable[str]) -> Optional[Any]:
+        """Return a cached response for a near-identical question with the same retrieved chunks."""
+        chunk_ids = frozenset(chunk_ids)
+        query = _normalize(question_embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            best_id, best_distance = None, None
+            for entry_id, entry in list(self._entries.items()):
+                if entry.expires_at <= now:
+                    del self._entries[entry_id]
+                    continue
+                if entry.key != key or entry.chunk_ids != chunk_ids:
+                    continue
+                distance = 1.0 - float(np.dot(entry.embedding, query))
+                if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                    best_id, best_distance = entry_id, distance
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            logger.info(f"Answer cache hit (cosine distance {best_distance:.4f})")
+            return self._entries[best_id].response
+
+    def put(self, key: str, question_embedding, chunk_ids: Iterable[str], rank_floor: float, response: Any):
+        """
+        Cache a response.
+
+        Args:
+            key: Provider/model the answer was generated with
+            question_embedding: Embedding of the question
+            chunk_ids: IDs of the chunks the answer was built from
+            rank_floor: Minimum similarity a new chunk needs to be retrieved for this question
+            response: The response to return on a hit
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[self._next_id] = _CacheEntry(
+                key=key,
+                embedding=_normalize(question_embedding),
+                chunk_ids=frozenset(chunk_ids),
+                rank_floor=rank_floor,
+                response=response,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_for_embeddings(self, embeddings) -> int:
+        """
+        Drop cached answers that newly stored chunks would now rank for.
+
+        Args:
+            embeddings: Embeddings of the chunks that were just stored
+
+        Returns:
+            Number of evicted entries
+        """
+        if not len(embeddings):
+            return 0
+
+        new_vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(new_vectors, axis=1, keepdims=True)
+        new_vectors = new_vectors / np.where(norms > 0, norms, 1)
+
+        with self._lock:
+            if not self._entries:
+                return 0
+
+            entry_ids = list(self._entries.keys())
+            questions = np.stack([self._entries[entry_id].embedding for entry_id in entry_ids])
+            floors = np.array([self._entries[entry_id].rank_floor for entry_id in entry_ids], dtype=np.float32)
+
+            # Best similarity of any new chunk to each cached question
+            best = (questions @ new_vectors.T).max(axis=1)
+            stale = [entry_id for entry_id, is_stale in zip(entry_ids, best >= floors) if is_stale]
+            for entry_id in stale:
+                del self._entries[entry_id]
+
+            self.invalidations += len(stale)
+
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached answers after ingest")
+        return len(stale)
+
+    def invalidate_for_chunks(self, chunk_ids: Iterable[str]) -> int:
+        """
+        Drop cached answers that were built from chunks that no longer exist.
+
+        Args:
+            chunk_ids: IDs of the chunks that were just deleted
+
+        Returns:
+            Number of evicted entries
+        """
+        deleted = frozenset(chunk_ids)
+        if not deleted:
+            return 0
+
+        with self._lock:
+            stale = [entry_id for entry_id, entry in self._entries.items() if entry.chunk_ids & deleted]
+            for entry_id in stale:
+                del self._entries[entry_id]
+            self.invalidations += len(stale)
+
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached answers after delete")
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+answer_cache = SemanticAnswerCache()
+register_cache("answer", answer_cache.stats)
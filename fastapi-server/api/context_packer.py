@@ -0,0 +1,139 @@
+"""
+Context packing for SecondBrain prompts.
+Retrieved chunks are merged back into contiguous passages, the overlap that
+chunking repeats between neighbours is removed, and passages are added in
+rank order until the model's token budget is used up.
+"""
+
+import logging
+import math
+import re
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECTION_SEPARATOR = "\n\n---\n\n"
+
+# Longest overlap searched for between neighbouring chunks, and the shortest
+# shared span treated as overlap rather than a coincidence
+MAX_OVERLAP_CHARS = 4000
+MIN_OVERLAP_CHARS = 8
+
+# A passage is only truncated to fit if at least this many tokens remain
+MIN_SECTION_TOKENS = 32
+
+_ASCII_LETTERS = re.compile(r"[A-Za-z]+")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Conservative estimate of the LLM token count of text, without a tokenizer.
+
+    ASCII letters count three to a token (English words average about four
+    letters per token); digits, punctuation, line breaks and non-ASCII
+    characters count one token each, since URLs, hashes, numbers and code
+    tokenize far denser than prose; spaces are free, as tokenizers fold them
+    into the following word. This overestimates ordinary text for the common
+    tokenizers, but it is not a guaranteed bound, so prompt budgets keep a
+    safety margin on top of it.
+    """
+    letters = len(text) - len(_ASCII_LETTERS.sub("", text))
+    return math.ceil(letters / 3) + (len(text) - letters - text.count(" "))
+
+def merge_overlap(left: str, right: str) -> str:
+    """Join two neighbouring chunks, dropping the start of right that repeats the end of left."""
+    probe = right[:MIN_OVERLAP_CHARS]
+    if len(probe) == MIN_OVERLAP_CHARS:
+        position = left.find(probe, max(0, len(left) - MAX_OVERLAP_CHARS))
+        while position != -1:
+            # The first match is the longest suffix of left that right starts with
+            if right.startswith(left[position:]):
+                return left + right[len(left) - position:]
+            position = left.find(probe, position + 1)
+    return left + " " + right
+
+def _group_passages(sorted_chunks: list) -> List[Dict]:
+    """Merge runs of consecutive chunks from the same document into passages, best-ranked first."""
+    documents = {}
+    for rank, (chunk, _) in enumerate(sorted_chunks):
+        metadata = chunk.get("metadata") or {}
+        # Chunks stored without a document ID cannot be joined with anything
+        document_key = metadata.get("document_id") or chunk["id"]
+        documents.setdefault(document_key, []).append((rank, chunk))
+
+    passages = []
+    for chunks in documents.values():
+        chunks.sort(key=lambda item: item[1]["metadata"].get("chunk_index", 0))
+        current = None
+        for rank, chunk in chunks:
+            index = chunk["metadata"].get("chunk_index")
+            if current is not None and index is not None and current["last_index"] is not None \
+                    and index == current["last_index"] + 1:
+                current["text"] = merge_overlap(current["text"], chunk["text"])
+                current["chunk_ids"].append(chunk["id"])
+                current["rank"] = min(current["rank"], rank)
+                current["last_index"] = index
+                continue
+            current = {
+                "text": chunk["text"],
+                "title": chunk["metadata"].get("title", "Untitled"),
+                "source_url": chunk["metadata"].get("source_url", "Unknown source"),
+                "chunk_ids": [chunk["id"]],
+                "rank": rank,
+                "last_index": index,
+            }
+            passages.append(current)
+
+    passages.sort(key=lambda passage: passage["rank"])
+    return passages
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens (estimated), preferring a sentence or word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Every character costs at most one token, so this prefix always fits
+    cut = text[:max(0, max_tokens - 1)]
+    while cut and estimate_tokens(cut) + 1 > max_tokens:
+        cut = cut[:-max(1, len(cut) // 10)]
+    for boundary in (". ", "\n", " "):
+        position = cut.rfind(boundary)
+        if position > len(cut) // 2:
+            cut = cut[:position + 1]
+            break
+    return cut.rstrip() + "…"
+
+def pack_context(sorted_chunks: list, budget_tokens: int) -> Tuple[str, List[str]]:
+    """
+    Pack retrieved chunks into a context string that fits the token budget.
+
+    Args:
+        sorted_chunks: List of (chunk, similarity) in rank order
+        budget_tokens: Maximum estimated tokens for the whole context string
+
+    Returns:
+        Tuple of (context string, IDs of the chunks that made it in)
+    """
+    sections = []
+    used_ids = []
+    used_tokens = 0
+    separator_tokens = estimate_tokens(SECTION_SEPARATOR)
+
+    for passage in _group_passages(sorted_chunks):
+        header = f"Source {len(sections) + 1} - {passage['title']} ({passage['source_url']}):\n"
+        overhead = estimate_tokens(header) + (separator_tokens if sections else 0)
+        remaining = budget_tokens - used_tokens - overhead
+        if remaining <= 0:
+            break
+
+        text = passage["text"]
+        if estimate_tokens(text) > remaining:
+            if remaining < MIN_SECTION_TOKENS:
+                break
+            text = _truncate(text, remaining)
+
+        sections.append(header + text)
+        used_ids.extend(passage["chunk_ids"])
+        used_tokens += overhead + estimate_tokens(text)
+
+    logger.info(f"Packed {len(used_ids)}/{len(sorted_chunks)} chunks into {len(sections)} sections, "
+                f"~{used_tokens}/{budget_tokens} tokens")
+    return SECTION_SEPARATOR.join(sections), used_ids
@@ -0,0 +1,165 @@
+"""
+Document lifecycle API for SecondBrain.
+Deletes stored documents by ID or URL, expires sources past their TTL in the
+background, and compacts the vector store after heavy deletes.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List
+
+from db.maintenance import (SOURCE_TTL_DAYS, TTL_SWEEP_INTERVAL_SECONDS, compact, delete_expired,
+                            parse_source_ttls)
+from db.snapshot import SNAPSHOT_DIR, export_snapshot, import_snapshot
+from db.vector_db import delete_from_vector_db, get_chunk_ids
+from models.embedding_model import EMBEDDING_MODEL_NAME
+from api.answer_cache import answer_cache
+from monitoring.metrics import CHUNKS_DELETED
+
+logger = logging.getLogger(__name__)
+
+# Set up router
+router = APIRouter(
+    prefix="/documents",
+    tags=["documents"],
+    responses={404: {"description": "Not found"}},
+)
+
+async def delete_chunks(ids: List[str], reason: str) -> int:
+    """Delete chunks and drop cached answers that were built from them."""
+    deleted = await delete_from_vector_db(ids)
+    answer_cache.invalidate_for_chunks(ids)
+    CHUNKS_DELETED.labels(reason).inc(deleted)
+    return deleted
+
+class TTLSweeper:
+    """Background task that deletes chunks past their source's TTL at a fixed interval."""
+
+    def __init__(self, ttls: Dict[str, float], interval_seconds: float = TTL_SWEEP_INTERVAL_SECONDS):
+        self.ttls = ttls
+        self.interval_seconds = interval_seconds
+        self._task = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.ttls)
+
+    async def sweep(self) -> int:
+        """Run one sweep now. Returns the number of chunks expired."""
+        ids = await delete_expired(self.ttls)
+        answer_cache.invalidate_for_chunks(ids)
+        CHUNKS_DELETED.labels("ttl").inc(len(ids))
+        return len(ids)
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+            logger.info(f"TTL sweeper started for {', '.join(self.ttls)} every {self.interval_seconds}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            # Sleep first so startup does not wait on opening the vector store
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"TTL sweep failed: {e}")
+
+ttl_sweeper = TTLSweeper(parse_source_ttls(SOURCE_TTL_DAYS))
+
+@router.delete("/")
+async def delete_document_by_url(url: str = Query(..., description="Source URL of the document")):
+    """Delete every chunk stored for a source URL."""
+    # Stored URLs went through URL validation, which may have added a trailing slash
+    variants = list({url, url.rstrip("/"), url.rstrip("/") + "/"})
+    ids = await get_chunk_ids({"source_url": {"$in": variants}})
+    if not ids:
+        raise HTTPException(status_code=404, detail=f"No document stored for {url}")
+    deleted = await delete_chunks(ids, "url")
+    logger.info(f"Deleted {deleted} chunks for {url}")
+    return {"url": url, "deleted_chunks": deleted}
+
+@router.post("/expire")
+async def expire_documents():
+    """Delete chunks past their source TTL now instead of waiting for the next sweep."""
+    if not ttl_sweeper.enabled:
+        raise HTTPException(status_code=400, detail="No source TTLs configured (SECONDBRAIN_SOURCE_TTL_DAYS)")
+    return {"deleted_chunks": await ttl_sweeper.sweep()}
+
+@router.post("/compact")
+async def compact_store():
+    """
+    Rebuild the vector store from its live chunks after heavy deletes.
+
+    Writes wait until compaction finishes; queries keep being answered. The
+    response reports the bytes and median query latency recovered.
+    """
+    try:
+        return await compact()
+    except Exception as e:
+        logger.error(f"Compaction failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Compaction failed: {str(e)}")
+
+def _snapshot_path(name: str) -> str:
+    # Only plain file names inside the snapshot directory
+    if not name or os.path.basename(name) != name or name.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid snapshot name {name!r}")
+    return os.path.join(SNAPSHOT_DIR, name)
+
+@router.post("/snapshot")
+async def create_snapshot(float16: bool = Query(False, description="Store embeddings as float16")):
+    """
+    Export every chunk with its embedding to a snapshot file in the snapshot directory.
+
+    Writes wait until the export finishes; queries keep being answered.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    name = time.strftime("secondbrain-%Y%m%d-%H%M%S.sbsnap", time.gmtime())
+    try:
+        report = await export_snapshot(_snapshot_path(name), float16=float16, embedding_model=EMBEDDING_MODEL_NAME)
+    except Exception as e:
+        logger.error(f"Snapshot export failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Snapshot export failed: {str(e)}")
+    return {**report, "name": name}
+
+@router.get("/snapshot/{name}")
+async def download_snapshot(name: str):
+    """Download a snapshot file, e.g. to warm up a new replica."""
+    path = _snapshot_path(name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Snapshot {name} not found")
+    return FileResponse(path, media_type="application/zip", filename=name)
+
+@router.post("/snapshot/{name}/restore")
+async def restore_snapshot(name: str, overwrite: bool = Query(False, description="Replace chunks that already exist")):
+    """Import a snapshot from the snapshot directory with batched inserts, without re-embedding."""
+    path = _snapshot_path(name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Snapshot {name} not found")
+    try:
+        report = await import_snapshot(path, embedding_model=EMBEDDING_MODEL_NAME, overwrite=overwrite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Restored chunks can change what any cached question would retrieve
+    answer_cache.clear()
+    return report
+
+@router.delete("/{document_id}")
+async def delete_document(document_id: str):
+    """Delete every chunk of a stored document."""
+    ids = await get_chunk_ids({"document_id": document_id})
+    if not ids:
+        raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
+    deleted = await delete_chunks(ids, "document")
+    logger.info(f"Deleted {deleted} chunks of document {document_id}")
+    return {"document_id": document_id, "deleted_chunks": deleted}
@@ -3,20 +3,53 @@ Ingest API endpoint for SecondBrain.
 Handles content ingestion, processing, and embedding.
 """
 
+import hashlib
+import itertools
+import json
 import logging
+import os
+import re
+import time
 import uuid
-from typing import Dict, Any, List, Optional
+import weakref
+from collections import deque
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from pydantic import BaseModel, Field, HttpUrl
 import asyncio
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Request
 
 # Import models and database
-from models.embedding_model import create_embeddings
-from db.vector_db import add_to_vector_db
+from models.embedding_model import create_embeddings_batch, get_max_seq_length, get_tokenizer
+from db.vector_db import (add_many_to_vector_db, delete_from_vector_db, filter_metadata, get_chunks_by_url,
+                          update_metadatas)
+from db.job_queue import JobWorkerPool, QueueFullError, job_queue
+from api.answer_cache import answer_cache
+from monitoring.metrics import INGEST_CHUNKS, INGEST_CHUNKS_PER_SECOND, INGEST_DOCUMENTS, INGEST_LATENCY
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Number of ingest jobs processed concurrently
+INGEST_WORKERS = int(os.environ.get("SECONDBRAIN_INGEST_WORKERS", "2"))
+
+# Number of new chunks pooled across documents before a bulk ingest flush
+BULK_INGEST_POOL_CHUNKS = int(os.environ.get("SECONDBRAIN_BULK_INGEST_POOL_CHUNKS", "512"))
+
+# Chunk sizes in embedding-model tokens
+CHUNK_MAX_TOKENS = int(os.environ.get("SECONDBRAIN_CHUNK_MAX_TOKENS", "254"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("SECONDBRAIN_CHUNK_OVERLAP_TOKENS", "48"))
+
+# Sentence boundaries: end punctuation before a new sentence, or line breaks. Closing
+# quotes/brackets after the punctuation are captured so they stay with their sentence
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])([\"')\]]*)[ \t]+(?=[A-Z0-9\"'(\[])|[ \t]*\n\s*")
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "vs", "etc", "e.g", "i.e", "inc", "ltd", "fig", "approx"}
+# Abbreviations that are also ordinary words ("said no.") count only before what they introduce
+_ABBREVIATIONS_BEFORE = {"no": re.compile(r"\d"), "St": re.compile(r"[A-Z][a-z]")}
+_TOKENIZE_BLOCK = 256
+
+# One lock per URL being ingested, dropped once nothing holds it
+_url_locks = weakref.WeakValueDictionary()
+
 # Set up router
 router = APIRouter(
     prefix="/ingest",
@@ -48,152 +81,424 @@ class WebpageContent(BaseModel):
     videoTranscriptions: List[VideoTranscription] = Field(default_factory=list)
     timestamp: str
 
-def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> List[str]:
+def iter_sentences(text: str) -> Iterator[str]:
+    """
+    Lazily split text into sentences.
+    
+    A boundary is sentence-ending punctuation followed by whitespace and an
+    uppercase letter, digit or opening quote/bracket, or any line break.
+    Common abbreviations ("e.g.", "Dr.") do not end a sentence, nor do
+    "No." before a number and "St." before a name.
+    """
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        if match.group(0).strip(" \t") == "" or "\n" not in match.group(0):
+            # Punctuation boundary: skip if the preceding word is an abbreviation
+            preceding = text[max(start, match.start() - 12):match.start()].split()
+            word = preceding[-1].rstrip(".!?\"')]") if preceding else ""
+            if word.lower() in _ABBREVIATIONS:
+                continue
+            before = _ABBREVIATIONS_BEFORE.get(word) or _ABBREVIATIONS_BEFORE.get(word.lower())
+            if before and before.match(text, match.end()):
+                continue
+        end = match.end(1) if match.group(1) is not None else match.start()
+        sentence = text[start:end].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+    
+    sentence = text[start:].strip()
+    if sentence:
+        yield sentence
+
+def _count_tokens(sentences: Iterator[str], tokenizer) -> Iterator[Tuple[str, int]]:
+    """Pair each sentence with its token count, tokenizing in blocks for speed."""
+    while True:
+        block = list(itertools.islice(sentences, _TOKENIZE_BLOCK))
+        if not block:
+            return
+        if tokenizer is None:
+            # No tokenizer available: roughly 4/3 tokens per word for English WordPiece
+            counts = [len(sentence.split()) * 4 // 3 + 1 for sentence in block]
+        else:
+            counts = [len(ids) for ids in tokenizer(block, add_special_tokens=False)["input_ids"]]
+        yield from zip(block, counts)
+
+def _split_long_sentence(sentence: str, chunk_size: int, chunk_overlap: int, tokenizer) -> Iterator[str]:
+    """Split a sentence longer than chunk_size tokens into overlapping token windows."""
+    if tokenizer is None:
+        words = sentence.split()
+        step = max(1, (chunk_size - chunk_overlap) * 3 // 4)
+        window = max(1, chunk_size * 3 // 4)
+        for begin in range(0, len(words), step):
+            yield " ".join(words[begin:begin + window])
+            if begin + window >= len(words):
+                return
+        return
+    
+    offsets = tokenizer(sentence, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    step = max(1, chunk_size - chunk_overlap)
+    for begin in range(0, len(offsets), step):
+        end = min(begin + chunk_size, len(offsets))
+        yield sentence[offsets[begin][0]:offsets[end - 1][1]]
+        if end == len(offsets):
+            return
+
+def chunk_text(text: str, chunk_size: Optional[int] = None, chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+               tokenizer=None) -> Iterator[str]:
     """
-    Split text into smaller, meaningful chunks with potential overlap.
+    Split text into sentence-aligned chunks that fit the embedding model.
+    
+    Runs as a generator in linear time: each sentence is tokenized once and
+    enters and leaves the sliding window once.
     
     Args:
         text: The text to chunk
-        chunk_size: Target size of each chunk in characters
-        chunk_overlap: Number of characters to overlap between chunks
+        chunk_size: Maximum chunk size in model tokens (defaults to the model's limit)
+        chunk_overlap: Number of tokens of trailing sentences repeated at the start of the next chunk
+        tokenizer: Tokenizer used to count tokens (defaults to the embedding model's)
         
-    Returns:
-        List of text chunks
+    Yields:
+        Text chunks
     """
-    # If text is shorter than chunk size, return it as a single chunk
-    if len(text) <= chunk_size:
-        return [text]
-    
-    # Split text into sentences
-    sentences = text.replace('\n', ' ').split('. ')
-    sentences = [s + '.' if not s.endswith('.') else s for s in sentences]
+    if tokenizer is None:
+        tokenizer = get_tokenizer()
+    if chunk_size is None:
+        # Leave room for the [CLS] and [SEP] tokens the model adds
+        chunk_size = min(CHUNK_MAX_TOKENS, get_max_seq_length() - 2)
+    chunk_overlap = min(chunk_overlap, chunk_size // 2)
     
-    chunks = []
-    current_chunk = []
-    current_chunk_len = 0
+    window = deque()
+    window_tokens = 0
+    has_new = False
     
-    for sentence in sentences:
-        sentence_len = len(sentence)
+    for sentence, tokens in _count_tokens(iter_sentences(text), tokenizer):
+        if tokens > chunk_size:
+            # Emit what we have, then cut the oversized sentence on token boundaries
+            if has_new:
+                yield " ".join(s for s, _ in window)
+            yield from _split_long_sentence(sentence, chunk_size, chunk_overlap, tokenizer)
+            window.clear()
+            window_tokens = 0
+            has_new = False
+            continue
         
-        # If adding this sentence would exceed chunk size, store current chunk and start a new one
-        if current_chunk_len + sentence_len > chunk_size and current_chunk:
-            chunks.append(' '.join(current_chunk))
+        if window_tokens + tokens > chunk_size and window:
+            yield " ".join(s for s, _ in window)
+            has_new = False
             
-            # Keep overlap sentences for the next chunk
-            overlap_size = 0
-            overlap_sentences = []
-            
-            # Work backwards through current chunk to find overlap sentences
-            for s in reversed(current_chunk):
-                if overlap_size + len(s) <= chunk_overlap:
-                    overlap_sentences.insert(0, s)
-                    overlap_size += len(s)
-                else:
-                    break
-                    
-            # Start new chunk with overlap sentences
-            current_chunk = overlap_sentences
-            current_chunk_len = overlap_size
-        
-        # Add the current sentence to the chunk
-        current_chunk.append(sentence)
-        current_chunk_len += sentence_len
-    
-    # Add the last chunk if it's not empty
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    
-    return chunks
+            # Keep trailing sentences as overlap, as long as the next sentence still fits
+            while window and (window_tokens > chunk_overlap or window_tokens + tokens > chunk_size):
+                _, dropped = window.popleft()
+                window_tokens -= dropped
+        
+        window.append((sentence, tokens))
+        window_tokens += tokens
+        has_new = True
+    
+    # Add the last chunk unless it only repeats overlap already emitted
+    if has_new:
+        yield " ".join(s for s, _ in window)
+
+def content_hash(text: str) -> str:
+    """Stable hash of a piece of text, used to detect unchanged pages and chunks."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def combine_content_text(content: WebpageContent) -> str:
+    """Combine the page text, image alt text and video transcriptions into one string."""
+    all_text = [f"Title: {content.title}", f"Content: {content.textContent}"]
+    
+    # Add image alt text
+    for img in content.images:
+        if img.alt and len(img.alt) > 0:
+            all_text.append(f"Image alt text: {img.alt}")
+    
+    # Add video transcriptions
+    for video in content.videoTranscriptions:
+        if video.transcription and len(video.transcription) > 0:
+            all_text.append(f"Video transcription: {video.transcription}")
+    
+    return " ".join(all_text)
+
+async def plan_document(content: WebpageContent) -> Dict[str, Any]:
+    """
+    Work out what has to change in the vector store for a captured page.
+    
+    Compares the page and chunk hashes against the stored version of the URL.
+    Returns a plan with status "unchanged" when the page is identical, along
+    with the chunks whose capture time needs moving up to this capture's;
+    otherwise the new chunks to embed and store, the kept chunks whose metadata
+    needs refreshing, and the superseded chunk IDs to delete.
+    """
+    source_url = str(content.url)
+    
+    # Combine all text content
+    combined_text = combine_content_text(content)
+    page_hash = content_hash(combined_text)
+    
+    # Short-circuit before any embedding work if this exact page is already stored
+    existing_chunks = await get_chunks_by_url(source_url)
+    page_filter_metadata = filter_metadata(source_url, content.timestamp)
+    if existing_chunks and all(c["metadata"].get("page_hash") == page_hash for c in existing_chunks):
+        # The page was seen again, so TTL expiry must count from this capture, not the first one
+        capture_metadata = {"timestamp": content.timestamp, **page_filter_metadata}
+        touched = [
+            c for c in existing_chunks
+            if c["metadata"].get("timestamp_epoch", float("-inf")) < capture_metadata["timestamp_epoch"]
+        ]
+        return {
+            "status": "unchanged",
+            "source_url": source_url,
+            "document_id": existing_chunks[0]["metadata"].get("document_id"),
+            "chunks": len(existing_chunks),
+            "characters": len(combined_text),
+            "touched_ids": [c["id"] for c in touched],
+            "touched_metadatas": [{**c["metadata"], **capture_metadata} for c in touched],
+        }
+    
+    # Keep the document ID of the stored version so the URL has one stable identity
+    if existing_chunks:
+        document_id = existing_chunks[0]["metadata"].get("document_id") or str(uuid.uuid4())
+    else:
+        document_id = str(uuid.uuid4())
+    
+    # Create chunks from the combined text
+    # Materialized because the chunk count is part of every chunk's metadata
+    chunks = list(chunk_text(combined_text))
+    chunk_hashes = [content_hash(chunk) for chunk in chunks]
+    logger.info(f"Created {len(chunks)} chunks from content")
+    
+    # Index stored chunks by the hash of their text
+    existing_by_hash = {}
+    for existing in existing_chunks:
+        existing_by_hash.setdefault(content_hash(existing["text"]), []).append(existing["id"])
+    used_ids = {existing["id"] for existing in existing_chunks}
+    
+    # Reuse stored chunks whose text is unchanged; everything else needs embedding
+    chunk_ids = []
+    new_indices = []
+    kept_ids = set()
+    for i, chunk_hash in enumerate(chunk_hashes):
+        candidates = existing_by_hash.get(chunk_hash)
+        if candidates:
+            chunk_id = candidates.pop()
+            kept_ids.add(chunk_id)
+        else:
+            occurrence = 0
+            while f"{document_id}-{chunk_hash[:16]}-{occurrence}" in used_ids:
+                occurrence += 1
+            chunk_id = f"{document_id}-{chunk_hash[:16]}-{occurrence}"
+            used_ids.add(chunk_id)
+            new_indices.append(i)
+        chunk_ids.append(chunk_id)
+    kept_indices = [i for i in range(len(chunks)) if chunk_ids[i] in kept_ids]
+    
+    # Create enhanced metadata for each chunk, with the domain and numeric time retrieval filters use
+    metadatas = [
+        {
+            "source_url": source_url,
+            "title": content.title,
+            "timestamp": content.timestamp,
+            **page_filter_metadata,
+            "document_id": document_id,
+            "chunk_index": i,
+            "total_chunks": len(chunks),
+            "chunk_hash": chunk_hashes[i],
+            "page_hash": page_hash,
+        }
+        for i in range(len(chunks))
+    ]
+    
+    return {
+        "status": "stored",
+        "source_url": source_url,
+        "document_id": document_id,
+        "chunks": len(chunks),
+        "characters": len(combined_text),
+        "new_ids": [chunk_ids[i] for i in new_indices],
+        "new_texts": [chunks[i] for i in new_indices],
+        "new_metadatas": [metadatas[i] for i in new_indices],
+        "kept_ids": [chunk_ids[i] for i in kept_indices],
+        "kept_metadatas": [metadatas[i] for i in kept_indices],
+        "superseded_ids": [existing["id"] for existing in existing_chunks if existing["id"] not in kept_ids],
+    }
+
+async def store_documents(plans: List[Dict[str, Any]]):
+    """
+    Apply one or more document plans with pooled writes.
+    
+    New chunks from every plan are embedded in one batch and stored with one
+    insert, then kept chunks are updated and superseded chunks deleted.
+    
+    Returns:
+        Tuple of (embed seconds, store seconds)
+    """
+    new_ids = [chunk_id for plan in plans for chunk_id in plan["new_ids"]]
+    new_texts = [text for plan in plans for text in plan["new_texts"]]
+    new_metadatas = [metadata for plan in plans for metadata in plan["new_metadatas"]]
+    
+    # Generate embeddings for the new chunks in one vectorized pass
+    embed_start = time.perf_counter()
+    embeddings = await create_embeddings_batch(new_texts)
+    embed_seconds = time.perf_counter() - embed_start
+    
+    # Store new chunks with a single insert, then retire the previous versions
+    store_start = time.perf_counter()
+    await add_many_to_vector_db(
+        ids=new_ids,
+        texts=new_texts,
+        embeddings=embeddings,
+        metadatas=new_metadatas
+    )
+    await update_metadatas(
+        ids=[chunk_id for plan in plans for chunk_id in plan["kept_ids"]],
+        metadatas=[metadata for plan in plans for metadata in plan["kept_metadatas"]]
+    )
+    await delete_from_vector_db([chunk_id for plan in plans for chunk_id in plan["superseded_ids"]])
+    store_seconds = time.perf_counter() - store_start
+    
+    # Drop cached answers that the new chunks would now rank for
+    answer_cache.invalidate_for_embeddings(embeddings)
+    
+    elapsed = embed_seconds + store_seconds
+    INGEST_CHUNKS.inc(len(new_ids))
+    INGEST_LATENCY.observe(elapsed)
+    if elapsed > 0:
+        INGEST_CHUNKS_PER_SECOND.set(len(new_ids) / elapsed)
+    
+    return embed_seconds, store_seconds
+
+def url_lock(source_url: str) -> asyncio.Lock:
+    """
+    Lock held from planning a URL until its plan is stored.
+    
+    Planning reads the stored version of the URL, so two captures of the same
+    page processed at once would both see it as new and store it twice. Never
+    wait for one while holding another, except in sorted URL order.
+    """
+    lock = _url_locks.get(source_url)
+    if lock is None:
+        lock = asyncio.Lock()
+        _url_locks[source_url] = lock
+    return lock
+
+async def plan_is_current(plan: Dict[str, Any]) -> bool:
+    """Whether the stored chunks of a planned URL are still the ones the plan was made against."""
+    existing_ids = {chunk["id"] for chunk in await get_chunks_by_url(plan["source_url"])}
+    return existing_ids == set(plan["kept_ids"]) | set(plan["superseded_ids"])
+
+def plan_summary(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Chunk counts for a document plan."""
+    if plan["status"] == "unchanged":
+        return {
+            "status": "unchanged",
+            "document_id": plan["document_id"],
+            "chunks": plan["chunks"],
+            "embedded": 0,
+            "reused": plan["chunks"],
+            "removed": 0,
+        }
+    return {
+        "status": "stored",
+        "document_id": plan["document_id"],
+        "chunks": plan["chunks"],
+        "embedded": len(plan["new_ids"]),
+        "reused": len(plan["kept_ids"]),
+        "removed": len(plan["superseded_ids"]),
+    }
 
 # Background task for processing content
-async def process_content_async(content: WebpageContent):
+async def process_content_async(content: WebpageContent) -> Dict[str, Any]:
     """
     Process webpage content asynchronously.
     1. Extract text from content and media
-    2. Chunk the text
-    3. Generate embeddings for each chunk
-    4. Store chunks in vector database
+    2. Skip the page if an identical version of the URL is already stored,
+       only moving its capture time up to this capture
+    3. Chunk the text and match chunk hashes against the stored version
+    4. Generate embeddings for the new chunks in one batch
+    5. Store new chunks, update kept ones and delete superseded ones,
+       leaving one live version of the URL
+    
+    Returns:
+        Ingest statistics for the document (ID, chunk counts, timing and throughput)
     """
     try:
         logger.info(f"Processing content from URL: {content.url}")
+        start_time = time.perf_counter()
         
-        # Combine all text content
-        all_text = [f"Title: {content.title}", f"Content: {content.textContent}"]
-        
-        # Add image alt text
-        for img in content.images:
-            if img.alt and len(img.alt) > 0:
-                all_text.append(f"Image alt text: {img.alt}")
-        
-        # Add video transcriptions
-        for video in content.videoTranscriptions:
-            if video.transcription and len(video.transcription) > 0:
-                all_text.append(f"Video transcription: {video.transcription}")
-        
-        combined_text = " ".join(all_text)
-        
-        # Generate a document ID for the overall content
-        document_id = str(uuid.uuid4())
-        
-        # Create chunks from the combined text
-        chunks = chunk_text(combined_text)
-        logger.info(f"Created {len(chunks)} chunks from content")
-        
-        # Process each chunk
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"{document_id}-chunk-{i}"
-            
-            # Generate embeddings for this chunk
-            embeddings = await create_embeddings(
-                text=chunk,
-                metadata={}  # Empty metadata for embedding generation
-            )
-            
-            # Create enhanced metadata for the chunk
-            metadata = {
-                "source_url": str(content.url),
-                "title": content.title,
-                "timestamp": content.timestamp,
-                "document_id": document_id,
-                "chunk_index": i,
-                "total_chunks": len(chunks)
-            }
+        async with url_lock(str(content.url)):
+            plan = await plan_document(content)
+            stats = plan_summary(plan)
+            INGEST_DOCUMENTS.labels(plan["status"]).inc()
             
-            # Store chunk in vector database
-            await add_to_vector_db(
-                text=chunk,
-                embeddings=embeddings,
-                metadata=metadata
-            )
+            if plan["status"] == "unchanged":
+                logger.info(f"Content unchanged for {plan['source_url']}, skipping (document {plan['document_id']})")
+                await update_metadatas(plan["touched_ids"], plan["touched_metadatas"])
+                stats["total_seconds"] = round(time.perf_counter() - start_time, 4)
+                return stats
             
-            logger.info(f"Stored chunk {i+1}/{len(chunks)} with ID: {chunk_id}")
+            embed_seconds, store_seconds = await store_documents([plan])
         
-        logger.info(f"Successfully processed and stored all chunks for document {document_id}")
+        total_seconds = time.perf_counter() - start_time
+        stats.update({
+            "characters": plan["characters"],
+            "embed_seconds": round(embed_seconds, 4),
+            "store_seconds": round(store_seconds, 4),
+            "total_seconds": round(total_seconds, 4),
+            "chunks_per_second": round(plan["chunks"] / total_seconds, 2) if total_seconds > 0 else None,
+        })
+        logger.info(
+            f"Successfully processed {stats['chunks']} chunks for document {stats['document_id']} "
+            f"({stats['embedded']} embedded, {stats['reused']} reused, {stats['removed']} removed) "
+            f"in {stats['total_seconds']}s ({stats['chunks_per_second']} chunks/s, "
+            f"embed {stats['embed_seconds']}s, store {stats['store_seconds']}s)"
+        )
+        return stats
         
     except Exception as e:
+        INGEST_DOCUMENTS.labels("error").inc()
         logger.error(f"Error processing content: {e}", exc_info=True)
         raise
 
+async def run_ingest_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: process a queued WebpageContent payload."""
+    return await process_content_async(WebpageContent(**payload))
+
+ingest_workers = JobWorkerPool(job_queue, {"ingest": run_ingest_job}, workers=INGEST_WORKERS)
+
 # Ingest endpoint
 @router.post("/")
-async def ingest_content(content: WebpageContent, background_tasks: BackgroundTasks):
+async def ingest_content(content: WebpageContent):
     """
     Ingest content extracted from a webpage.
     
-    The content is processed asynchronously in a background task.
+    The content is stored in the durable job queue and processed by the ingest
+    workers. Poll /ingest/{job_id} for the outcome. Returns 429 when the queue
+    is full.
     """
     try:
         logger.info(f"Received content from URL: {content.url}")
         
-        # Add the processing task to the background tasks
-        background_tasks.add_task(process_content_async, content)
+        # Persist the job before acknowledging so it survives a restart
+        loop = asyncio.get_event_loop()
+        job_id = await loop.run_in_executor(None, job_queue.enqueue, "ingest", json.loads(content.json()))
+        ingest_workers.notify()
         
         return {
             "status": "processing",
             "message": "Content received and queued for processing",
-            "url": content.url
+            "url": content.url,
+            "job_id": job_id
         }
         
+    except QueueFullError as e:
+        logger.warning(f"Rejecting content from {content.url}: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail="Ingest queue is full, please retry later",
+            headers={"Retry-After": "30"}
+        )
+        
     except Exception as e:
         logger.error(f"Error ingesting content: {e}", exc_info=True)
         return {
@@ -201,3 +506,161 @@ async def ingest_content(content: WebpageContent, background_tasks: BackgroundTa
             "message": f"Error ingesting content: {str(e)}",
             "url": content.url
         }
+
+async def iter_ndjson_lines(request: Request):
+    """
+    Yield (line number, line) pairs from a streamed newline-delimited body.
+    
+    Only each new piece is scanned for newlines, and a line split across
+    pieces is joined once, so the cost stays linear in the body size.
+    """
+    parts = []
+    line_number = 0
+    async for piece in request.stream():
+        start = 0
+        end = piece.find(b"\n")
+        while end != -1:
+            parts.append(piece[start:end])
+            line_number += 1
+            yield line_number, b"".join(parts)
+            parts = []
+            start = end + 1
+            end = piece.find(b"\n", start)
+        if start < len(piece):
+            parts.append(piece[start:])
+    if parts:
+        yield line_number + 1, b"".join(parts)
+
+# Bulk ingest endpoint
+@router.post("/bulk")
+async def bulk_ingest_content(request: Request):
+    """
+    Ingest many pages from a newline-delimited JSON body of WebpageContent records.
+    
+    Records are parsed as the body streams in. New chunks are pooled across
+    documents and embedded and stored in batches of about
+    BULK_INGEST_POOL_CHUNKS. Processing is synchronous; the response holds a
+    summary per record plus overall throughput.
+    
+    This deliberately bypasses the job queue: queued jobs are embedded one
+    page at a time, while a backfill needs chunks pooled across pages to get
+    large embedding batches, and its caller wants every record's outcome in
+    one response. Nothing is persisted for resuming, so an interrupted backfill
+    is re-sent; pages already stored come back as unchanged.
+    """
+    start_time = time.perf_counter()
+    results = []
+    # (result, content, plan) of the records waiting for the next flush
+    pending = []
+    pending_chunks = 0
+    
+    async def flush():
+        nonlocal pending, pending_chunks
+        batch, pending, pending_chunks = pending, [], 0
+        if not batch:
+            return
+        
+        # Locks are only taken here, all at once and in a fixed order, so concurrent bulk
+        # requests cannot deadlock and no lock is held while the body streams in
+        locks = []
+        try:
+            for source_url in sorted({plan["source_url"] for _, _, plan in batch}):
+                lock = url_lock(source_url)
+                await lock.acquire()
+                locks.append(lock)
+            
+            to_store = []
+            for result, content, plan in batch:
+                # Another writer may have changed the URL since it was planned
+                if not await plan_is_current(plan):
+                    plan = await plan_document(content)
+                    if plan["status"] == "unchanged":
+                        await update_metadatas(plan["touched_ids"], plan["touched_metadatas"])
+                        result.update(plan_summary(plan))
+                        continue
+                to_store.append((result, plan))
+            
+            await store_documents([plan for _, plan in to_store])
+            for result, plan in to_store:
+                result.update(plan_summary(plan))
+        except Exception as e:
+            logger.error(f"Error storing bulk ingest batch: {e}", exc_info=True)
+            for result, _, _ in batch:
+                if result["status"] == "pending":
+                    result.update({"status": "error", "error": f"Error storing batch: {str(e)}"})
+        finally:
+            for lock in locks:
+                lock.release()
+    
+    async for line_number, line in iter_ndjson_lines(request):
+        if not line.strip():
+            continue
+        
+        result = {"line": line_number}
+        results.append(result)
+        try:
+            content = WebpageContent(**json.loads(line))
+            result["url"] = str(content.url)
+        except Exception as e:
+            result.update({"status": "error", "error": f"Invalid record: {str(e)}"})
+            continue
+        
+        # Dedup reads the store, so earlier pending writes for the same URL must land first
+        if any(plan["source_url"] == result["url"] for _, _, plan in pending):
+            await flush()
+        
+        try:
+            # Only this URL's lock is held here, never together with another
+            async with url_lock(result["url"]):
+                plan = await plan_document(content)
+                if plan["status"] == "unchanged":
+                    await update_metadatas(plan["touched_ids"], plan["touched_metadatas"])
+        except Exception as e:
+            logger.error(f"Error planning bulk record {line_number}: {e}", exc_info=True)
+            result.update({"status": "error", "error": str(e)})
+            continue
+        
+        if plan["status"] == "unchanged":
+            result.update(plan_summary(plan))
+            continue
+        
+        result["status"] = "pending"
+        pending.append((result, content, plan))
+        pending_chunks += len(plan["new_ids"])
+        if pending_chunks >= BULK_INGEST_POOL_CHUNKS:
+            await flush()
+    
+    await flush()
+    
+    for result in results:
+        INGEST_DOCUMENTS.labels(result["status"]).inc()
+    
+    total_seconds = time.perf_counter() - start_time
+    total_chunks = sum(result.get("chunks", 0) for result in results)
+    summary = {
+        "records": len(results),
+        "stored": sum(1 for result in results if result["status"] == "stored"),
+        "unchanged": sum(1 for result in results if result["status"] == "unchanged"),
+        "errors": sum(1 for result in results if result["status"] == "error"),
+        "chunks": total_chunks,
+        "embedded": sum(result.get("embedded", 0) for result in results),
+        "total_seconds": round(total_seconds, 4),
+        "chunks_per_second": round(total_chunks / total_seconds, 2) if total_seconds > 0 else None,
+        "results": results,
+    }
+    logger.info(
+        f"Bulk ingest processed {summary['records']} records ({summary['stored']} stored, "
+        f"{summary['unchanged']} unchanged, {summary['errors']} errors) in {summary['total_seconds']}s "
+        f"({summary['chunks_per_second']} chunks/s)"
+    )
+    return summary
+
+# Ingest job status endpoint
+@router.get("/{job_id}")
+async def get_ingest_status(job_id: str):
+    """Get the status of a queued ingest job, including its result once processed."""
+    loop = asyncio.get_event_loop()
+    job = await loop.run_in_executor(None, job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    return job
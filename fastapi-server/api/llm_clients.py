@@ -0,0 +1,82 @@
+"""
+Long-lived async LLM clients for SecondBrain.
+Keeps one pooled keep-alive HTTP client per provider and base URL so queries
+reuse connections and never block the event loop.
+"""
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Tuple
+
+import httpx
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONNECTIONS = int(os.environ.get("SECONDBRAIN_LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("SECONDBRAIN_LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("SECONDBRAIN_LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("SECONDBRAIN_LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+LLM_READ_TIMEOUT_SECONDS = float(os.environ.get("SECONDBRAIN_LLM_READ_TIMEOUT_SECONDS", "120"))
+# Groq keys come from request bodies, so keep wrappers only for the most recently used keys
+LLM_MAX_CLIENTS = int(os.environ.get("SECONDBRAIN_LLM_MAX_CLIENTS", "64"))
+
+class LLMClientRegistry:
+    """
+    Registry of AsyncOpenAI clients.
+
+    Clients for the same provider and base URL share one httpx.AsyncClient
+    connection pool; a separate lightweight AsyncOpenAI wrapper is kept per
+    API key so different Groq keys never mix credentials. Wrappers are kept
+    in an LRU of max_clients entries; evicting one leaves the shared pool open.
+    """
+
+    def __init__(self, max_clients: int = LLM_MAX_CLIENTS):
+        self.max_clients = max(1, max_clients)
+        self._http_clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+        self._clients: "OrderedDict[Tuple[str, str, str], Tuple[AsyncOpenAI, httpx.AsyncClient]]" = OrderedDict()
+
+    def _get_http_client(self, provider: str, base_url: str) -> httpx.AsyncClient:
+        key = (provider, base_url)
+        http_client = self._http_clients.get(key)
+        if http_client is None or http_client.is_closed:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=httpx.Timeout(LLM_READ_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+            )
+            self._http_clients[key] = http_client
+            logger.info(f"Created HTTP connection pool for {provider} at {base_url}")
+        return http_client
+
+    def get(self, provider: str, base_url: str, api_key: str) -> "AsyncOpenAI":
+        """Get the shared client for a provider, base URL and API key."""
+        http_client = self._get_http_client(provider, base_url)
+        key = (provider, base_url, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+        client, pool = self._clients.get(key, (None, None))
+        # Rebuild the wrapper if its connection pool was replaced
+        if client is None or pool is not http_client:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+            self._clients[key] = (client, http_client)
+        self._clients.move_to_end(key)
+        while len(self._clients) > self.max_clients:
+            # Not closed: closing the wrapper would close the pool it shares
+            self._clients.popitem(last=False)
+        return client
+
+    async def aclose(self):
+        """Close every connection pool. Call on application shutdown."""
+        for http_client in self._http_clients.values():
+            await http_client.aclose()
+        self._http_clients.clear()
+        self._clients.clear()
+
+llm_clients = LLMClientRegistry()
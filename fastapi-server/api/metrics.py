@@ -0,0 +1,18 @@
+"""
+Metrics API endpoint for SecondBrain.
+Exposes pipeline metrics in Prometheus text format.
+"""
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/")
+async def get_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,19 +1,29 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+import json
 import logging
-import math
+import re
+import time
 import asyncio
 import os
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
 
 # Import vector database and embedding model
 from models.embedding_model import create_embeddings
+from models.query_cache import query_embedding_cache
+from models.reranker import RERANK_CANDIDATES, RERANK_ENABLED, RERANK_TOP_K, reranker
+from api.answer_cache import answer_cache
+from api.context_packer import estimate_tokens, pack_context
 
-# Import instructor for structured output
-import instructor
-from openai import OpenAI
 import httpx
 
+from api.llm_clients import llm_clients
+from monitoring.metrics import LLM_LATENCY, STAGE_LATENCY
+
 logger = logging.getLogger(__name__)
 
 # LM Studio API Configuration
@@ -46,17 +56,55 @@ GROQ_MODELS = {
 }
 DEFAULT_GROQ_MODEL = "llama3-8b-8192"
 
+# Retrieval settings
+RETRIEVAL_LIMIT = 3
+# Minimum cosine similarity. 0.55 is the cut-off the earlier 0.1 applied on L2 collections,
+# whose distances used to be read as if they were cosine
+RETRIEVAL_THRESHOLD = float(os.environ.get("SECONDBRAIN_RETRIEVAL_THRESHOLD", "0.55"))
+
+# Maximal Marginal Relevance: over-fetch candidates and keep a diverse subset
+MMR_ENABLED = os.environ.get("SECONDBRAIN_MMR", "1") == "1"
+MMR_CANDIDATES = int(os.environ.get("SECONDBRAIN_MMR_CANDIDATES", "12"))
+MMR_LAMBDA = float(os.environ.get("SECONDBRAIN_MMR_LAMBDA", "0.5"))
+
+# Prompt sizing: the local model's context window, and tokens held back for chat
+# formatting and the structured-output schema that are not part of the prompt text
+LOCAL_CONTEXT_TOKENS = int(os.environ.get("SECONDBRAIN_LOCAL_CONTEXT_TOKENS", "4096"))
+PROMPT_MARGIN_TOKENS = int(os.environ.get("SECONDBRAIN_PROMPT_MARGIN_TOKENS", "256"))
+# Share of the prompt budget left unused, since the prompt is sized by a token estimate
+# rather than the model's tokenizer and unusual text can tokenize denser than estimated
+PROMPT_ESTIMATE_SLACK = float(os.environ.get("SECONDBRAIN_PROMPT_ESTIMATE_SLACK", "0.1"))
+
+PROMPT_TEMPLATE = """Answer the question based only on the following context. If the context doesn't contain the answer, say "I don't have information about that in my knowledge base."
+
+Context:
+{context}
+
+Question: {question}
+
+Think step-by-step before providing your final answer.
+"""
+
 router = APIRouter(
     prefix="/query",
     tags=["query"],
     responses={404: {"description": "Not found"}},
 )
 
+class QueryFilters(BaseModel):
+    """Restrict retrieval to part of the knowledge base; every given filter must match."""
+    domain: Optional[str] = Field(default=None, description="Source host name, e.g. docs.python.org")
+    url_prefix: Optional[str] = Field(default=None, description="Source URL must start with this")
+    since: Optional[datetime] = Field(default=None, description="Captured at or after this time")
+    until: Optional[datetime] = Field(default=None, description="Captured at or before this time")
+    document_id: Optional[str] = None
+
 class QueryRequest(BaseModel):
     question: str
     llm_choice: str = "local"  # Default to local LLM
     model: Optional[str] = None  # Optional model selection for Groq
     api_key: Optional[str] = None  # Optional API key for remote LLMs
+    filters: Optional[QueryFilters] = None  # Optional metadata filters for retrieval
 
 class QueryResponse(BaseModel):
     answer: str
@@ -69,23 +117,75 @@ class LLMStructuredResponse(BaseModel):
     reasoning: str = Field(description="Step-by-step reasoning based on the provided context")
     answer: str = Field(description="Concise final answer to the user's question")
 
-def cosine_similarity(a: list, b: list) -> float:
-    # Simple cosine similarity: dot(a,b)/(||a||*||b||)
-    dot_product = sum(x*y for x,y in zip(a, b))
-    norm_a = math.sqrt(sum(x*x for x in a))
-    norm_b = math.sqrt(sum(x*x for x in b))
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-    return dot_product / (norm_a * norm_b)
+def cosine_similarity(a, b) -> np.ndarray:
+    """Cosine similarity between every row of a and every row of b, as one matrix product."""
+    a = np.atleast_2d(np.asarray(a, dtype=np.float32))
+    b = np.atleast_2d(np.asarray(b, dtype=np.float32))
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return a @ b.T
+
+def mmr_select(query_embedding, candidate_embeddings, k: int, lambda_mult: float = MMR_LAMBDA,
+               relevance=None) -> List[int]:
+    """
+    Pick k candidates by Maximal Marginal Relevance.
+    
+    Each step takes the candidate with the best
+    lambda * relevance - (1 - lambda) * (max similarity to those already picked),
+    so near-duplicates of a selected chunk lose out to chunks with new information.
+    
+    Args:
+        query_embedding: Embedding of the question
+        candidate_embeddings: One embedding per candidate
+        k: Number of candidates to pick
+        lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity
+        relevance: Optional relevance score per candidate (defaults to cosine similarity to the query)
+        
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    candidates = np.atleast_2d(np.asarray(candidate_embeddings, dtype=np.float32))
+    count = len(candidate_embeddings)
+    if count == 0 or k <= 0:
+        return []
+    
+    if relevance is None:
+        relevance = cosine_similarity(query_embedding, candidates)[0]
+    relevance = np.asarray(relevance, dtype=np.float32)
+    # All pairwise similarities up front; selection is then just row lookups
+    pairwise = cosine_similarity(candidates, candidates)
+    
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+    while len(selected) < min(k, count):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+    return selected
+
+def diversify_chunks(question_embedding, sorted_chunks: list, k: int) -> list:
+    """Reduce ranked (chunk, similarity) candidates to k diverse ones with MMR."""
+    embeddings = [chunk["embedding"] for chunk, _ in sorted_chunks]
+    relevance = None
+    if all("rerank_score" in chunk for chunk, _ in sorted_chunks):
+        # Scale cross-encoder scores to [0, 1] so they weigh against cosine similarity
+        scores = np.array([chunk["rerank_score"] for chunk, _ in sorted_chunks], dtype=np.float32)
+        spread = scores.max() - scores.min()
+        relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+    
+    selected = mmr_select(question_embedding, embeddings, k, relevance=relevance)
+    return [sorted_chunks[i] for i in selected]
 
 def get_openai_client(llm_choice: str, api_key: Optional[str] = None):
-    """Get appropriate OpenAI client based on LLM choice."""
+    """Get the shared async OpenAI client for the LLM choice."""
     if llm_choice == "local":
-        return OpenAI(base_url=LM_STUDIO_URL, api_key=LM_STUDIO_API_KEY)
+        return llm_clients.get("local", LM_STUDIO_URL, LM_STUDIO_API_KEY)
     elif llm_choice == "groq":
         if not api_key:
             raise ValueError("A valid Groq API key is required to use Groq models")
-        return OpenAI(base_url=GROQ_API_URL, api_key=api_key)
+        return llm_clients.get("groq", GROQ_API_URL, api_key)
     else:
         raise ValueError(f"Unsupported LLM choice: {llm_choice}")
 
@@ -104,91 +204,215 @@ def get_model_for_provider(llm_choice: str, model_id: Optional[str] = None):
     # Fallback
     return "deepseek-r1-distill-qwen-7b"
 
-async def query_llm(question: str, llm_choice: str = "local", model: Optional[str] = None, api_key: Optional[str] = None) -> QueryResponse:
-    logger.info(f"Processing query using {llm_choice} LLM with model {model or 'default'}: {question}")
+async def get_query_embedding(question: str):
+    """Get the embedding for a question, reusing a cached one for repeated questions."""
+    question_embedding = query_embedding_cache.get(question)
+    if question_embedding is None:
+        question_embedding = await create_embeddings(question, {})
+        query_embedding_cache.put(question, question_embedding)
+    return question_embedding
+
+async def retrieve_context(question: str, filters: Optional[QueryFilters] = None):
+    """
+    Embed the question and retrieve the most relevant chunks.
+    
+    Filters are pushed down to the vector store, so a scoped question only
+    searches the matching part of the collection.
     
+    Returns:
+        Tuple of (question embedding, list of (chunk, similarity) in rank order)
+    """
     # Generate embedding for the query
-    question_embedding = await create_embeddings(question, {})
+    with STAGE_LATENCY.labels("query_embedding").time():
+        question_embedding = await get_query_embedding(question)
     
     # Use ChromaDB to find the most relevant documents
-    from db.vector_db import query_vector_db
+    from db.vector_db import HYBRID_SEARCH_ENABLED, hybrid_query_vector_db, query_vector_db
     
-    # Retrieve top 3 most relevant chunks
-    relevant_chunks, similarities = await query_vector_db(
-        query_embedding=question_embedding,
-        limit=3,  # Retrieve multiple chunks instead of just 1
-        threshold=0.1  # similarity threshold
-    )
-
-    # logger.debug(f"YYYYY Found {len(relevant_chunks)} relevant chunks with similarities: {similarities}")
+    # Retrieve top 3 most relevant chunks, or over-fetch candidates for the reranker and MMR
+    final_k = RERANK_TOP_K if RERANK_ENABLED else RETRIEVAL_LIMIT
+    limit = final_k
+    if RERANK_ENABLED:
+        limit = max(limit, RERANK_CANDIDATES)
+    if MMR_ENABLED:
+        limit = max(limit, MMR_CANDIDATES)
+    filter_values = filters.dict(exclude_none=True) if filters else None
+    with STAGE_LATENCY.labels("query_vector_db").time():
+        if HYBRID_SEARCH_ENABLED:
+            relevant_chunks, similarities = await hybrid_query_vector_db(
+                query_text=question,
+                query_embedding=question_embedding,
+                limit=limit,
+                threshold=RETRIEVAL_THRESHOLD,
+                include_embeddings=MMR_ENABLED,
+                filters=filter_values
+            )
+        else:
+            relevant_chunks, similarities = await query_vector_db(
+                query_embedding=question_embedding,
+                limit=limit,  # Retrieve multiple chunks instead of just 1
+                threshold=RETRIEVAL_THRESHOLD,  # similarity threshold
+                include_embeddings=MMR_ENABLED,
+                filters=filter_values
+            )
     
-    # If no document found or similarity is too low
     if not relevant_chunks:
-        logger.info("No sufficient context found in vector db.")
-        model_info = f"{GROQ_MODELS.get(model, {}).get('name', model)}" if llm_choice == "groq" and model else "Local LLM"
-        return QueryResponse(
-            answer="I don't have enough information to answer that question.",
-            reasoning="No reasoning available due to lack of context.",
-            source_urls=[],
-            model_used=model_info
-        )
+        return question_embedding, []
+    
+    if HYBRID_SEARCH_ENABLED:
+        # Keep the fused rank order
+        sorted_chunks = list(zip(relevant_chunks, similarities))
+    else:
+        # Sort chunks by similarity (descending)
+        sorted_chunks = sorted(zip(relevant_chunks, similarities), key=lambda x: x[1], reverse=True)
     
-    # Sort chunks by similarity (descending)
-    sorted_chunks = sorted(zip(relevant_chunks, similarities), key=lambda x: x[1], reverse=True)
+    if RERANK_ENABLED:
+        # With MMR on, keep every candidate so MMR can trade rerank relevance against redundancy
+        sorted_chunks = await reranker.rerank(question, sorted_chunks,
+                                              top_k=len(sorted_chunks) if MMR_ENABLED else RERANK_TOP_K)
+    
+    if MMR_ENABLED:
+        with STAGE_LATENCY.labels("mmr").time():
+            sorted_chunks = diversify_chunks(question_embedding, sorted_chunks, final_k)
+        # Embeddings were only needed for MMR; keep them out of prompts and responses
+        sorted_chunks = [({k: v for k, v in chunk.items() if k != "embedding"}, sim) for chunk, sim in sorted_chunks]
 
     for idx, (_, sim) in enumerate(sorted_chunks, start=1):
         logger.info(f"Chunk {idx} similarity score: {sim}")
-
     
-    # Extract unique source URLs from all chunks
+    return question_embedding, sorted_chunks
+
+def get_source_urls(sorted_chunks: list) -> list:
+    """Extract unique source URLs from retrieved chunks, in rank order."""
     source_urls = []
     for chunk, _ in sorted_chunks:
         source_url = chunk["metadata"].get("source_url", "")
         if source_url and source_url not in source_urls:
             source_urls.append(source_url)
+    return source_urls
+
+def get_prompt_budget(llm_choice: str, model_id: str) -> int:
+    """Get the token budget for the prompt: the context window less the completion and a safety margin."""
+    if llm_choice == "groq" and model_id in GROQ_MODELS:
+        context_window = GROQ_MODELS[model_id]["max_tokens"]
+    else:
+        context_window = LOCAL_CONTEXT_TOKENS
+    available = context_window - get_max_tokens(llm_choice, model_id)
+    return int(available * (1 - PROMPT_ESTIMATE_SLACK)) - PROMPT_MARGIN_TOKENS
+
+def build_prompt(question: str, sorted_chunks: list, budget_tokens: int):
+    """
+    Build the LLM prompt from the question and the retrieved chunks.
+
+    Adjacent chunks are merged without their repeated overlap and packed in
+    rank order until the prompt's estimated size would exceed budget_tokens.
+
+    Returns:
+        Tuple of (prompt, (chunk, similarity) pairs that made it into the prompt)
+    """
+    overhead = estimate_tokens(PROMPT_TEMPLATE.format(context="", question=question))
+    combined_context, used_ids = pack_context(sorted_chunks, budget_tokens - overhead)
+    used_ids = set(used_ids)
+    used_chunks = [(chunk, similarity) for chunk, similarity in sorted_chunks if chunk["id"] in used_ids]
+    return PROMPT_TEMPLATE.format(context=combined_context, question=question), used_chunks
+
+def get_max_tokens(llm_choice: str, model_id: str) -> int:
+    """Get the completion token limit for a model."""
+    if llm_choice == "groq" and model_id in GROQ_MODELS:
+        return min(1500, GROQ_MODELS[model_id]["max_tokens"] // 4)  # Use 1/4 of available context
+    return 800  # Default for local models
+
+def get_model_display_name(llm_choice: str, model_id: str) -> str:
+    """Get a readable model name for the response."""
+    if llm_choice == "groq" and model_id in GROQ_MODELS:
+        return GROQ_MODELS[model_id]["name"]
+    return "Local LLM (LM-Studio)"
+
+def no_context_response(llm_choice: str, model: Optional[str]) -> QueryResponse:
+    """Response returned when retrieval finds nothing relevant."""
+    model_info = f"{GROQ_MODELS.get(model, {}).get('name', model)}" if llm_choice == "groq" and model else "Local LLM"
+    return QueryResponse(
+        answer="I don't have enough information to answer that question.",
+        reasoning="No reasoning available due to lack of context.",
+        source_urls=[],
+        model_used=model_info
+    )
+
+def get_llm_error_message(llm_choice: str, model: Optional[str], error: Exception) -> str:
+    """Provide different error messages based on the LLM provider."""
+    if llm_choice == "local":
+        return f"Local LLM query failed. Is LM-Studio running at {LM_STUDIO_URL}? Error: {str(error)}"
+    model_name = GROQ_MODELS.get(model, {}).get("name", model) if model else "default"
+    return f"Groq API query with model {model_name} failed. Please check your API key and try again. Error: {str(error)}"
+
+def cache_answer(cache_key: str, question_embedding, sorted_chunks: list, response: QueryResponse):
+    """Store a generated answer in the semantic answer cache."""
+    chunk_ids = [chunk["id"] for chunk, _ in sorted_chunks]
+    # A new chunk must beat the weakest retrieved chunk to change the results,
+    # or just clear the threshold if fewer than RETRIEVAL_LIMIT chunks were found.
+    # With reranking or MMR any candidate can reach the top, so any chunk above the threshold counts
+    if RERANK_ENABLED or MMR_ENABLED or len(sorted_chunks) < RETRIEVAL_LIMIT:
+        rank_floor = RETRIEVAL_THRESHOLD
+    else:
+        rank_floor = min(sim for _, sim in sorted_chunks)
+    answer_cache.put(cache_key, question_embedding, chunk_ids, rank_floor, response)
+
+def split_reasoning(text: str):
+    """
+    Split a streamed completion into (reasoning, answer).
     
-    # Combine chunks into a single context string, including information about their source
-    context_parts = []
-    for i, (chunk, similarity) in enumerate(sorted_chunks):
-        title = chunk["metadata"].get("title", "Untitled")
-        source_url = chunk["metadata"].get("source_url", "Unknown source")
-        context_parts.append(f"Source {i+1} - {title} ({source_url}):\n{chunk['text']}")
+    Reasoning models such as DeepSeek-R1 wrap their reasoning in <think> tags;
+    anything else is treated as the answer.
+    """
+    match = re.search(r"<think>(.*?)(?:</think>|$)(.*)", text, re.DOTALL)
+    if not match:
+        return "", text.strip()
+    return match.group(1).strip(), match.group(2).strip()
+
+async def query_llm(question: str, llm_choice: str = "local", model: Optional[str] = None, api_key: Optional[str] = None,
+                    filters: Optional[QueryFilters] = None) -> QueryResponse:
+    logger.info(f"Processing query using {llm_choice} LLM with model {model or 'default'}: {question}")
     
-    combined_context = "\n\n---\n\n".join(context_parts)
+    question_embedding, sorted_chunks = await retrieve_context(question, filters)
     
-    # Update prompt to ask for structured information without specifying format
-    prompt = f"""Answer the question based only on the following context. If the context doesn't contain the answer, say "I don't have information about that in my knowledge base."
-
-Context:
-{combined_context}
-
-Question: {question}
+    # If no document found or similarity is too low
+    if not sorted_chunks:
+        logger.info("No sufficient context found in vector db.")
+        return no_context_response(llm_choice, model)
 
-Think step-by-step before providing your final answer.
-"""
+    # Reuse a cached answer for a near-identical question over the same chunks
+    cache_key = f"{llm_choice}:{get_model_for_provider(llm_choice, model)}"
+    chunk_ids = [chunk["id"] for chunk, _ in sorted_chunks]
+    cached_response = answer_cache.get(cache_key, question_embedding, chunk_ids)
+    if cached_response is not None:
+        return cached_response
+    
+    # Get appropriate model based on provider and user selection
+    model_id = get_model_for_provider(llm_choice, model)
+    
+    with STAGE_LATENCY.labels("prompt_build").time():
+        prompt, used_chunks = build_prompt(question, sorted_chunks, get_prompt_budget(llm_choice, model_id))
+    # Cite only the sources the LLM was actually shown
+    source_urls = get_source_urls(used_chunks)
 
     try:
         # Get appropriate client based on LLM choice
         base_client = get_openai_client(llm_choice, api_key)
         
-        # Wrap with instructor for structured output
+        # Wrap with instructor for structured output (imported here, it is slow to import)
+        import instructor
         client = instructor.from_openai(base_client)
         
-        # Get appropriate model based on provider and user selection
-        model_id = get_model_for_provider(llm_choice, model)
-        
         # Set max tokens based on model
-        if llm_choice == "groq" and model_id in GROQ_MODELS:
-            max_tokens = min(1500, GROQ_MODELS[model_id]["max_tokens"] // 4)  # Use 1/4 of available context
-        else:
-            max_tokens = 800  # Default for local models
+        max_tokens = get_max_tokens(llm_choice, model_id)
         
         # Log model selection
         logger.info(f"Using model: {model_id} with max_tokens: {max_tokens}")
+        llm_start = time.perf_counter()
         
         try:
             # Use instructor to get structured output directly
-            structured_response = client.chat.completions.create(
+            structured_response = await client.chat.completions.create(
                 model=model_id,
                 response_model=LLMStructuredResponse,
                 messages=[{"role": "user", "content": prompt}],
@@ -204,7 +428,7 @@ Think step-by-step before providing your final answer.
             logger.error(f"Error using structured output: {structured_error}. Falling back to standard completion.")
             
             # Fallback to standard completion if structured output fails
-            response = base_client.chat.completions.create(
+            response = await base_client.chat.completions.create(
                 model=model_id,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
@@ -216,18 +440,17 @@ Think step-by-step before providing your final answer.
             answer = full_response
             reasoning = "No structured reasoning available. Please check the answer for details."
         
-        # Get readable model name for the response
-        if llm_choice == "groq" and model_id in GROQ_MODELS:
-            model_used = GROQ_MODELS[model_id]["name"]
-        else:
-            model_used = "Local LLM (LM-Studio)"
-            
-        return QueryResponse(
+        LLM_LATENCY.labels(llm_choice, model_id).observe(time.perf_counter() - llm_start)
+        
+        response = QueryResponse(
             answer=answer, 
             reasoning=reasoning,
             source_urls=source_urls,
-            model_used=model_used
+            model_used=get_model_display_name(llm_choice, model_id)
         )
+        cache_answer(cache_key, question_embedding, sorted_chunks, response)
+        
+        return response
     
     except ValueError as ve:
         # Handle missing API keys or other validation errors
@@ -237,15 +460,95 @@ Think step-by-step before providing your final answer.
     except Exception as e:
         # Handle all other errors from LLM calls
         logger.error(f"Error querying LLM: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=get_llm_error_message(llm_choice, model, e))
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_query_llm(question: str, llm_choice: str = "local", model: Optional[str] = None, api_key: Optional[str] = None,
+                           filters: Optional[QueryFilters] = None):
+    """
+    Answer a question as a stream of Server-Sent Events.
+    
+    Events, in order:
+        sources - source URLs and summaries of the chunks packed into the prompt, sent right after retrieval
+        token   - answer text as the LLM produces it (repeated)
+        final   - the complete QueryResponse with reasoning and answer split out
+        error   - sent instead of the remaining events if anything fails
+    """
+    logger.info(f"Streaming query using {llm_choice} LLM with model {model or 'default'}: {question}")
+    
+    try:
+        question_embedding, sorted_chunks = await retrieve_context(question, filters)
+        model_id = get_model_for_provider(llm_choice, model)
         
-        # Provide different error messages based on the LLM provider
-        if llm_choice == "local":
-            error_msg = f"Local LLM query failed. Is LM-Studio running at {LM_STUDIO_URL}? Error: {str(e)}"
-        else:
-            model_name = GROQ_MODELS.get(model, {}).get("name", model) if model else "default"
-            error_msg = f"Groq API query with model {model_name} failed. Please check your API key and try again. Error: {str(e)}"
-            
-        raise HTTPException(status_code=500, detail=error_msg)
+        # Pack the prompt first so the sources sent are the ones the LLM will be shown
+        with STAGE_LATENCY.labels("prompt_build").time():
+            prompt, used_chunks = build_prompt(question, sorted_chunks, get_prompt_budget(llm_choice, model_id))
+        source_urls = get_source_urls(used_chunks)
+        yield sse_event("sources", {
+            "source_urls": source_urls,
+            "chunks": [
+                {
+                    "title": chunk["metadata"].get("title", "Untitled"),
+                    "source_url": chunk["metadata"].get("source_url", ""),
+                    "similarity": similarity,
+                }
+                for chunk, similarity in used_chunks
+            ],
+        })
+        
+        if not sorted_chunks:
+            logger.info("No sufficient context found in vector db.")
+            response = no_context_response(llm_choice, model)
+            yield sse_event("token", {"text": response.answer})
+            yield sse_event("final", response.dict())
+            return
+        
+        cache_key = f"{llm_choice}:{model_id}"
+        chunk_ids = [chunk["id"] for chunk, _ in sorted_chunks]
+        cached_response = answer_cache.get(cache_key, question_embedding, chunk_ids)
+        if cached_response is not None:
+            yield sse_event("token", {"text": cached_response.answer})
+            yield sse_event("final", cached_response.dict())
+            return
+        
+        base_client = get_openai_client(llm_choice, api_key)
+        max_tokens = get_max_tokens(llm_choice, model_id)
+        logger.info(f"Streaming from model: {model_id} with max_tokens: {max_tokens}")
+        
+        llm_start = time.perf_counter()
+        stream = await base_client.chat.completions.create(
+            model=model_id,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        
+        parts = []
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield sse_event("token", {"text": delta})
+        
+        LLM_LATENCY.labels(llm_choice, model_id).observe(time.perf_counter() - llm_start)
+        
+        reasoning, answer = split_reasoning("".join(parts))
+        response = QueryResponse(
+            answer=answer,
+            reasoning=reasoning,
+            source_urls=source_urls,
+            model_used=get_model_display_name(llm_choice, model_id)
+        )
+        cache_answer(cache_key, question_embedding, sorted_chunks, response)
+        yield sse_event("final", response.dict())
+        
+    except Exception as e:
+        logger.error(f"Error streaming LLM response: {e}", exc_info=True)
+        yield sse_event("error", {"detail": get_llm_error_message(llm_choice, model, e)})
 
 @router.post("/")
 async def query_knowledge(query: QueryRequest):
@@ -259,7 +562,7 @@ async def query_knowledge(query: QueryRequest):
             )
             
         logger.info(f"Received query using {query.llm_choice} LLM with model {query.model or 'default'}: {query.question}")
-        response = await query_llm(query.question, query.llm_choice, query.model, query.api_key)
+        response = await query_llm(query.question, query.llm_choice, query.model, query.api_key, query.filters)
         return response
     except ValueError as ve:
         # Convert ValueError to HTTPException with appropriate status code
@@ -271,3 +574,28 @@ async def query_knowledge(query: QueryRequest):
     except Exception as e:
         logger.error(f"Error processing query: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.post("/stream")
+async def stream_query_knowledge(query: QueryRequest):
+    """
+    Query the knowledge base and stream the answer over Server-Sent Events.
+    
+    Sources are sent as soon as retrieval finishes, followed by answer tokens
+    as the LLM generates them and a final event with the structured response.
+    """
+    # Validate Groq API key requirement before opening the stream
+    if query.llm_choice == "groq" and not query.api_key:
+        logger.error("Groq API key missing")
+        raise HTTPException(
+            status_code=400, 
+            detail="Groq API key is required when using Groq models"
+        )
+    if query.llm_choice not in ("local", "groq"):
+        raise HTTPException(status_code=400, detail=f"Unsupported LLM choice: {query.llm_choice}")
+    
+    logger.info(f"Received streaming query using {query.llm_choice} LLM with model {query.model or 'default'}: {query.question}")
+    return StreamingResponse(
+        stream_query_llm(query.question, query.llm_choice, query.model, query.api_key, query.filters),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
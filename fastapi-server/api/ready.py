@@ -0,0 +1,81 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+import asyncio
+import logging
+import time
+from typing import Callable, Dict
+
+from db.vector_db import get_vector_store, is_vector_store_loaded
+from models.embedding_model import is_model_loaded, warmup_model
+from models.reranker import RERANK_ENABLED, reranker
+
+logger = logging.getLogger(__name__)
+
+# Set up router
+router = APIRouter(
+    prefix="/ready",
+    tags=["ready"],
+    responses={404: {"description": "Not found"}},
+)
+
+# Warmup progress per component: pending, warming, ready or failed
+_components: Dict[str, Dict] = {
+    "embedding_model": {"status": "pending"},
+    "vector_store": {"status": "pending"},
+    "job_workers": {"status": "pending"},
+}
+if RERANK_ENABLED:
+    _components["reranker"] = {"status": "pending"}
+
+# Components that also count as ready once loaded lazily by a request
+_loaded_checks: Dict[str, Callable[[], bool]] = {
+    "embedding_model": is_model_loaded,
+    "vector_store": is_vector_store_loaded,
+    "reranker": reranker.is_loaded,
+}
+
+def mark_ready(component: str, seconds: float = None):
+    _components[component] = {"status": "ready", "seconds": seconds}
+
+def _warm(component: str, fn: Callable[[], object]):
+    _components[component] = {"status": "warming"}
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        logger.error(f"Error warming up {component}: {e}")
+        _components[component] = {"status": "failed", "error": str(e)}
+        return
+    elapsed = time.perf_counter() - start
+    mark_ready(component, round(elapsed, 3))
+    logger.info(f"Warmed up {component} in {elapsed:.2f}s")
+
+async def warm_up():
+    """Load the embedding model and reranker and open the vector store in parallel, off the event loop."""
+    loop = asyncio.get_event_loop()
+    tasks = [
+        loop.run_in_executor(None, _warm, "embedding_model", warmup_model),
+        loop.run_in_executor(None, _warm, "vector_store", get_vector_store),
+    ]
+    if RERANK_ENABLED:
+        tasks.append(loop.run_in_executor(None, _warm, "reranker", reranker.warmup))
+    await asyncio.gather(*tasks)
+
+def readiness() -> Dict:
+    components = {}
+    for name, state in _components.items():
+        state = dict(state)
+        check = _loaded_checks.get(name)
+        if state["status"] != "ready" and check is not None and check():
+            state["status"] = "ready"
+        components[name] = state
+    return {
+        "ready": all(state["status"] == "ready" for state in components.values()),
+        "components": components,
+    }
+
+@router.get("/")
+async def get_ready():
+    """Report whether every component is warm; 503 until they are."""
+    report = readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
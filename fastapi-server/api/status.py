@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
 import logging
 
+from monitoring.metrics import status_snapshot
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
@@ -9,16 +12,13 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Dummy async function simulating database document count retrieval
-async def get_document_count() -> int:
-    # ...existing code or actual logic...
-    return 0  # For the MVP, return 0 as the default count
-
 @router.get("/")
 async def get_status():
     try:
-        total_docs = await get_document_count()
-        return {"total_documents": total_docs, "status": "running"}
+        # Gauge callbacks hit the vector store and job queue, so read them off the event loop
+        loop = asyncio.get_event_loop()
+        snapshot = await loop.run_in_executor(None, status_snapshot)
+        return {**snapshot, "status": "running"}
     except Exception as e:
         logger.error(f"Error fetching status: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,253 @@
+"""
+Durable job queue for SecondBrain.
+Jobs are persisted in SQLite so queued work survives restarts, and a pool
+of async workers processes them with retry and exponential backoff.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from monitoring.metrics import QUEUE_DEPTH, safe_gauge_function
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_PATH = os.environ.get("SECONDBRAIN_JOB_QUEUE_PATH", "./job_queue.sqlite3")
+JOB_QUEUE_MAX_DEPTH = int(os.environ.get("SECONDBRAIN_JOB_QUEUE_MAX_DEPTH", "1000"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("SECONDBRAIN_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("SECONDBRAIN_JOB_RETRY_BASE_SECONDS", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.environ.get("SECONDBRAIN_JOB_POLL_INTERVAL_SECONDS", "1"))
+JOB_RETENTION_DAYS = float(os.environ.get("SECONDBRAIN_JOB_RETENTION_DAYS", "7"))
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds the maximum number of pending jobs."""
+
+class JobQueue:
+    """
+    SQLite-backed job queue.
+
+    Job status moves from queued -> running -> succeeded, or back to queued
+    with a delayed run_after on a retryable failure, or to failed once
+    max_attempts is exhausted.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, max_depth: int = JOB_QUEUE_MAX_DEPTH):
+        self.path = path
+        self.max_depth = max_depth
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    run_after REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    error TEXT,
+                    result TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs (status, run_after)")
+        return self._conn
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], max_attempts: int = JOB_MAX_ATTEMPTS) -> str:
+        """Persist a new job and return its ID. Raises QueueFullError when the queue is full."""
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+            if depth >= self.max_depth:
+                raise QueueFullError(f"Job queue is full ({depth} pending jobs)")
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, max_attempts, run_after, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), max_attempts, now, now, now)
+            )
+        return job_id
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job and mark it running."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (now, row["id"])
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        job = dict(row)
+        job["attempts"] += 1
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def complete(self, job_id: str, result: Any = None):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str, retry_delay: Optional[float] = None):
+        """Record a failure; requeue after retry_delay seconds, or mark failed when None."""
+        now = time.time()
+        with self._lock:
+            if retry_delay is None:
+                self._connection().execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                    (error, now, job_id)
+                )
+            else:
+                self._connection().execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, run_after = ?, updated_at = ? WHERE id = ?",
+                    (error, now + retry_delay, now, job_id)
+                )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's status without its payload."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id, kind, status, attempts, max_attempts, run_after, created_at, updated_at, error, result "
+                "FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def depth(self) -> int:
+        """Number of jobs waiting or in progress."""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+    def recover(self) -> int:
+        """Requeue jobs left running by a crash and prune old finished jobs."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            recovered = conn.execute(
+                "UPDATE jobs SET status = 'queued', run_after = ?, updated_at = ? WHERE status = 'running'",
+                (now, now)
+            ).rowcount
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+                (now - JOB_RETENTION_DAYS * 86400,)
+            )
+        return recovered
+
+class JobWorkerPool:
+    """
+    Pool of async workers that run jobs from a JobQueue.
+
+    Each job kind maps to an async handler taking the job payload; its return
+    value is stored as the job result. Failed jobs are retried with
+    exponential backoff until they run out of attempts.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]],
+                 workers: int, retry_base_seconds: float = JOB_RETRY_BASE_SECONDS,
+                 poll_interval: float = JOB_POLL_INTERVAL_SECONDS):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(1, workers)
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self._wakeup = None
+
+    async def start(self):
+        loop = asyncio.get_event_loop()
+        recovered = await loop.run_in_executor(None, self.queue.recover)
+        if recovered:
+            logger.info(f"Requeued {recovered} jobs interrupted by a previous shutdown")
+
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a job was enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, worker_id: int):
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                job = await loop.run_in_executor(None, self.queue.claim)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job, loop)
+
+    async def _run_job(self, job: Dict[str, Any], loop):
+        job_id = job["id"]
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind {job['kind']}")
+            result = await handler(job["payload"])
+            await loop.run_in_executor(None, self.queue.complete, job_id, result)
+            logger.info(f"Job {job_id} succeeded on attempt {job['attempts']}")
+        except asyncio.CancelledError:
+            # Leave the job running; it is requeued by recover() on next start
+            raise
+        except Exception as e:
+            if job["attempts"] < job["max_attempts"]:
+                delay = self.retry_base_seconds * (2 ** (job["attempts"] - 1))
+                logger.warning(f"Job {job_id} failed on attempt {job['attempts']}, retrying in {delay}s: {e}")
+            else:
+                delay = None
+                logger.error(f"Job {job_id} failed permanently after {job['attempts']} attempts: {e}")
+            await loop.run_in_executor(None, self.queue.fail, job_id, str(e), delay)
+
+job_queue = JobQueue()
+QUEUE_DEPTH.set_function(safe_gauge_function(job_queue.depth))
@@ -0,0 +1,166 @@
+"""
+BM25 keyword index for SecondBrain.
+Chunk texts are mirrored into a SQLite FTS5 table so exact terms (error codes,
+product names, URLs) can be found even when their embedding similarity is low.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_INDEX_PATH = os.environ.get("SECONDBRAIN_KEYWORD_INDEX_PATH", "./keyword_index.sqlite3")
+
+# Terms may keep inner punctuation so "E404", "v1.2.3" and "example.com/path" stay intact;
+# FTS5 turns a quoted term with punctuation into a phrase query over its parts
+_QUERY_TERM = re.compile(r"\w[\w.\-/:]*\w|\w")
+_MAX_QUERY_TERMS = 32
+
+# Question words that would otherwise match nearly every chunk
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where",
+    "which", "who", "why", "with", "you", "about", "tell", "did", "have", "has",
+}
+
+def build_match_query(text: str) -> str:
+    """Turn free text into an FTS5 MATCH expression that ORs its quoted terms."""
+    terms = []
+    for term in _QUERY_TERM.findall(text.lower()):
+        if term not in terms and term not in _STOPWORDS:
+            terms.append(term)
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms[:_MAX_QUERY_TERMS])
+
+class KeywordIndex:
+    """
+    Inverted index over chunk texts, ranked with SQLite's built-in BM25.
+
+    Chunk IDs map to FTS rowids through a side table so deletes by ID do not
+    scan the full-text table. If this SQLite build lacks FTS5 the index is
+    disabled and searches return nothing.
+    """
+
+    def __init__(self, path: str = KEYWORD_INDEX_PATH):
+        self.path = path
+        self.available = True
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS chunk_ids (rowid INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE NOT NULL)")
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS chunk_text USING fts5(text, tokenize='porter unicode61')")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite FTS5 is unavailable, keyword search disabled: {e}")
+                self.available = False
+            self._conn = conn
+        return self._conn
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index chunk texts, replacing any previous text for the same IDs."""
+        if not ids:
+            return
+        with self._lock:
+            conn = self._connection()
+            if not self.available:
+                return
+            conn.execute("BEGIN")
+            try:
+                self._delete(conn, ids)
+                for chunk_id, text in zip(ids, texts):
+                    rowid = conn.execute("INSERT INTO chunk_ids (chunk_id) VALUES (?)", (chunk_id,)).lastrowid
+                    conn.execute("INSERT INTO chunk_text (rowid, text) VALUES (?, ?)", (rowid, text))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove chunks from the index. Returns the number removed."""
+        if not ids:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            if not self.available:
+                return 0
+            conn.execute("BEGIN")
+            try:
+                removed = self._delete(conn, ids)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    def _delete(self, conn: sqlite3.Connection, ids: List[str]) -> int:
+        removed = 0
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rowids = [row[0] for row in conn.execute(
+                f"SELECT rowid FROM chunk_ids WHERE chunk_id IN ({placeholders})", batch
+            )]
+            if not rowids:
+                continue
+            rowid_placeholders = ",".join("?" * len(rowids))
+            conn.execute(f"DELETE FROM chunk_text WHERE rowid IN ({rowid_placeholders})", rowids)
+            conn.execute(f"DELETE FROM chunk_ids WHERE rowid IN ({rowid_placeholders})", rowids)
+            removed += len(rowids)
+        return removed
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Find the chunks that best match the query terms.
+
+        Returns:
+            List of (chunk ID, BM25 score) with the best match first
+        """
+        match = build_match_query(query)
+        if not match or limit <= 0:
+            return []
+        with self._lock:
+            conn = self._connection()
+            if not self.available:
+                return []
+            rows = conn.execute(
+                "SELECT chunk_ids.chunk_id, bm25(chunk_text) AS score FROM chunk_text "
+                "JOIN chunk_ids ON chunk_ids.rowid = chunk_text.rowid "
+                "WHERE chunk_text MATCH ? ORDER BY score LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        # SQLite's bm25() is lower-is-better; flip the sign so higher is better
+        return [(chunk_id, -score) for chunk_id, score in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            conn = self._connection()
+            if not self.available:
+                return 0
+            return conn.execute("SELECT COUNT(*) FROM chunk_ids").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            if not self.available:
+                return
+            conn.execute("DELETE FROM chunk_text")
+            conn.execute("DELETE FROM chunk_ids")
+
+    def optimize(self):
+        """Merge the full-text index segments and return the pages freed by deletes to the filesystem."""
+        with self._lock:
+            conn = self._connection()
+            if self.available:
+                conn.execute("INSERT INTO chunk_text (chunk_text) VALUES ('optimize')")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+keyword_index = KeywordIndex()
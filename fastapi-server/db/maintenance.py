@@ -0,0 +1,201 @@
+"""
+Maintenance for the SecondBrain vector store.
+Deletes only mark entries dead (in Chroma's HNSW index or the NumPy store's
+vector file) and leave free pages in SQLite, so the store keeps its size and
+search cost after heavy deletes. Compaction has the store rebuild itself
+from its live chunks and optimizes the keyword index, reporting the bytes and
+query latency it recovered. Per-source TTL expiry lives here as well, and
+the migration that rebuilds a Chroma collection after its distance space or
+HNSW parameters were reconfigured.
+
+All of them can be run from the command line while the server is stopped:
+
+    cd fastapi-server && python -m db.maintenance compact
+    cd fastapi-server && python -m db.maintenance expire
+    cd fastapi-server && SECONDBRAIN_HNSW_M=32 python -m db.maintenance migrate
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from db import vector_db
+from db.keyword_index import KEYWORD_INDEX_PATH, keyword_index
+from db.vector_stores import directory_bytes
+
+logger = logging.getLogger(__name__)
+
+# Per-source time to live, e.g. "news.ycombinator.com=7,*=365" (days since capture; "*" is every other source)
+SOURCE_TTL_DAYS = os.environ.get("SECONDBRAIN_SOURCE_TTL_DAYS", "")
+TTL_SWEEP_INTERVAL_SECONDS = float(os.environ.get("SECONDBRAIN_TTL_SWEEP_INTERVAL_SECONDS", "3600"))
+
+LATENCY_SAMPLE_QUERIES = 20
+
+def parse_source_ttls(spec: str) -> Dict[str, float]:
+    """
+    Parse per-source TTLs such as "news.ycombinator.com=7,*=365".
+
+    Returns:
+        Dict of domain ("*" for every other source) to TTL in days
+    """
+    ttls = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        domain, _, days = entry.partition("=")
+        domain = domain.strip()
+        try:
+            ttls[domain if domain == "*" else vector_db.normalize_domain(domain)] = float(days)
+        except ValueError:
+            logger.error(f"Ignoring invalid source TTL {entry!r}, expected domain=days")
+    return ttls
+
+async def expired_chunk_ids(ttls: Dict[str, float], now: Optional[float] = None) -> List[str]:
+    """IDs of chunks captured longer ago than their source's TTL."""
+    now = time.time() if now is None else now
+    explicit_domains = [domain for domain in ttls if domain != "*"]
+    ids = []
+    for domain, days in ttls.items():
+        expired = {"timestamp_epoch": {"$lt": now - days * 86400}}
+        if domain != "*":
+            where = {"$and": [expired, {"source_domain": domain}]}
+        elif explicit_domains:
+            where = {"$and": [expired, {"source_domain": {"$nin": explicit_domains}}]}
+        else:
+            where = expired
+        ids.extend(await vector_db.get_chunk_ids(where))
+    return ids
+
+async def delete_expired(ttls: Dict[str, float], now: Optional[float] = None) -> List[str]:
+    """
+    Delete every chunk past its source's TTL.
+
+    Returns:
+        The IDs of the deleted chunks
+    """
+    if not ttls:
+        return []
+    ids = await expired_chunk_ids(ttls, now)
+    await vector_db.delete_from_vector_db(ids)
+    if ids:
+        logger.info(f"Expired {len(ids)} chunks past their source TTL")
+    return ids
+
+def store_bytes() -> int:
+    """Bytes on disk used by the vector store and the keyword index."""
+    keyword_files = [KEYWORD_INDEX_PATH + suffix for suffix in ("", "-wal", "-shm")]
+    return directory_bytes(vector_db.VECTOR_STORE_PATH) + sum(
+        os.path.getsize(path) for path in keyword_files if os.path.exists(path)
+    )
+
+def measure_query_latency(vector_store, samples: int = LATENCY_SAMPLE_QUERIES) -> Optional[float]:
+    """Median milliseconds of a nearest-neighbour query, using stored embeddings spread over the store."""
+    total = vector_store.count()
+    if total == 0:
+        return None
+
+    step = max(1, total // samples)
+    timings = []
+    for offset in range(0, total, step)[:samples]:
+        embedding = vector_store.get(limit=1, offset=offset, include=["embeddings"])["embeddings"][0]
+        start = time.perf_counter()
+        vector_store.query(query_embeddings=[embedding], n_results=min(3, total), include=["distances"])
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def compact_vector_store() -> Dict[str, Any]:
+    """
+    Rebuild the vector store from its live chunks and reclaim the space deletes left behind.
+
+    Callers must keep writes out while this runs; compact() does that in the server.
+
+    Returns:
+        Report with chunk count, duration, bytes and median query latency before and after
+    """
+    vector_store = vector_db.get_vector_store()
+    bytes_before = store_bytes()
+    query_ms_before = measure_query_latency(vector_store)
+    start = time.perf_counter()
+
+    details = vector_store.compact()
+    keyword_index.optimize()
+
+    seconds = time.perf_counter() - start
+    bytes_after = store_bytes()
+    query_ms_after = measure_query_latency(vector_store)
+    report = {
+        "chunks": vector_store.count(),
+        "seconds": round(seconds, 3),
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_recovered": bytes_before - bytes_after,
+        "query_ms_before": query_ms_before,
+        "query_ms_after": query_ms_after,
+        "query_ms_recovered": (query_ms_before - query_ms_after
+                               if query_ms_before is not None and query_ms_after is not None else None),
+        **details,
+    }
+    logger.info(
+        f"Compacted {report['chunks']} chunks in {report['seconds']}s: {bytes_before} -> {bytes_after} bytes, "
+        f"median query {query_ms_before} -> {query_ms_after} ms"
+    )
+    return report
+
+async def compact() -> Dict[str, Any]:
+    """Compact the vector store while holding the write lock; queries keep being answered."""
+    async with vector_db.store_write_lock:
+        return await asyncio.get_event_loop().run_in_executor(None, compact_vector_store)
+
+def migrate_vector_store() -> Dict[str, Any]:
+    """
+    Rebuild the vector store under the configured distance space and HNSW parameters
+    (SECONDBRAIN_VECTOR_SPACE, SECONDBRAIN_HNSW_*), if they differ from the current ones.
+
+    Returns:
+        Report with the settings before and after, duration and median query latency before and after
+    """
+    vector_store = vector_db.get_vector_store()
+    query_ms_before = measure_query_latency(vector_store)
+    start = time.perf_counter()
+    details = vector_store.migrate()
+    report = {
+        "chunks": vector_store.count(),
+        "seconds": round(time.perf_counter() - start, 3),
+        "query_ms_before": query_ms_before,
+        "query_ms_after": measure_query_latency(vector_store) if details.get("migrated") else query_ms_before,
+        **details,
+    }
+    if details.get("migrated"):
+        logger.info(f"Migrated {report['chunks']} chunks to {details['hnsw']} in {report['seconds']}s")
+    else:
+        logger.info("Vector store already uses the configured index settings")
+    return report
+
+async def migrate() -> Dict[str, Any]:
+    """Migrate the vector store while holding the write lock; queries keep being answered."""
+    async with vector_db.store_write_lock:
+        return await asyncio.get_event_loop().run_in_executor(None, migrate_vector_store)
+
+def main():
+    parser = argparse.ArgumentParser(description="SecondBrain vector store maintenance (run with the server stopped)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("compact", help="Rebuild the vector store and reclaim space left by deletes")
+    commands.add_parser("expire", help="Delete chunks past their source TTL (SECONDBRAIN_SOURCE_TTL_DAYS)")
+    commands.add_parser("migrate", help="Rebuild the collection with the configured distance space and HNSW "
+                                        "parameters (SECONDBRAIN_VECTOR_SPACE, SECONDBRAIN_HNSW_*)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if args.command == "compact":
+        print(json.dumps(asyncio.run(compact()), indent=2))
+    elif args.command == "migrate":
+        print(json.dumps(asyncio.run(migrate()), indent=2))
+    else:
+        deleted = asyncio.run(delete_expired(parse_source_ttls(SOURCE_TTL_DAYS)))
+        print(json.dumps({"deleted_chunks": len(deleted)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+In-process NumPy vector store for SecondBrain.
+Embeddings are normalized and appended as float16 rows to a flat file that is
+memory-mapped for search; ids, texts and metadata live in a SQLite side table
+keyed by row number. Search is exact: a blocked matrix-vector product over
+the mapped rows with an argpartition top-k per block, so there is no index to
+build or tune and results match brute force by construction. A float32 copy
+of the rows (up to SECONDBRAIN_NUMPY_STORE_CACHE_MB) is kept for scoring.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from db.vector_stores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block: large enough for BLAS, small enough that the float32 copy stays in cache
+SEARCH_BLOCK_ROWS = int(os.environ.get("SECONDBRAIN_NUMPY_STORE_BLOCK_ROWS", "16384"))
+# Memory for float32 copies of the stored rows. Converting float16 costs ~10x the matrix product,
+# so rows within the budget are converted once; rows beyond it are converted block by block per search
+SEARCH_CACHE_MB = float(os.environ.get("SECONDBRAIN_NUMPY_STORE_CACHE_MB", "1024"))
+
+_METADATA_KEY = re.compile(r"^[A-Za-z0-9_]+$")
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+# Metadata fields filtered on by retrieval and document lifecycle, indexed in the side table
+INDEXED_FIELDS = ("source_url", "source_domain", "document_id", "timestamp_epoch")
+
+def _field(key: str) -> str:
+    if not _METADATA_KEY.match(key):
+        raise ValueError(f"Unsupported metadata key {key!r}")
+    return f"json_extract(metadata, '$.\"{key}\"')"
+
+def where_to_sql(where: Optional[dict]) -> Tuple[str, list]:
+    """
+    Translate a Chroma-style where clause into a SQL condition on the side table.
+
+    Supports $and, $or, $eq, $ne, $gt, $gte, $lt, $lte, $in and $nin. As in
+    Chroma, $ne and $nin also match chunks that lack the field.
+
+    Returns:
+        Tuple of (SQL condition, parameters)
+    """
+    if not where:
+        return "1", []
+
+    clauses, params = [], []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(clause) for clause in value]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(f"({sql})" for sql, _ in parts) + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+
+        expr = _field(key)
+        conditions = value if isinstance(value, dict) else {"$eq": value}
+        for op, operand in conditions.items():
+            if op in ("$in", "$nin"):
+                placeholders = ",".join("?" * len(operand)) or "NULL"
+                if op == "$in":
+                    clauses.append(f"{expr} IN ({placeholders})")
+                else:
+                    clauses.append(f"({expr} IS NULL OR {expr} NOT IN ({placeholders}))")
+                params.extend(operand)
+            elif op == "$ne":
+                clauses.append(f"({expr} IS NULL OR {expr} != ?)")
+                params.append(operand)
+            elif op in _COMPARISONS:
+                clauses.append(f"{expr} {_COMPARISONS[op]} ?")
+                params.append(operand)
+            else:
+                raise ValueError(f"Unsupported where operator {op!r}")
+    return " AND ".join(clauses), params
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine search over normalized float16 vectors in an append-only memory-mapped file.
+
+    Deletes only drop the side-table row and mark the vector dead; compact()
+    rewrites the file without dead rows. Distances are cosine distances.
+    """
+
+    space = "cosine"
+
+    def __init__(self, path: str, collection_name: str):
+        os.makedirs(path, exist_ok=True)
+        self.name = collection_name
+        self.vectors_path = os.path.join(path, f"{collection_name}.f16")
+        self.db_path = os.path.join(path, f"{collection_name}.sqlite3")
+        self._lock = threading.RLock()
+        # Bumped whenever row numbers change, so searches racing a compaction can retry
+        self._generation = 0
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS chunks "
+                     "(row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        for field in INDEXED_FIELDS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS chunks_{field} ON chunks ({_field(field)})")
+        self._conn = conn
+
+        self._finish_compaction()
+        dim = self._get_meta("dimension")
+        self.dim = int(dim) if dim is not None else None
+        self._decode_buffer = None
+        self._decoded = np.zeros((0, self.dim or 0), dtype=np.float32)
+        self._remap()
+        self._alive = np.zeros(len(self._vectors), dtype=bool)
+        self._alive[[row for (row,) in conn.execute("SELECT row FROM chunks")]] = True
+        logger.info(f"Opened NumPy vector store {self.vectors_path} with {self.count()} chunks")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Optional[str]):
+        if value is None:
+            self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+        else:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _finish_compaction(self):
+        # A compaction that committed its new row numbers but crashed before swapping the file in
+        pending = self._get_meta("pending_vectors")
+        if pending is not None:
+            if os.path.exists(pending):
+                os.replace(pending, self.vectors_path)
+            self._set_meta("pending_vectors", None)
+
+    def _row_bytes(self) -> int:
+        return self.dim * 2
+
+    def _remap(self):
+        rows = os.path.getsize(self.vectors_path) // self._row_bytes() if self.dim and os.path.exists(self.vectors_path) else 0
+        if rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(rows, self.dim))
+        else:
+            self._vectors = np.zeros((0, self.dim or 0), dtype=np.float16)
+        self._decode()
+
+    def _decode(self):
+        """Extend the float32 copy of the leading rows up to the cache budget."""
+        cache_rows = int(SEARCH_CACHE_MB * 1024 * 1024 // (4 * self.dim)) if self.dim else 0
+        target = min(len(self._vectors), cache_rows)
+        done = len(self._decoded)
+        if target <= done:
+            return
+        buffer = self._decode_buffer
+        if buffer is None or len(buffer) < target:
+            # Grow by doubling; searches keep their view of the old buffer
+            buffer = np.empty((min(max(target, 2 * done), cache_rows), self.dim), dtype=np.float32)
+            if done:
+                buffer[:done] = self._decoded
+        for start in range(done, target, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, target)
+            buffer[start:end] = self._vectors[start:end]
+        # Rows below done are never rewritten, so views handed out earlier stay valid
+        self._decode_buffer = buffer
+        self._decoded = buffer[:target]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(self, ids, embeddings, documents, metadatas):
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_meta("dimension", str(self.dim))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the store's {self.dim}")
+
+            # Like Chroma, adding an existing ID leaves the stored chunk alone
+            existing = set(self.get(ids=ids, include=[])["ids"])
+            keep = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing]
+            if existing:
+                logger.warning(f"Skipped {len(existing)} chunks whose IDs are already stored")
+            if not keep:
+                return
+
+            # Rows past the last complete one are leftovers of an interrupted append
+            start = os.path.getsize(self.vectors_path) // self._row_bytes() if os.path.exists(self.vectors_path) else 0
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(start * self._row_bytes())
+                f.write(vectors[keep].astype(np.float16).tobytes())
+
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [(start + n, ids[i], documents[i], json.dumps(metadatas[i])) for n, i in enumerate(keep)]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._remap()
+            alive = np.zeros(len(self._vectors), dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            alive[start:start + len(keep)] = True
+            self._alive = alive
+
+    def update(self, ids, metadatas):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("UPDATE chunks SET metadata = ? WHERE id = ?",
+                                       [(json.dumps(metadata), chunk_id) for chunk_id, metadata in zip(ids, metadatas)])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, ids):
+        with self._lock:
+            rows = self._rows_for_ids(ids)
+            self._conn.execute("BEGIN")
+            try:
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    self._conn.execute(f"DELETE FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._alive[rows] = False
+
+    def _rows_for_ids(self, ids: List[str]) -> List[int]:
+        rows = []
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            rows.extend(row for (row,) in self._conn.execute(
+                f"SELECT row FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+            ))
+        return rows
+
+    def _result(self, records: list, include: List[str]) -> Dict[str, Any]:
+        result = {"ids": [record[1] for record in records]}
+        if "documents" in include:
+            result["documents"] = [record[2] for record in records]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(record[3]) for record in records]
+        if "embeddings" in include:
+            rows = [record[0] for record in records]
+            result["embeddings"] = np.asarray(self._vectors[rows], dtype=np.float32).reshape(len(rows), self.dim or 0)
+        return result
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        include = include if include is not None else ["documents", "metadatas"]
+        condition, params = where_to_sql(where)
+        with self._lock:
+            if ids is not None:
+                records = []
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    records.extend(self._conn.execute(
+                        f"SELECT row, id, document, metadata FROM chunks "
+                        f"WHERE id IN ({','.join('?' * len(batch))}) AND {condition} ORDER BY row",
+                        batch + params
+                    ))
+                records = records[offset or 0:(offset or 0) + limit if limit is not None else None]
+            else:
+                records = self._conn.execute(
+                    f"SELECT row, id, document, metadata FROM chunks WHERE {condition} ORDER BY row LIMIT ? OFFSET ?",
+                    params + [limit if limit is not None else -1, offset or 0]
+                ).fetchall()
+            return self._result(records, include)
+
+    def _top_k(self, vectors: np.ndarray, decoded: np.ndarray, alive: np.ndarray, query: np.ndarray, k: int,
+               candidate_rows: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Best k (row, score) pairs for one normalized query, scoring SEARCH_BLOCK_ROWS rows at a time."""
+        total = len(vectors) if candidate_rows is None else len(candidate_rows)
+        best_rows, best_scores = [], []
+        for start in range(0, total, SEARCH_BLOCK_ROWS):
+            if candidate_rows is None:
+                rows = np.arange(start, min(start + SEARCH_BLOCK_ROWS, total))
+            else:
+                rows = candidate_rows[start:start + SEARCH_BLOCK_ROWS]
+            if rows[-1] < len(decoded):
+                block = decoded[rows[0]:rows[-1] + 1] if candidate_rows is None else decoded[rows]
+            else:
+                block = (vectors[rows[0]:rows[-1] + 1] if candidate_rows is None else vectors[rows]).astype(np.float32)
+            scores = block @ query
+            scores[~alive[rows]] = -np.inf
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[top], scores[top]
+            best_rows.append(rows)
+            best_scores.append(scores)
+
+        if not best_rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows = np.concatenate(best_rows)
+        scores = np.concatenate(best_scores)
+        order = np.argsort(-scores, kind="stable")[:k]
+        order = order[np.isfinite(scores[order])]
+        return rows[order], scores[order]
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        include = include if include is not None else ["documents", "metadatas", "distances"]
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+
+        for _ in range(2):
+            with self._lock:
+                vectors, decoded, alive, generation = self._vectors, self._decoded, self._alive, self._generation
+                candidate_rows = None
+                if where:
+                    condition, params = where_to_sql(where)
+                    candidate_rows = np.fromiter(
+                        (row for (row,) in self._conn.execute(f"SELECT row FROM chunks WHERE {condition} ORDER BY row",
+                                                              params)),
+                        dtype=np.int64
+                    )
+
+            # Scoring runs outside the lock; NumPy releases the GIL in the matrix product
+            hits = [self._top_k(vectors, decoded, alive, query, n_results, candidate_rows) if n_results > 0
+                    else (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for query in queries]
+
+            with self._lock:
+                if generation != self._generation:
+                    # Row numbers changed under a compaction; search again
+                    continue
+                result = {key: [] for key in ["ids"] + include}
+                for rows, scores in hits:
+                    row_list = rows.tolist()
+                    by_row = {}
+                    for start in range(0, len(row_list), 500):
+                        batch = row_list[start:start + 500]
+                        for record in self._conn.execute(
+                            f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(batch))})",
+                            batch
+                        ):
+                            by_row[record[0]] = record
+                    records = [by_row[row] for row in row_list if row in by_row]
+                    found = self._result(records, [key for key in include if key != "distances"])
+                    for key, values in found.items():
+                        result[key].append(values)
+                    if "distances" in include:
+                        result["distances"].append([1.0 - float(score) for row, score in zip(row_list, scores)
+                                                    if row in by_row])
+                return result
+        raise RuntimeError("Vector store was compacted repeatedly during a search")
+
+    def compact(self) -> Dict[str, Any]:
+        """Rewrite the vector file without dead rows and renumber the side table to match."""
+        with self._lock:
+            rows = [row for (row,) in self._conn.execute("SELECT row FROM chunks ORDER BY row")]
+            dead_rows = len(self._vectors) - len(rows)
+            tmp_path = self.vectors_path + ".compacting"
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(rows), SEARCH_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(self._vectors[rows[start:start + SEARCH_BLOCK_ROWS]]).tobytes())
+
+            self._conn.execute("BEGIN")
+            try:
+                # Rows only move down and are renumbered in ascending order, so no two ever collide
+                self._conn.executemany("UPDATE chunks SET row = ? WHERE row = ?",
+                                       [(new, old) for new, old in enumerate(rows) if new != old])
+                self._set_meta("pending_vectors", tmp_path)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                os.remove(tmp_path)
+                raise
+            self._finish_compaction()
+
+            self._generation += 1
+            self._decode_buffer = None
+            self._decoded = np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._remap()
+            self._alive = np.ones(len(rows), dtype=bool)
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"dead_rows_removed": dead_rows}
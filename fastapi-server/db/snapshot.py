@@ -0,0 +1,219 @@
+"""
+Snapshot export and import for SecondBrain.
+A snapshot is a zip holding every chunk's ID, text and metadata as JSON lines
+next to the embeddings as one .npy matrix (optionally float16), so a
+knowledge base can be backed up while the server runs and restored, or a new
+replica warmed, without re-embedding anything.
+
+Layout of a snapshot file:
+    manifest.json   - format version, chunk count, dimension, dtype, embedding model
+    chunks.jsonl    - one {"id", "text", "metadata"} object per line, in embedding row order
+    embeddings.npy  - (count, dimension) matrix, readable with numpy.load
+
+From the command line, with the server stopped:
+
+    cd fastapi-server && python -m db.snapshot export backup.sbsnap --float16
+    cd fastapi-server && python -m db.snapshot import backup.sbsnap
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from db import vector_db
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_DIR = os.environ.get("SECONDBRAIN_SNAPSHOT_DIR", "./snapshots")
+SNAPSHOT_PAGE_SIZE = 1000
+
+def _write_snapshot(path: str, float16: bool, embedding_model: Optional[str], page_size: int) -> Dict[str, Any]:
+    source = vector_db.get_vector_store()
+    total = source.count()
+    dtype = np.dtype(np.float16 if float16 else np.float32)
+
+    # The first page gives the embedding width, needed up front for the .npy header
+    first = source.get(limit=page_size, offset=0, include=["embeddings", "documents", "metadatas"])
+    dim = len(first["embeddings"][0]) if total else 0
+
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive, \
+            tempfile.TemporaryFile() as chunks_file:
+        # A zip takes one entry at a time, so chunk records are spooled while the embeddings stream in
+        written = 0
+        with archive.open("embeddings.npy", "w", force_zip64=True) as embeddings_file:
+            np.lib.format.write_array_header_1_0(
+                embeddings_file, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False,
+                                  "shape": (total, dim)}
+            )
+            page = first
+            while page["ids"]:
+                embeddings_file.write(np.asarray(page["embeddings"], dtype=dtype).tobytes())
+                chunks_file.write("".join(
+                    json.dumps({"id": chunk_id, "text": text, "metadata": metadata}, ensure_ascii=False) + "\n"
+                    for chunk_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+                ).encode("utf-8"))
+                written += len(page["ids"])
+                if written >= total:
+                    break
+                page = source.get(limit=page_size, offset=written, include=["embeddings", "documents", "metadatas"])
+
+        chunks_file.seek(0)
+        with archive.open("chunks.jsonl", "w", force_zip64=True) as entry:
+            shutil.copyfileobj(chunks_file, entry)
+
+        if written != total:
+            raise RuntimeError(f"Vector store changed during export: wrote {written} of {total} chunks")
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "collection": source.name,
+            "count": total,
+            "dimension": dim,
+            "dtype": dtype.name,
+            "embedding_model": embedding_model,
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+    os.replace(tmp_path, path)
+    return manifest
+
+async def export_snapshot(path: str, float16: bool = False, embedding_model: Optional[str] = None,
+                          page_size: int = SNAPSHOT_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Write every stored chunk to a snapshot file.
+
+    Writes wait while the export runs so the snapshot is consistent; queries
+    keep being answered.
+
+    Args:
+        path: Snapshot file to write
+        float16: Store embeddings as float16, halving their size
+        embedding_model: Name of the model that produced the embeddings, checked on import
+        page_size: Chunks read from the vector store per page
+
+    Returns:
+        The snapshot manifest, plus its size in bytes and the export time
+    """
+    start = time.perf_counter()
+    async with vector_db.store_write_lock:
+        manifest = await asyncio.get_event_loop().run_in_executor(
+            None, _write_snapshot, path, float16, embedding_model, page_size
+        )
+    report = {**manifest, "path": path, "bytes": os.path.getsize(path),
+              "seconds": round(time.perf_counter() - start, 3)}
+    logger.info(f"Exported {report['count']} chunks to {path} ({report['bytes']} bytes) in {report['seconds']}s")
+    return report
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read("manifest.json"))
+
+def iter_snapshot(path: str, batch_size: int = SNAPSHOT_PAGE_SIZE) -> Iterator[Tuple[list, list, list, np.ndarray]]:
+    """
+    Stream a snapshot back in batches.
+
+    Yields:
+        Tuples of (ids, texts, metadatas, float32 embeddings) of up to batch_size chunks
+    """
+    with zipfile.ZipFile(path) as archive, \
+            archive.open("embeddings.npy") as embeddings_file, \
+            io.TextIOWrapper(archive.open("chunks.jsonl"), encoding="utf-8") as chunks_file:
+        version = np.lib.format.read_magic(embeddings_file)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(embeddings_file)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(embeddings_file)
+        row_bytes = shape[1] * dtype.itemsize
+
+        ids, texts, metadatas = [], [], []
+        for line in chunks_file:
+            chunk = json.loads(line)
+            ids.append(chunk["id"])
+            texts.append(chunk["text"])
+            metadatas.append(chunk["metadata"])
+            if len(ids) == batch_size:
+                rows = np.frombuffer(embeddings_file.read(row_bytes * len(ids)), dtype=dtype)
+                yield ids, texts, metadatas, rows.reshape(len(ids), shape[1]).astype(np.float32)
+                ids, texts, metadatas = [], [], []
+        if ids:
+            rows = np.frombuffer(embeddings_file.read(row_bytes * len(ids)), dtype=dtype)
+            yield ids, texts, metadatas, rows.reshape(len(ids), shape[1]).astype(np.float32)
+
+async def import_snapshot(path: str, embedding_model: Optional[str] = None, overwrite: bool = False,
+                          batch_size: int = SNAPSHOT_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Restore a snapshot with batched inserts, without re-embedding.
+
+    Args:
+        path: Snapshot file to read
+        embedding_model: The current embedding model; a snapshot from a different model is refused
+        overwrite: Replace chunks whose IDs already exist instead of skipping them
+        batch_size: Chunks inserted per batch
+
+    Returns:
+        Report with the numbers of chunks imported and skipped, and the import time
+    """
+    manifest = read_manifest(path)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {manifest.get('format_version')}")
+    if embedding_model and manifest.get("embedding_model") and manifest["embedding_model"] != embedding_model:
+        raise ValueError(f"Snapshot was embedded with {manifest['embedding_model']}, "
+                         f"but the current embedding model is {embedding_model}")
+
+    start = time.perf_counter()
+    loop = asyncio.get_event_loop()
+    imported = skipped = 0
+    for ids, texts, metadatas, embeddings in iter_snapshot(path, batch_size):
+        existing = set(await loop.run_in_executor(None, lambda: vector_db.get_vector_store().get(ids=ids, include=[])["ids"]))
+        if existing and overwrite:
+            await vector_db.delete_from_vector_db(list(existing))
+        elif existing:
+            keep = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing]
+            skipped += len(ids) - len(keep)
+            ids = [ids[i] for i in keep]
+            texts = [texts[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            embeddings = embeddings[keep]
+        await vector_db.add_many_to_vector_db(ids, texts, embeddings, metadatas)
+        imported += len(ids)
+
+    report = {"path": path, "imported": imported, "skipped": skipped,
+              "seconds": round(time.perf_counter() - start, 3)}
+    logger.info(f"Imported {imported} chunks from {path} ({skipped} already present) in {report['seconds']}s")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import a SecondBrain snapshot (run with the server stopped)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write every chunk to a snapshot file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--float16", action="store_true", help="Store embeddings as float16")
+    import_parser = commands.add_parser("import", help="Restore chunks from a snapshot file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--overwrite", action="store_true", help="Replace chunks that already exist")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    from models.embedding_model import EMBEDDING_MODEL_NAME
+
+    if args.command == "export":
+        report = asyncio.run(export_snapshot(args.path, args.float16, EMBEDDING_MODEL_NAME))
+    else:
+        report = asyncio.run(import_snapshot(args.path, EMBEDDING_MODEL_NAME, args.overwrite))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,352 @@
 import uuid
 import asyncio
 import logging
-import chromadb
-from chromadb.config import Settings
 import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+from db.keyword_index import keyword_index
+from db.vector_stores import VectorStore, create_vector_store
+from monitoring.metrics import COLLECTION_CHUNKS, safe_gauge_function
 
 logger = logging.getLogger(__name__)
 
-# Initialize ChromaDB client
-client = chromadb.PersistentClient(path="./vector_store")
+VECTOR_STORE_PATH = os.environ.get("SECONDBRAIN_VECTOR_STORE_PATH", "./vector_store")
+COLLECTION_NAME = os.environ.get("SECONDBRAIN_COLLECTION_NAME", "secondbrain_documents")
+
+# Hybrid retrieval settings
+HYBRID_SEARCH_ENABLED = os.environ.get("SECONDBRAIN_HYBRID_SEARCH", "1") == "1"
+HYBRID_CANDIDATES = int(os.environ.get("SECONDBRAIN_HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.environ.get("SECONDBRAIN_RRF_K", "60"))
+# Minimum similarity for chunks found only by keyword search. Below the vector threshold, so an
+# exact-term match with a weak embedding still counts, but a question that merely shares a word
+# with an unrelated chunk does not retrieve it
+HYBRID_KEYWORD_THRESHOLD = float(os.environ.get("SECONDBRAIN_HYBRID_KEYWORD_THRESHOLD", "0.3"))
+
+# Where clauses have no prefix operator, so URL-prefix filters are checked
+# after the search; over-fetch by this factor so enough results survive
+URL_PREFIX_OVERFETCH = 4
+
+# Vector store backend: "chroma" (HNSW index) or "numpy" (exact search over a memory-mapped float16 matrix)
+VECTOR_STORE = os.environ.get("SECONDBRAIN_VECTOR_STORE", "chroma")
+
+# Distance space and HNSW parameters of the Chroma collection. Search ef applies to an
+# existing collection on open; the others are fixed when a collection is created, so
+# changing them takes `python -m db.maintenance migrate`
+VECTOR_SPACE = os.environ.get("SECONDBRAIN_VECTOR_SPACE", "cosine")
+HNSW_M = int(os.environ.get("SECONDBRAIN_HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.environ.get("SECONDBRAIN_HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.environ.get("SECONDBRAIN_HNSW_SEARCH_EF", "100"))
+HNSW_CONFIGURATION = {
+    "space": VECTOR_SPACE,
+    "max_neighbors": HNSW_M,
+    "ef_construction": HNSW_CONSTRUCTION_EF,
+    "ef_search": HNSW_SEARCH_EF,
+}
+
+# The vector store, opened on first use so importing this module stays cheap
+store = None
+_open_lock = threading.Lock()
+
+# Held by every write and by compaction, so no write lands in a store that is being rebuilt
+store_write_lock = asyncio.Lock()
+
+def get_vector_store() -> VectorStore:
+    """Open the vector store on first use and bring the keyword index in sync with it."""
+    global store
+    if store is not None:
+        return store
+
+    with _open_lock:
+        if store is None:
+            try:
+                opened = create_vector_store(VECTOR_STORE, VECTOR_STORE_PATH, COLLECTION_NAME, HNSW_CONFIGURATION)
+                logger.info(f"{VECTOR_STORE} vector store initialized with {opened.count()} documents")
+            except Exception as e:
+                logger.error(f"Error initializing {VECTOR_STORE} vector store: {e}")
+                raise
+
+            try:
+                sync_keyword_index(opened)
+            except Exception as e:
+                logger.error(f"Error syncing keyword index: {e}")
+            try:
+                backfill_filter_metadata(opened)
+            except Exception as e:
+                logger.error(f"Error backfilling filter metadata: {e}")
+            store = opened
+    return store
+
+def is_vector_store_loaded() -> bool:
+    return store is not None
 
-# Create or get the collection for our documents
-try:
-    collection = client.get_or_create_collection(name="secondbrain_documents")
-    logger.info(f"ChromaDB collection initialized with {collection.count()} documents")
-except Exception as e:
-    logger.error(f"Error initializing ChromaDB: {e}")
-    raise
+def _collection_count() -> float:
+    # Report NaN until the store is open rather than opening it from a metrics scrape
+    return store.count() if store is not None else float("nan")
+
+COLLECTION_CHUNKS.set_function(safe_gauge_function(_collection_count))
+
+def sync_keyword_index(target_store, page_size: int = 1000):
+    """Rebuild the keyword index from the vector store when their chunk counts disagree."""
+    total = target_store.count()
+    if keyword_index.count() == total:
+        return
+
+    logger.info(f"Rebuilding keyword index from {total} stored chunks")
+    keyword_index.clear()
+    for offset in range(0, total, page_size):
+        page = target_store.get(limit=page_size, offset=offset, include=["documents"])
+        keyword_index.add(page["ids"], page["documents"])
+
+def normalize_domain(domain: str) -> str:
+    """Lower-case a host name and drop a leading "www." so both spellings filter alike."""
+    domain = domain.strip().lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+def to_epoch(value) -> float:
+    """Convert an ISO 8601 string, datetime or number to Unix seconds; naive times are taken as UTC."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if not isinstance(value, datetime):
+        raise TypeError(f"Cannot convert {type(value).__name__} to a timestamp")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def filter_metadata(source_url: str, timestamp: Optional[str]) -> dict:
+    """
+    Metadata fields that retrieval filters are pushed down on.
+
+    Args:
+        source_url: The chunk's source URL
+        timestamp: The capture timestamp as sent by the extension (ISO 8601)
+
+    Returns:
+        Dict with "source_domain" and a numeric "timestamp_epoch" for range queries
+    """
+    try:
+        timestamp_epoch = to_epoch(timestamp)
+    except (TypeError, ValueError):
+        # Unparseable or missing capture time: fall back to when it was stored
+        timestamp_epoch = datetime.now(timezone.utc).timestamp()
+    return {
+        "source_domain": normalize_domain(urlparse(source_url).hostname or ""),
+        "timestamp_epoch": timestamp_epoch,
+    }
+
+def backfill_filter_metadata(target_store, page_size: int = 1000):
+    """Add the filter fields to chunks stored before they existed."""
+    total = target_store.count()
+    # Range queries only match chunks that have the field
+    with_fields = target_store.get(where={"timestamp_epoch": {"$gte": -1e18}}, include=[])
+    if len(with_fields["ids"]) == total:
+        return
+
+    logger.info(f"Adding filter metadata to {total - len(with_fields['ids'])} stored chunks")
+    for offset in range(0, total, page_size):
+        page = target_store.get(limit=page_size, offset=offset, include=["metadatas"])
+        ids, metadatas = [], []
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            if "timestamp_epoch" not in metadata:
+                ids.append(chunk_id)
+                metadatas.append({**metadata, **filter_metadata(metadata.get("source_url", ""),
+                                                                metadata.get("timestamp"))})
+        if ids:
+            target_store.update(ids=ids, metadatas=metadatas)
+
+def build_where(filters: Optional[dict]) -> Optional[dict]:
+    """
+    Translate retrieval filters into a Chroma-style where clause.
+
+    Args:
+        filters: Optional keys "domain", "url_prefix", "since", "until" and "document_id"
+
+    Returns:
+        The where clause, or None when nothing can be pushed down
+    """
+    if not filters:
+        return None
+
+    clauses = []
+    domain = filters.get("domain")
+    if not domain and filters.get("url_prefix"):
+        # The prefix's host narrows the search; the rest of the prefix is checked afterwards
+        domain = urlparse(filters["url_prefix"]).hostname
+    if domain:
+        clauses.append({"source_domain": normalize_domain(domain)})
+    if filters.get("document_id"):
+        clauses.append({"document_id": filters["document_id"]})
+    if filters.get("since") is not None:
+        clauses.append({"timestamp_epoch": {"$gte": to_epoch(filters["since"])}})
+    if filters.get("until") is not None:
+        clauses.append({"timestamp_epoch": {"$lte": to_epoch(filters["until"])}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _matches_url_prefix(metadata: dict, url_prefix: Optional[str]) -> bool:
+    return not url_prefix or metadata.get("source_url", "").startswith(url_prefix)
+
+def _filter_ids(ids: list, where: Optional[dict], url_prefix: Optional[str]) -> set:
+    """The subset of chunk IDs whose metadata passes the filters."""
+    if not ids:
+        return set()
+    results = get_vector_store().get(ids=ids, where=where, include=["metadatas"])
+    return {
+        chunk_id for chunk_id, metadata in zip(results["ids"], results["metadatas"])
+        if _matches_url_prefix(metadata, url_prefix)
+    }
 
 async def add_to_vector_db(text: str, embeddings: list, metadata: dict) -> str:
-    """Add content to ChromaDB with embeddings and metadata"""
+    """Add content to the vector store with embeddings and metadata"""
     document_id = str(uuid.uuid4())
     
+    async with store_write_lock:
+        try:
+            get_vector_store().add(
+                ids=[document_id],
+                embeddings=[embeddings],  # The store expects a list of embeddings
+                documents=[text],
+                metadatas=[metadata]
+            )
+            keyword_index.add([document_id], [text])
+            logger.info(f"Added document {document_id} to the vector store")
+            return document_id
+        except Exception as e:
+            logger.error(f"Error adding to the vector store: {e}")
+            raise
+
+async def add_many_to_vector_db(ids: list, texts: list, embeddings: list, metadatas: list) -> list:
+    """
+    Add several chunks to the vector store with a single multi-row insert.
+
+    Args:
+        ids: IDs for the chunks
+        texts: Chunk texts
+        embeddings: Embedding vector for each chunk
+        metadatas: Metadata dict for each chunk
+
+    Returns:
+        The list of IDs that were stored
+    """
+    if not ids:
+        return []
+
+    async with store_write_lock:
+        try:
+            get_vector_store().add(
+                ids=ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas
+            )
+            keyword_index.add(ids, texts)
+            logger.info(f"Added {len(ids)} documents to the vector store")
+            return ids
+        except Exception as e:
+            logger.error(f"Error adding to the vector store: {e}")
+            raise
+
+async def get_chunks_by_url(source_url: str) -> list:
+    """
+    Get every stored chunk for a source URL.
+
+    Returns:
+        List of dicts with the chunk's id, text and metadata
+    """
     try:
-        collection.add(
-            ids=[document_id],
-            embeddings=[embeddings],  # ChromaDB expects a list of embeddings
-            documents=[text],
-            metadatas=[metadata]
+        results = get_vector_store().get(
+            where={"source_url": source_url},
+            include=["documents", "metadatas"]
         )
-        logger.info(f"Added document {document_id} to ChromaDB")
-        return document_id
+        return [
+            {"id": doc_id, "text": text, "metadata": metadata}
+            for doc_id, text, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+    except Exception as e:
+        logger.error(f"Error reading chunks for {source_url} from the vector store: {e}")
+        raise
+
+async def update_metadatas(ids: list, metadatas: list):
+    """Replace the metadata of existing chunks without touching their embeddings."""
+    if not ids:
+        return
+
+    async with store_write_lock:
+        try:
+            get_vector_store().update(ids=ids, metadatas=metadatas)
+            logger.info(f"Updated metadata for {len(ids)} documents in the vector store")
+        except Exception as e:
+            logger.error(f"Error updating vector store metadata: {e}")
+            raise
+
+async def delete_from_vector_db(ids: list) -> int:
+    """Delete chunks by ID. Returns the number of IDs deleted."""
+    if not ids:
+        return 0
+
+    async with store_write_lock:
+        try:
+            get_vector_store().delete(ids=ids)
+            keyword_index.delete(ids)
+            logger.info(f"Deleted {len(ids)} documents from the vector store")
+            return len(ids)
+        except Exception as e:
+            logger.error(f"Error deleting from the vector store: {e}")
+            raise
+
+async def get_chunk_ids(where: dict) -> list:
+    """Get the IDs of every stored chunk whose metadata matches a Chroma-style where clause."""
+    try:
+        return get_vector_store().get(where=where, include=[])["ids"]
     except Exception as e:
-        logger.error(f"Error adding to ChromaDB: {e}")
+        logger.error(f"Error reading chunk IDs from the vector store: {e}")
         raise
 
-async def query_vector_db(query_embedding: list, limit: int = 3, threshold: float = 0.5):
+def distance_to_similarity(distance: float, space: str) -> float:
     """
-    Query documents from ChromaDB based on embedding similarity
+    Convert a vector store distance to cosine similarity.
+
+    Embeddings are unit length, so squared L2 distance is 2 - 2 * cosine;
+    cosine and inner product distances are both 1 - cosine.
+    """
+    if space == "l2":
+        return 1 - distance / 2
+    return 1 - distance
+
+async def query_vector_db(query_embedding: list, limit: int = 3, threshold: float = 0.5,
+                          include_embeddings: bool = False, filters: Optional[dict] = None):
+    """
+    Query documents from the vector store based on embedding similarity
     
     Args:
         query_embedding: The embedding vector of the query
         limit: Maximum number of results to return
-        threshold: Minimum similarity threshold
+        threshold: Minimum cosine similarity
+        include_embeddings: Also return each document's embedding under "embedding"
+        filters: Optional metadata filters, see build_where
         
     Returns:
         Tuple of (list of documents, list of similarity scores)
     """
     try:
-        results = collection.query(
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        url_prefix = (filters or {}).get("url_prefix")
+        vector_store = get_vector_store()
+        results = vector_store.query(
             query_embeddings=[query_embedding],
-            n_results=limit,
-            include=["documents", "metadatas", "distances"]
+            n_results=limit * URL_PREFIX_OVERFETCH if url_prefix else limit,
+            where=build_where(filters),
+            include=include
         )
         
         # Check if we have any results
@@ -62,24 +357,29 @@ async def query_vector_db(query_embedding: list, limit: int = 3, threshold: floa
         # Process all returned results
         docs = []
         similarities = []
+        space = vector_store.space
         
         for i in range(len(results["documents"][0])):
-            # Convert distance to similarity score (1 - distance for cosine distance)
-            similarity = 1 - results["distances"][0][i]
+            similarity = distance_to_similarity(results["distances"][0][i], space)
+            metadata = results["metadatas"][0][i]
             
             # Only include results above threshold
-            if similarity >= threshold:
+            if similarity >= threshold and _matches_url_prefix(metadata, url_prefix):
                 doc_id = results["ids"][0][i]
                 text = results["documents"][0][i]
-                metadata = results["metadatas"][0][i]
                 
-                docs.append({
+                doc = {
                     "id": doc_id,
                     "text": text,
                     "metadata": metadata,
                     "similarity": similarity
-                })
+                }
+                if include_embeddings:
+                    doc["embedding"] = results["embeddings"][0][i]
+                docs.append(doc)
                 similarities.append(similarity)
+                if len(docs) == limit:
+                    break
         
         if not docs:
             logger.info(f"No documents found with similarity above threshold {threshold}")
@@ -88,5 +388,157 @@ async def query_vector_db(query_embedding: list, limit: int = 3, threshold: floa
         return docs, similarities
         
     except Exception as e:
-        logger.error(f"Error querying ChromaDB: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Error querying the vector store: {e}")
+        raise
+
+def _vector_candidates(query_embedding: list, n_results: int, include_embeddings: bool = False,
+                       where: Optional[dict] = None, url_prefix: Optional[str] = None) -> list:
+    """Nearest chunks to the query embedding that pass the filters, best first, without a threshold."""
+    include = ["documents", "metadatas", "distances"]
+    if include_embeddings:
+        include.append("embeddings")
+    vector_store = get_vector_store()
+    results = vector_store.query(
+        query_embeddings=[query_embedding],
+        n_results=n_results * URL_PREFIX_OVERFETCH if url_prefix else n_results,
+        where=where,
+        include=include
+    )
+    if not results["ids"] or not results["ids"][0]:
+        return []
+    
+    hits = []
+    space = vector_store.space
+    for i, doc_id in enumerate(results["ids"][0]):
+        if not _matches_url_prefix(results["metadatas"][0][i], url_prefix):
+            continue
+        hit = {
+            "id": doc_id,
+            "text": results["documents"][0][i],
+            "metadata": results["metadatas"][0][i],
+            "similarity": distance_to_similarity(results["distances"][0][i], space),
+        }
+        if include_embeddings:
+            hit["embedding"] = results["embeddings"][0][i]
+        hits.append(hit)
+    return hits[:n_results]
+
+def _distances(embeddings: np.ndarray, query: np.ndarray, space: str) -> np.ndarray:
+    """Distances from query to each embedding, computed the way a store with the given space does."""
+    if space == "cosine":
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+        return 1 - (embeddings @ query) / np.where(norms > 0, norms, 1)
+    if space == "ip":
+        return 1 - embeddings @ query
+    return ((embeddings - query) ** 2).sum(axis=1)
+
+def _fetch_chunks(ids: list, query_embedding: list) -> dict:
+    """Load chunks found only by keyword search and score them against the query embedding."""
+    vector_store = get_vector_store()
+    results = vector_store.get(ids=ids, include=["documents", "metadatas", "embeddings"])
+    if not results["ids"]:
+        return {}
+
+    # Same distance the store uses, so scores are comparable with vector hits
+    embeddings = np.asarray(results["embeddings"], dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    space = vector_store.space
+    distances = _distances(embeddings, query, space)
+    return {
+        doc_id: {
+            "id": doc_id,
+            "text": text,
+            "metadata": metadata,
+            "similarity": distance_to_similarity(float(distance), space),
+            "embedding": embedding,
+        }
+        for doc_id, text, metadata, distance, embedding in zip(
+            results["ids"], results["documents"], results["metadatas"], distances, embeddings
+        )
+    }
+
+async def hybrid_query_vector_db(query_text: str, query_embedding: list, limit: int = 3, threshold: float = 0.5,
+                                 candidates: int = HYBRID_CANDIDATES, include_embeddings: bool = False,
+                                 filters: Optional[dict] = None, keyword_threshold: float = HYBRID_KEYWORD_THRESHOLD):
+    """
+    Query documents with BM25 keyword search and vector search, merged by reciprocal rank fusion
+    
+    Both searches run concurrently. Vector hits must clear the similarity
+    threshold; hits found only by keyword search must clear the lower
+    keyword_threshold, so exact terms with a weak embedding similarity can
+    still be retrieved but unrelated chunks sharing a word are not.
+    
+    Args:
+        query_text: The question text for keyword search
+        query_embedding: The embedding vector of the query
+        limit: Maximum number of results to return
+        threshold: Minimum cosine similarity for vector hits
+        candidates: Number of candidates taken from each search before fusion
+        include_embeddings: Also return each document's embedding under "embedding"
+        filters: Optional metadata filters, see build_where
+        keyword_threshold: Minimum cosine similarity for hits found only by keyword search
+        
+    Returns:
+        Tuple of (list of documents, list of similarity scores) in fused rank order
+    """
+    try:
+        loop = asyncio.get_event_loop()
+        n_results = max(limit, candidates)
+        where = build_where(filters)
+        url_prefix = (filters or {}).get("url_prefix")
+        # The keyword index is not filtered, so over-fetch from it when filters will drop hits
+        keyword_limit = n_results * URL_PREFIX_OVERFETCH if filters else n_results
+        vector_hits, keyword_hits = await asyncio.gather(
+            loop.run_in_executor(None, _vector_candidates, query_embedding, n_results, include_embeddings,
+                                 where, url_prefix),
+            loop.run_in_executor(None, keyword_index.search, query_text, keyword_limit)
+        )
+        
+        chunks_by_id = {hit["id"]: hit for hit in vector_hits}
+        vector_ranked = [hit["id"] for hit in vector_hits if hit["similarity"] >= threshold]
+        vector_matches = set(vector_ranked)
+        keyword_ranked = [chunk_id for chunk_id, _ in keyword_hits]
+        if where is not None or url_prefix:
+            allowed = await loop.run_in_executor(None, _filter_ids, keyword_ranked, where, url_prefix)
+            keyword_ranked = [chunk_id for chunk_id in keyword_ranked if chunk_id in allowed]
+        keyword_ranked = keyword_ranked[:n_results]
+        
+        # Reciprocal rank fusion: score = sum of 1 / (k + rank) over the result lists
+        scores = {}
+        for ranked in (vector_ranked, keyword_ranked):
+            for rank, chunk_id in enumerate(ranked, start=1):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+        fused = sorted(scores, key=scores.get, reverse=True)
+        
+        # Walk the fused list in windows of the results still needed, fetching the
+        # keyword-only hits of each window, until limit chunks are found
+        docs = []
+        position = 0
+        while len(docs) < limit and position < len(fused):
+            window = fused[position:position + limit - len(docs)]
+            position += len(window)
+            missing = [chunk_id for chunk_id in window if chunk_id not in chunks_by_id]
+            if missing:
+                chunks_by_id.update(await loop.run_in_executor(None, _fetch_chunks, missing, query_embedding))
+            for chunk_id in window:
+                chunk = chunks_by_id.get(chunk_id)
+                if chunk is None:
+                    # Indexed by keyword but no longer in the vector store
+                    continue
+                if chunk_id not in vector_matches and chunk["similarity"] < keyword_threshold:
+                    continue
+                doc = {**chunk, "rrf_score": scores[chunk_id]}
+                if not include_embeddings:
+                    doc.pop("embedding", None)
+                docs.append(doc)
+        
+        if not docs:
+            logger.info("No documents found by hybrid search")
+            return None, 0
+        
+        logger.info(f"Hybrid search: {len(vector_ranked)} vector hits, {len(keyword_ranked)} keyword hits")
+        return docs, [doc["similarity"] for doc in docs]
+    
+    except Exception as e:
+        logger.error(f"Error in hybrid search: {e}")
+        raise
@@ -0,0 +1,290 @@
+"""
+Vector store backends for SecondBrain.
+db/vector_db.py talks to a VectorStore rather than to Chroma directly. The
+interface follows the subset of Chroma's collection API the app uses (ids,
+documents, metadatas and embeddings; Chroma-style where clauses), so Chroma
+is one backend and an in-process NumPy store is another. The backend is
+picked with SECONDBRAIN_VECTOR_STORE.
+"""
+
+import logging
+import os
+import re
+import shutil
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+VECTOR_STORES = ("chroma", "numpy")
+COMPACTION_PAGE_SIZE = 1000
+
+# HNSW settings that are fixed when a Chroma collection is created; ef_search can change later
+_FIXED_HNSW_SETTINGS = ("space", "max_neighbors", "ef_construction")
+_HNSW_SETTINGS = _FIXED_HNSW_SETTINGS + ("ef_search",)
+
+# Chroma keeps each HNSW segment in a directory named after the segment's UUID
+_SEGMENT_DIR = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+def directory_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+class VectorStore(ABC):
+    """
+    Interface for storing chunks with their embeddings and searching them.
+
+    Results use Chroma's shapes: get() returns {"ids": [...], <included>: [...]}
+    and query() returns the same keys with one list per query embedding.
+    Distances are in the store's space ("l2", "cosine" or "ip").
+    """
+
+    name = "base"
+    space = "l2"
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of chunks stored."""
+
+    @abstractmethod
+    def add(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        """Store new chunks."""
+
+    @abstractmethod
+    def update(self, ids: List[str], metadatas: List[dict]):
+        """Replace the metadata of stored chunks."""
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Remove chunks by id; unknown ids are ignored."""
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Fetch chunks by id and/or where clause, in pages of limit from offset."""
+
+    @abstractmethod
+    def query(self, query_embeddings, n_results: int, where: Optional[dict] = None,
+              include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Find the n_results nearest chunks to each query embedding."""
+
+    @abstractmethod
+    def compact(self) -> Dict[str, Any]:
+        """Reclaim the space left behind by deletes. Returns backend-specific details for the report."""
+
+    def migrate(self) -> Dict[str, Any]:
+        """Rebuild the index under the configured settings. Stores without index settings have nothing to do."""
+        return {"migrated": False}
+
+class ChromaVectorStore(VectorStore):
+    """A persistent Chroma collection with an HNSW index."""
+
+    def __init__(self, path: str, collection_name: str, hnsw: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: Directory for Chroma's files
+            collection_name: Name of the collection
+            hnsw: Wanted HNSW settings ("space", "max_neighbors", "ef_construction", "ef_search"),
+                used as-is for a new collection; an existing one keeps its fixed settings until migrate()
+        """
+        import chromadb
+
+        self.path = path
+        self.hnsw = hnsw
+        self.client = chromadb.PersistentClient(path=path)
+        self._recover_interrupted_rebuild(collection_name)
+        # Create or get the collection for our documents
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name, configuration={"hnsw": hnsw} if hnsw else None
+        )
+        self.name = collection_name
+
+        if hnsw:
+            current = self.hnsw_settings
+            if "ef_search" in hnsw and current.get("ef_search") != hnsw["ef_search"]:
+                self.collection.modify(configuration={"hnsw": {"ef_search": hnsw["ef_search"]}})
+            stale = [f"{key}={current.get(key)} (configured {hnsw[key]})"
+                     for key in _FIXED_HNSW_SETTINGS if key in hnsw and current.get(key) != hnsw[key]]
+            if stale:
+                logger.warning(f"Collection {collection_name} was created with {', '.join(stale)}; "
+                               f"run `python -m db.maintenance migrate` to rebuild it with the configured settings")
+
+    @property
+    def hnsw_settings(self) -> Dict[str, Any]:
+        """The collection's current space and HNSW parameters."""
+        hnsw = (self.collection.configuration or {}).get("hnsw") or {}
+        return {key: hnsw.get(key) for key in _HNSW_SETTINGS}
+
+    @property
+    def space(self) -> str:
+        hnsw = (self.collection.configuration or {}).get("hnsw") or {}
+        return hnsw.get("space") or (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def update(self, ids, metadatas):
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids):
+        self.collection.delete(ids=ids)
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        return self.collection.get(ids=ids, where=where, limit=limit, offset=offset,
+                                   include=include if include is not None else ["documents", "metadatas"])
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, where=where,
+                                     include=include if include is not None else ["documents", "metadatas", "distances"])
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Copy the live chunks into a fresh collection that takes over the name,
+        then drop segment directories no collection uses and vacuum SQLite.
+        """
+        self._rebuild(page_size=COMPACTION_PAGE_SIZE)
+        orphan_bytes = self._remove_orphan_segments()
+        try:
+            conn = sqlite3.connect(os.path.join(self.path, "chroma.sqlite3"), isolation_level=None)
+            try:
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not vacuum the Chroma database: {e}")
+        return {"orphan_segment_bytes": orphan_bytes}
+
+    def migrate(self) -> Dict[str, Any]:
+        """Rebuild the collection under the configured space and HNSW parameters, if they differ."""
+        before = self.hnsw_settings
+        if not self.hnsw or all(before.get(key) == value for key, value in self.hnsw.items()):
+            return {"migrated": False, "hnsw": before}
+        self._rebuild(page_size=COMPACTION_PAGE_SIZE, hnsw=self.hnsw)
+        self._remove_orphan_segments()
+        return {"migrated": True, "hnsw_before": before, "hnsw": self.hnsw_settings}
+
+    def _rebuild(self, page_size: int, hnsw: Optional[Dict[str, Any]] = None):
+        """Copy the live chunks into a fresh collection, optionally with new HNSW settings, and swap it in."""
+        source = self.collection
+        temp_name = f"{self.name}_compacting"
+        # Left over from an interrupted rebuild, possibly holding chunks found nowhere else
+        self._recover_interrupted_rebuild(self.name)
+
+        source_hnsw = (source.configuration or {}).get("hnsw")
+        hnsw = {**(source_hnsw or {}), **(hnsw or {})}
+        metadata = source.metadata
+        if metadata and hnsw:
+            # Legacy hnsw:* metadata would otherwise contradict the configuration
+            metadata = {key: value for key, value in metadata.items() if not key.startswith("hnsw:")} or None
+        target = self.client.create_collection(
+            name=temp_name,
+            metadata=metadata,
+            configuration={"hnsw": hnsw} if hnsw else None,
+        )
+
+        total = source.count()
+        for offset in range(0, total, page_size):
+            page = source.get(limit=page_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+            target.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"],
+                       metadatas=page["metadatas"])
+        if target.count() != total:
+            self.client.delete_collection(temp_name)
+            raise RuntimeError(f"Compaction copied {target.count()} of {total} chunks, keeping the original collection")
+
+        # Swap before dropping the original so reads never see a missing collection. A crash
+        # between the drop and the rename leaves only the copy, which the next open renames back
+        self.collection = target
+        self.client.delete_collection(self.name)
+        target.modify(name=self.name)
+
+    def _get_collection(self, name: str):
+        try:
+            return self.client.get_collection(name)
+        except Exception:
+            return None
+
+    def _recover_interrupted_rebuild(self, collection_name: str):
+        """
+        Resolve a rebuild copy left behind by a crash, without losing chunks.
+
+        If the collection itself is missing or empty, the crash came between
+        dropping it and renaming the copy, so the copy takes over the name.
+        Otherwise the copy is dropped, after moving over any chunk the
+        collection lacks (an empty collection created by an older version
+        may have been filled since).
+        """
+        temp_name = f"{collection_name}_compacting"
+        temp = self._get_collection(temp_name)
+        if temp is None:
+            return
+
+        main = self._get_collection(collection_name)
+        if main is None or main.count() == 0:
+            if main is not None:
+                self.client.delete_collection(collection_name)
+            temp.modify(name=collection_name)
+            logger.warning(f"Restored collection {collection_name} from {temp_name}, "
+                           f"left by an interrupted compaction or migration")
+            return
+
+        moved = 0
+        total = temp.count()
+        for offset in range(0, total, COMPACTION_PAGE_SIZE):
+            page = temp.get(limit=COMPACTION_PAGE_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"])
+            present = set(main.get(ids=page["ids"], include=[])["ids"])
+            keep = [i for i, chunk_id in enumerate(page["ids"]) if chunk_id not in present]
+            if keep:
+                main.add(ids=[page["ids"][i] for i in keep], embeddings=[page["embeddings"][i] for i in keep],
+                         documents=[page["documents"][i] for i in keep],
+                         metadatas=[page["metadatas"][i] for i in keep])
+                moved += len(keep)
+        self.client.delete_collection(temp_name)
+        logger.warning(f"Dropped {temp_name}, left by an interrupted compaction or migration"
+                       + (f", after moving {moved} chunks missing from {collection_name}" if moved else ""))
+
+    def _remove_orphan_segments(self) -> int:
+        """Delete segment directories that no collection refers to. Returns the bytes freed."""
+        conn = sqlite3.connect(os.path.join(self.path, "chroma.sqlite3"))
+        try:
+            live_segments = {row[0] for row in conn.execute("SELECT id FROM segments")}
+        finally:
+            conn.close()
+
+        freed = 0
+        for entry in os.listdir(self.path):
+            segment_path = os.path.join(self.path, entry)
+            if os.path.isdir(segment_path) and _SEGMENT_DIR.match(entry) and entry not in live_segments:
+                freed += directory_bytes(segment_path)
+                shutil.rmtree(segment_path, ignore_errors=True)
+        return freed
+
+def create_vector_store(name: str, path: str, collection_name: str,
+                        hnsw: Optional[Dict[str, Any]] = None) -> VectorStore:
+    """
+    Open the vector store backend with the given name.
+
+    Args:
+        name: One of VECTOR_STORES
+        path: Directory the store keeps its files in
+        collection_name: Name of the collection (Chroma) or table namespace (NumPy)
+        hnsw: HNSW settings for Chroma; the NumPy store searches exactly and has none
+
+    Returns:
+        The vector store
+    """
+    if name == "chroma":
+        return ChromaVectorStore(path, collection_name, hnsw)
+    if name == "numpy":
+        from db.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(path, collection_name)
+    raise ValueError(f"Unknown vector store {name!r}, expected one of {', '.join(VECTOR_STORES)}")
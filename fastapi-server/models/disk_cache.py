@@ -0,0 +1,200 @@
+"""
+Persistent on-disk embedding cache for SecondBrain.
+Embeddings are keyed by (model name, text hash) and survive restarts, so
+rebuilding the vector store or replaying captures does not re-run the model.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_DIR = os.environ.get("SECONDBRAIN_EMBEDDING_CACHE_DIR", "./embedding_cache")
+EMBEDDING_CACHE_MAX_MB = float(os.environ.get("SECONDBRAIN_EMBEDDING_CACHE_MAX_MB", "512"))
+
+# Fraction of the size limit kept when the cache is compacted
+_COMPACT_KEEP_FRACTION = 0.8
+_KEY_BYTES = 16
+
+class DiskEmbeddingCache:
+    """
+    Append-only, memory-mapped embedding cache.
+
+    Layout of each model's directory:
+        vectors.f32 - raw float32 rows, one embedding per row
+        keys.bin    - 16-byte blake2b digest per row, in the same order
+        meta.json   - embedding dimension
+
+    The key file is loaded into a dict of digest -> row once; vectors are read
+    straight from the memory map, so lookups need no deserialization. When the
+    files grow past max_mb, the oldest rows are dropped by rewriting both files.
+    A max_mb of 0 disables the cache.
+    """
+
+    def __init__(self, model_name: str, directory: str = EMBEDDING_CACHE_DIR, max_mb: float = EMBEDDING_CACHE_MAX_MB):
+        self.model_name = model_name
+        self.enabled = max_mb > 0
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        safe_name = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in model_name)
+        self.directory = os.path.join(directory, safe_name)
+        self._vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._keys_path = os.path.join(self.directory, "keys.bin")
+        self._meta_path = os.path.join(self.directory, "meta.json")
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dim = None
+        self._rows = 0
+        self._index = {}
+        self._vectors = None
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=_KEY_BYTES)
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def _load(self):
+        """Open the cache files on first use."""
+        self._loaded = True
+        if not os.path.exists(self._meta_path):
+            return
+
+        try:
+            with open(self._meta_path) as f:
+                self._dim = int(json.load(f)["dim"])
+            keys = self._read_keys()
+            vector_rows = os.path.getsize(self._vectors_path) // (self._dim * 4) if os.path.exists(self._vectors_path) else 0
+
+            # A crash between or during the two appends can leave the files one write apart;
+            # cut both back to whole, matching rows so later appends stay aligned
+            self._rows = min(len(keys), vector_rows)
+            for path, row_bytes in ((self._keys_path, _KEY_BYTES), (self._vectors_path, self._dim * 4)):
+                if os.path.exists(path) and os.path.getsize(path) != self._rows * row_bytes:
+                    logger.warning(f"Truncating {path} to {self._rows} complete rows")
+                    os.truncate(path, self._rows * row_bytes)
+            self._index = {key.tobytes(): row for row, key in enumerate(keys[:self._rows])}
+            self._remap()
+            logger.info(f"Loaded embedding cache for {self.model_name} with {len(self._index)} entries")
+        except Exception as e:
+            logger.error(f"Error loading embedding cache at {self.directory}, starting empty: {e}")
+            self._dim, self._rows, self._index, self._vectors = None, 0, {}, None
+
+    def _read_keys(self) -> np.ndarray:
+        """Key file as fixed-width raw records, one row of _KEY_BYTES bytes per entry."""
+        if not os.path.exists(self._keys_path):
+            return np.zeros((0, _KEY_BYTES), dtype=np.uint8)
+        # Raw bytes rather than an "S" dtype, which would strip trailing NUL bytes from digests
+        raw = np.fromfile(self._keys_path, dtype=np.uint8)
+        return raw[:len(raw) - len(raw) % _KEY_BYTES].reshape(-1, _KEY_BYTES)
+
+    def _remap(self):
+        if self._rows:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._rows, self._dim))
+        else:
+            self._vectors = None
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up embeddings for texts; missing entries are None."""
+        if not self.enabled:
+            return [None] * len(texts)
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            results = []
+            for text in texts:
+                row = self._index.get(self._key(text))
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(np.array(self._vectors[row]))
+            return results
+
+    def put_many(self, texts: List[str], vectors):
+        """Append embeddings for texts that are not cached yet."""
+        if not self.enabled or not len(texts):
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            if self._dim is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._dim = int(vectors.shape[1])
+                with open(self._meta_path, "w") as f:
+                    json.dump({"dim": self._dim, "model": self.model_name}, f)
+
+            new_keys, new_rows, seen = [], [], set()
+            for text, vector in zip(texts, vectors):
+                key = self._key(text)
+                if key in self._index or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                new_rows.append(vector)
+
+            if not new_keys:
+                return
+
+            # Vectors first, then keys: a key is only visible once its row is on disk
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.stack(new_rows).astype(np.float32).tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(new_keys))
+
+            for key in new_keys:
+                self._index[key] = self._rows
+                self._rows += 1
+            self._remap()
+
+            if self._rows * (self._dim * 4 + _KEY_BYTES) > self.max_bytes:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the cache keeping only the newest rows that fit the size budget."""
+        keep = int(self.max_bytes * _COMPACT_KEEP_FRACTION) // (self._dim * 4 + _KEY_BYTES)
+        rows = sorted(self._index.values())[-keep:] if keep > 0 else []
+        keys = {row: key for key, row in self._index.items()}
+
+        vectors_tmp = self._vectors_path + ".tmp"
+        keys_tmp = self._keys_path + ".tmp"
+        with open(vectors_tmp, "wb") as f:
+            if rows:
+                f.write(np.asarray(self._vectors[rows], dtype=np.float32).tobytes())
+        with open(keys_tmp, "wb") as f:
+            f.write(b"".join(keys[row] for row in rows))
+
+        self._vectors = None
+        os.replace(vectors_tmp, self._vectors_path)
+        os.replace(keys_tmp, self._keys_path)
+
+        evicted = len(self._index) - len(rows)
+        self._index = {keys[row]: new_row for new_row, row in enumerate(rows)}
+        self._rows = len(rows)
+        self._remap()
+        logger.info(f"Compacted embedding cache for {self.model_name}: evicted {evicted}, kept {self._rows}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self._rows * ((self._dim or 0) * 4 + _KEY_BYTES),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
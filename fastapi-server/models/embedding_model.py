@@ -1,11 +1,258 @@
-from sentence_transformers import SentenceTransformer
 import asyncio
+import logging
+import os
+import threading
+from typing import List
+
+from models.disk_cache import DiskEmbeddingCache
+from models.embedding_backends import create_backend
+from models.embedding_pool import EMBEDDING_PROCESSES, EmbeddingProcessPool
+from monitoring.metrics import EMBEDDING_BATCH_SIZES, register_cache
+
+logger = logging.getLogger(__name__)
 
 # Initialize the Sentence Transformer for MVP; model can be made configurable later.
-model = SentenceTransformer('all-MiniLM-L6-v2')
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Runtime that executes the model: torch, onnx or onnx-int8
+EMBEDDING_BACKEND = os.environ.get("SECONDBRAIN_EMBEDDING_BACKEND", "torch")
+
+# Number of texts encoded per forward pass when embedding a batch of chunks
+EMBEDDING_BATCH_SIZE = int(os.environ.get("SECONDBRAIN_EMBEDDING_BATCH_SIZE", "32"))
+
+# Micro-batching of concurrent single-text requests (queries, ad-hoc embeddings)
+EMBEDDING_MAX_BATCH_SIZE = int(os.environ.get("SECONDBRAIN_EMBEDDING_MAX_BATCH_SIZE", "64"))
+EMBEDDING_MAX_WAIT_MS = float(os.environ.get("SECONDBRAIN_EMBEDDING_MAX_WAIT_MS", "5"))
+
+# Batches with at least this many uncached texts go to the embedding processes, if enabled
+EMBEDDING_PROCESS_MIN_BATCH = int(os.environ.get("SECONDBRAIN_EMBEDDING_PROCESS_MIN_BATCH", "64"))
+
+# The model, backend and cache are created on first use so importing this module stays cheap
+_model = None
+_backend = None
+_embedding_cache = None
+_embedding_pool = None
+_load_lock = threading.Lock()
+
+def _load():
+    global _model, _backend, _embedding_cache
+    with _load_lock:
+        if _backend is not None:
+            return
+
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        try:
+            backend = create_backend(EMBEDDING_BACKEND, model, EMBEDDING_MODEL_NAME)
+        except Exception as e:
+            logger.error(f"Error loading {EMBEDDING_BACKEND} embedding backend, falling back to torch: {e}")
+            backend = create_backend("torch", model, EMBEDDING_MODEL_NAME)
+
+        # Persistent cache of embeddings keyed by (model name, backend, text hash);
+        # torch keeps the plain model name so existing caches stay valid
+        cache_name = EMBEDDING_MODEL_NAME if backend.name == "torch" else f"{EMBEDDING_MODEL_NAME}-{backend.name}"
+        _embedding_cache = DiskEmbeddingCache(cache_name)
+        _model = model
+        _backend = backend
+        logger.info(f"Loaded embedding model {EMBEDDING_MODEL_NAME} on the {backend.name} backend")
+
+def get_model():
+    """The SentenceTransformer, loaded on first use."""
+    if _backend is None:
+        _load()
+    return _model
+
+def get_backend():
+    """The embedding backend, loaded on first use."""
+    if _backend is None:
+        _load()
+    return _backend
+
+def get_embedding_cache() -> DiskEmbeddingCache:
+    if _backend is None:
+        _load()
+    return _embedding_cache
+
+def is_model_loaded() -> bool:
+    return _backend is not None
+
+def warmup_model():
+    """Load the model and run one forward pass so the first real request pays for neither."""
+    get_backend().encode(["warmup"], batch_size=1)
+
+def _embedding_cache_stats():
+    if _embedding_cache is None:
+        return {"hits": 0, "misses": 0, "hit_rate": 0.0}
+    return _embedding_cache.stats()
+
+register_cache("embedding_disk", _embedding_cache_stats)
+
+def get_tokenizer():
+    """Tokenizer of the embedding model, used to size chunks in model tokens."""
+    return getattr(get_backend(), "tokenizer", None)
+
+def get_max_seq_length() -> int:
+    """Maximum number of tokens (including special tokens) the model encodes before truncating."""
+    return int(getattr(get_backend(), "max_seq_length", None) or 256)
+
+def encode_with_cache(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    """Encode texts, reading from and filling the persistent embedding cache."""
+    embedding_cache = get_embedding_cache()
+    embeddings = embedding_cache.get_many(texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+    if missing:
+        EMBEDDING_BATCH_SIZES.observe(len(missing))
+        encoded = get_backend().encode([texts[i] for i in missing], batch_size=batch_size)
+        embedding_cache.put_many([texts[i] for i in missing], encoded)
+        for i, embedding in zip(missing, encoded):
+            embeddings[i] = embedding
+
+    return embeddings
+
+def get_embedding_pool():
+    """The embedding process pool, or None when SECONDBRAIN_EMBEDDING_PROCESSES is 0."""
+    global _embedding_pool
+    if EMBEDDING_PROCESSES <= 0:
+        return None
+    if _embedding_pool is None:
+        # Workers run the backend the server process actually loaded
+        _embedding_pool = EmbeddingProcessPool(EMBEDDING_PROCESSES, EMBEDDING_MODEL_NAME, get_backend().name)
+    return _embedding_pool
+
+def shutdown_embedding_pool():
+    if _embedding_pool is not None:
+        _embedding_pool.shutdown()
+
+async def encode_with_pool(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    """Like encode_with_cache, but encode the uncached texts in the embedding processes."""
+    loop = asyncio.get_event_loop()
+    embedding_cache = await loop.run_in_executor(None, get_embedding_cache)
+    embeddings = await loop.run_in_executor(None, embedding_cache.get_many, texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        EMBEDDING_BATCH_SIZES.observe(len(missing))
+        if len(missing) >= EMBEDDING_PROCESS_MIN_BATCH:
+            encoded = await get_embedding_pool().encode(missing_texts, batch_size=batch_size)
+        else:
+            # Too small to be worth the hop to another process
+            encoded = await loop.run_in_executor(None, lambda: get_backend().encode(missing_texts, batch_size=batch_size))
+        await loop.run_in_executor(None, embedding_cache.put_many, missing_texts, encoded)
+        for i, embedding in zip(missing, encoded):
+            embeddings[i] = embedding
+
+    return embeddings
+
+def _encode_texts(texts: List[str]) -> list:
+    return encode_with_cache(texts, batch_size=len(texts))
+
+class EmbeddingBatcher:
+    """
+    Queue incoming texts and encode them together in micro-batches.
+
+    A batch is flushed once it holds max_batch_size texts or the oldest text
+    has waited max_wait_ms. Only one batch is encoded at a time, so concurrent
+    callers share a single model.encode call instead of competing for the CPU.
+    Each caller receives its own vector through a future.
+    """
+
+    def __init__(self, encode_fn, max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+                 max_wait_ms: float = EMBEDDING_MAX_WAIT_MS):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        # Queues and futures are bound to a loop, so start a fresh worker per loop
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str):
+        """Embed a single text as part of the next micro-batch."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued before waiting for more
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+
+            # Skip callers that gave up while waiting
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await self._loop.run_in_executor(None, self._encode_fn, texts)
+            except Exception as e:
+                logger.error(f"Error encoding batch of {len(texts)} texts: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(texts)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+embedding_batcher = EmbeddingBatcher(_encode_texts)
 
 async def create_embeddings(text: str, metadata: dict) -> list:
-    # Run the compute-bound model.encode in a thread pool to avoid blocking event loop.
+    # Merge with other concurrent requests into one model.encode call off the event loop.
+    return await embedding_batcher.embed(text)
+
+async def create_embeddings_batch(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    """
+    Embed a list of texts with a single vectorized backend.encode call, or
+    across the embedding processes when SECONDBRAIN_EMBEDDING_PROCESSES is set.
+    Texts already in the persistent embedding cache are not re-encoded.
+
+    Args:
+        texts: The texts to embed
+        batch_size: Number of texts per forward pass
+
+    Returns:
+        List of embedding vectors, in the same order as texts
+    """
+    if not texts:
+        return []
+
+    if EMBEDDING_PROCESSES > 0:
+        return await encode_with_pool(texts, batch_size)
+
     loop = asyncio.get_event_loop()
-    embeddings = await loop.run_in_executor(None, model.encode, text)
-    return embeddings
\ No newline at end of file
+    return await loop.run_in_executor(None, encode_with_cache, texts, batch_size)
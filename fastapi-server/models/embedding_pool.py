@@ -0,0 +1,151 @@
+"""
+Multi-process embedding for SecondBrain.
+Large ingests are split across worker processes that each load the model
+once, so tokenization and model overhead run on every core instead of in one
+interpreter. Vectors come back through a shared-memory block rather than as
+pickled lists.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Number of embedding worker processes; 0 keeps embedding in the server process
+EMBEDDING_PROCESSES = int(os.environ.get("SECONDBRAIN_EMBEDDING_PROCESSES", "0"))
+
+# Set in each worker process by _init_worker
+_worker_backend = None
+
+def _init_worker(model_name: str, backend_name: str, threads: int):
+    """Load the model once per worker, with its share of the CPU threads."""
+    global _worker_backend
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from models.embedding_backends import create_backend
+
+    torch.set_num_threads(threads)
+    _worker_backend = create_backend(backend_name, SentenceTransformer(model_name), model_name, threads=threads)
+
+def _worker_dimension() -> int:
+    return int(_worker_backend.encode(["dimension probe"], batch_size=1).shape[1])
+
+def _encode_into(texts: List[str], batch_size: int, shm_name: str, total_rows: int, dim: int, start: int) -> int:
+    """Encode texts and write them into rows start.. of the shared output block."""
+    vectors = np.asarray(_worker_backend.encode(texts, batch_size=batch_size), dtype=np.float32)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((total_rows, dim), dtype=np.float32, buffer=shm.buf)
+        out[start:start + len(texts)] = vectors
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+def _unlink_when_done(futures: list, shm: shared_memory.SharedMemory):
+    """Unlink the output block once every worker task writing to it has finished."""
+    remaining = [future for future in futures if not future.done()]
+    if not remaining:
+        shm.unlink()
+        return
+
+    lock = threading.Lock()
+    left = [len(remaining)]
+
+    def on_done(_):
+        with lock:
+            left[0] -= 1
+            last = left[0] == 0
+        if last:
+            shm.unlink()
+
+    for future in remaining:
+        future.add_done_callback(on_done)
+
+class EmbeddingProcessPool:
+    """
+    Pool of spawned worker processes that each hold a copy of the embedding model.
+
+    The pool starts on first use. Each encode call allocates one shared-memory
+    block for all of its output rows; workers write their slices in place and
+    the parent copies the block out once and frees it.
+    """
+
+    def __init__(self, processes: int, model_name: str, backend_name: str):
+        self.processes = max(1, processes)
+        self.model_name = model_name
+        self.backend_name = backend_name
+        self.threads = max(1, (os.cpu_count() or 1) // self.processes)
+        self._executor = None
+        self._dim = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            logger.info(f"Starting {self.processes} embedding processes with {self.threads} threads each")
+            executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.backend_name, self.threads),
+            )
+            # Starts a worker and learns the output width for sizing shared memory
+            self._dim = executor.submit(_worker_dimension).result()
+            self._executor = executor
+
+    async def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode texts across the worker processes.
+
+        Args:
+            texts: The texts to embed
+            batch_size: Number of texts per forward pass inside each worker
+
+        Returns:
+            Array of embeddings, one row per text
+        """
+        loop = asyncio.get_event_loop()
+        if self._executor is None:
+            await loop.run_in_executor(None, self._start)
+        if not texts:
+            return np.zeros((0, self._dim), dtype=np.float32)
+
+        # One slice per process, capped so very large calls still balance across workers
+        slice_size = max(1, min(math.ceil(len(texts) / self.processes), batch_size * 8))
+        shm = shared_memory.SharedMemory(create=True, size=len(texts) * self._dim * 4)
+        futures = []
+        try:
+            for start in range(0, len(texts), slice_size):
+                futures.append(self._executor.submit(
+                    _encode_into, texts[start:start + slice_size], batch_size, shm.name, len(texts), self._dim, start
+                ))
+            # Wait for every slice, even after one fails: the others still write to the block
+            results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures),
+                                           return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return np.ndarray((len(texts), self._dim), dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            # If the call was cancelled, slices already running finish in the background first
+            _unlink_when_done(futures, shm)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,77 @@
+"""
+In-process LRU cache of query embeddings for SecondBrain.
+Repeated questions are answered from the cache instead of the encoder.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from monitoring.metrics import register_cache
+
+QUERY_CACHE_SIZE = int(os.environ.get("SECONDBRAIN_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.environ.get("SECONDBRAIN_QUERY_CACHE_TTL_SECONDS", "3600"))
+
+def normalize_question(question: str) -> str:
+    """Normalize question text so trivially different phrasings share a cache key."""
+    return re.sub(r"\s+", " ", question).strip().lower()
+
+class QueryEmbeddingCache:
+    """
+    LRU cache with per-entry TTL mapping normalized question text to its embedding.
+
+    A max_size of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question: str) -> Optional[Any]:
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                embedding, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, question: str, embedding: Any):
+        if self.max_size <= 0:
+            return
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = (embedding, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+query_embedding_cache = QueryEmbeddingCache()
+register_cache("query_embedding", query_embedding_cache.stats)
@@ -0,0 +1,136 @@
+"""
+Cross-encoder reranking for SecondBrain.
+Retrieval over-fetches candidates and a cross-encoder rescores each
+(question, chunk) pair jointly, which ranks better than bi-encoder cosine
+similarity. Scoring runs under a latency budget and falls back to the
+retrieval order when it is exceeded.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from monitoring.metrics import RERANK_FALLBACKS, STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+RERANK_ENABLED = os.environ.get("SECONDBRAIN_RERANK", "0") == "1"
+RERANK_MODEL_NAME = os.environ.get("SECONDBRAIN_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.environ.get("SECONDBRAIN_RERANK_CANDIDATES", "12"))
+RERANK_TOP_K = int(os.environ.get("SECONDBRAIN_RERANK_TOP_K", "3"))
+RERANK_BUDGET_MS = float(os.environ.get("SECONDBRAIN_RERANK_BUDGET_MS", "300"))
+
+class Reranker:
+    """
+    Lazily loaded CPU cross-encoder.
+
+    The model loads at startup warm-up or on first use, outside the latency
+    budget. If loading fails, reranking is switched off for the life of the
+    process instead of retrying on every query. Scoring runs on one dedicated
+    thread; a pass that overran its budget keeps that thread until it
+    finishes, and queries arriving meanwhile keep retrieval order rather than
+    queueing behind it.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._failed = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._scoring = None
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None and not self._failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+                    logger.info(f"Loaded reranker model {self.model_name}")
+                except Exception as e:
+                    self._failed = True
+                    logger.error(f"Error loading reranker model {self.model_name}, reranking disabled: {e}")
+            return self._model
+
+    @property
+    def available(self) -> bool:
+        return not self._failed
+
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def warmup(self):
+        """Load the model and run one forward pass so the first query's budget covers scoring only."""
+        # A model that fails to load only disables reranking, so it does not hold up readiness
+        if self._get_model() is not None:
+            self.score("warmup", ["warmup"])
+
+    def score(self, question: str, texts: List[str]) -> List[float]:
+        """Score every (question, text) pair in one batched forward pass."""
+        model = self._get_model()
+        if model is None:
+            raise RuntimeError("Reranker model is unavailable")
+        scores = model.predict([(question, text) for text in texts], batch_size=max(1, len(texts)),
+                               show_progress_bar=False)
+        return [float(score) for score in scores]
+
+    async def rerank(self, question: str, chunks: List[Tuple[dict, float]], top_k: int = RERANK_TOP_K,
+                     budget_ms: float = RERANK_BUDGET_MS) -> List[Tuple[dict, float]]:
+        """
+        Reorder retrieved chunks by cross-encoder score and keep the best top_k.
+        
+        Args:
+            question: The user's question
+            chunks: List of (chunk, similarity) in retrieval order
+            top_k: Number of chunks to keep
+            budget_ms: Time allowed for scoring before falling back to retrieval order
+            
+        Returns:
+            List of (chunk, similarity), best first
+        """
+        if len(chunks) <= 1 or not self.available:
+            return chunks[:top_k]
+
+        loop = asyncio.get_event_loop()
+        if self._model is None:
+            # Load outside the budget, which is meant for scoring; warm-up normally did this already
+            await loop.run_in_executor(None, self._get_model)
+            if self._model is None:
+                RERANK_FALLBACKS.labels("error").inc()
+                return chunks[:top_k]
+
+        if self._scoring is not None and not self._scoring.done():
+            # An earlier pass that overran its budget still holds the scoring thread
+            RERANK_FALLBACKS.labels("busy").inc()
+            logger.warning("Reranker is still busy with an earlier query, keeping retrieval order")
+            return chunks[:top_k]
+
+        texts = [chunk["text"] for chunk, _ in chunks]
+        try:
+            with STAGE_LATENCY.labels("rerank").time():
+                self._scoring = self._executor.submit(self.score, question, texts)
+                # Shielded so a timeout does not cancel the future that tracks the running thread
+                scores = await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(self._scoring)),
+                    timeout=budget_ms / 1000
+                )
+        except asyncio.TimeoutError:
+            # The scoring thread finishes in the background; until then queries skip reranking
+            RERANK_FALLBACKS.labels("timeout").inc()
+            logger.warning(f"Reranking exceeded its {budget_ms:.0f} ms budget, keeping retrieval order")
+            return chunks[:top_k]
+        except Exception as e:
+            RERANK_FALLBACKS.labels("error").inc()
+            logger.error(f"Error reranking chunks, keeping retrieval order: {e}")
+            return chunks[:top_k]
+
+        ranked = sorted(zip(chunks, scores), key=lambda item: item[1], reverse=True)
+        reranked = []
+        for (chunk, similarity), score in ranked[:top_k]:
+            reranked.append(({**chunk, "rerank_score": score}, similarity))
+        return reranked
+
+reranker = Reranker()
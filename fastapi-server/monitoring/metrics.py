@@ -0,0 +1,150 @@
+"""
+Prometheus metrics for SecondBrain.
+All pipeline metrics live in one registry, which backs both the /metrics
+endpoint and the live numbers reported by /status.
+"""
+
+import logging
+from typing import Any, Callable, Dict
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Query pipeline
+STAGE_LATENCY = Histogram(
+    "secondbrain_stage_latency_seconds",
+    "Latency of each query pipeline stage",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LLM_LATENCY = Histogram(
+    "secondbrain_llm_latency_seconds",
+    "Latency of LLM completions per provider and model",
+    ["provider", "model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+RERANK_FALLBACKS = Counter(
+    "secondbrain_rerank_fallbacks_total",
+    "Queries that kept retrieval order because reranking was unavailable or too slow",
+    ["reason"],
+)
+
+# Ingest pipeline
+INGEST_DOCUMENTS = Counter(
+    "secondbrain_ingest_documents_total",
+    "Ingested documents by outcome",
+    ["status"],
+)
+INGEST_CHUNKS = Counter(
+    "secondbrain_ingest_chunks_total",
+    "Chunks written to the vector store by ingest",
+)
+INGEST_CHUNKS_PER_SECOND = Gauge(
+    "secondbrain_ingest_chunks_per_second",
+    "Chunk throughput of the most recent ingest write",
+)
+INGEST_LATENCY = Histogram(
+    "secondbrain_ingest_latency_seconds",
+    "Time to embed and store one ingest write",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+EMBEDDING_BATCH_SIZES = Histogram(
+    "secondbrain_embedding_batch_size",
+    "Number of texts per model.encode call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+# Storage and queue
+QUEUE_DEPTH = Gauge(
+    "secondbrain_ingest_queue_depth",
+    "Ingest jobs queued or running",
+)
+COLLECTION_CHUNKS = Gauge(
+    "secondbrain_collection_chunks",
+    "Chunks stored in the vector store collection",
+)
+CHUNKS_DELETED = Counter(
+    "secondbrain_chunks_deleted_total",
+    "Chunks removed from the vector store by document delete or TTL expiry",
+    ["reason"],
+)
+
+def safe_gauge_function(fn: Callable[[], float]) -> Callable[[], float]:
+    """Wrap a gauge callback so a failing backend reports NaN instead of breaking the scrape."""
+    def wrapper():
+        try:
+            return fn()
+        except Exception as e:
+            logger.error(f"Error collecting metric: {e}")
+            return float("nan")
+    return wrapper
+
+class _CacheCollector:
+    """Exposes hit/miss counters and hit rates of registered caches."""
+
+    def __init__(self):
+        self._caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, name: str, stats_fn: Callable[[], Dict[str, Any]]):
+        self._caches[name] = stats_fn
+
+    def collect(self):
+        hits = CounterMetricFamily("secondbrain_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("secondbrain_cache_misses", "Cache misses", labels=["cache"])
+        hit_rate = GaugeMetricFamily("secondbrain_cache_hit_rate", "Cache hit rate", labels=["cache"])
+        for name, stats_fn in self._caches.items():
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                logger.error(f"Error collecting stats for cache {name}: {e}")
+                continue
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            hit_rate.add_metric([name], stats["hit_rate"])
+        yield hits
+        yield misses
+        yield hit_rate
+
+_cache_collector = _CacheCollector()
+REGISTRY.register(_cache_collector)
+
+def register_cache(name: str, stats_fn: Callable[[], Dict[str, Any]]):
+    """Report a cache's stats() (hits, misses, hit_rate) as metrics."""
+    _cache_collector.register(name, stats_fn)
+
+def _sample(name: str, labels: Dict[str, str] = None) -> float:
+    value = REGISTRY.get_sample_value(name, labels or {})
+    return value if value is not None else 0.0
+
+def _count(name: str):
+    value = _sample(name)
+    # Gauge callbacks report NaN when their backend is unavailable
+    return int(value) if value == value else None
+
+def status_snapshot() -> Dict[str, Any]:
+    """Live numbers for /status, read from the metrics registry."""
+    stages = {}
+    for metric in STAGE_LATENCY.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count"):
+                stage = sample.labels["stage"]
+                count = sample.value
+                total = _sample("secondbrain_stage_latency_seconds_sum", {"stage": stage})
+                stages[stage] = {"count": int(count), "mean_seconds": total / count if count else 0.0}
+
+    caches = {}
+    for metric in _cache_collector.collect():
+        if metric.name == "secondbrain_cache_hit_rate":
+            for sample in metric.samples:
+                caches[sample.labels["cache"]] = sample.value
+
+    return {
+        "total_chunks": _count("secondbrain_collection_chunks"),
+        "queue_depth": _count("secondbrain_ingest_queue_depth"),
+        "ingested_chunks": _count("secondbrain_ingest_chunks_total"),
+        "ingest_chunks_per_second": _sample("secondbrain_ingest_chunks_per_second"),
+        "stage_latency": stages,
+        "cache_hit_rates": caches,
+    }
@@ -8,6 +8,7 @@ The FastAPI server runs on port 8000 by default, while the Streamlit UI
 runs on port 8501.
 """
 
+import asyncio
 import logging
 import os
 import subprocess
@@ -22,9 +23,14 @@ from fastapi.responses import RedirectResponse
 
 # Import API routes - need to adjust the path for imports to work from root directory
 sys.path.append(os.path.join(os.path.dirname(__file__), 'fastapi-server'))
-from api.ingest import router as ingest_router
+from api.ingest import router as ingest_router, ingest_workers
 from api.query import router as query_router
 from api.status import router as status_router
+from api.metrics import router as metrics_router
+from api.ready import router as ready_router, mark_ready, warm_up
+from api.documents import router as documents_router, ttl_sweeper
+from api.llm_clients import llm_clients
+from models.embedding_model import shutdown_embedding_pool
 
 # Set up logging
 logging.basicConfig(
@@ -40,6 +46,10 @@ logger = logging.getLogger(__name__)
 # Global variable to store the Streamlit process
 streamlit_process = None
 
+# Load the embedding model and vector store in the background at startup instead of on the first request
+WARMUP_ENABLED = os.environ.get("SECONDBRAIN_WARMUP", "1") == "1"
+warmup_task = None
+
 def check_streamlit_installed():
     """Check if Streamlit is installed."""
     try:
@@ -68,6 +78,9 @@ app.add_middleware(
 app.include_router(ingest_router)
 app.include_router(query_router)
 app.include_router(status_router)
+app.include_router(metrics_router)
+app.include_router(ready_router)
+app.include_router(documents_router)
 
 # Root endpoint
 @app.get("/")
@@ -79,8 +92,15 @@ async def root():
         "status": "running",
         "endpoints": [
             "/ingest - Process and embed content",
+            "/ingest/bulk - Ingest newline-delimited JSON pages in pooled batches",
+            "/ingest/{job_id} - Get the status of an ingest job",
             "/query - Query the knowledge base",
+            "/query/stream - Query the knowledge base, streaming the answer over SSE",
             "/status - Get system status information",
+            "/metrics - Prometheus metrics",
+            "/ready - Readiness of each component (503 until warm)",
+            "/documents/{document_id} - Delete a stored document (DELETE), or by URL with /documents?url=",
+            "/documents/compact - Rebuild the vector store after heavy deletes",
             "/ui - Redirect to the Streamlit UI",
         ]
     }
@@ -161,12 +181,15 @@ def start_streamlit_server():
         
         threading.Thread(target=log_output, daemon=True).start()
         
-        # Check if process started successfully
-        time.sleep(2)
-        if streamlit_process.poll() is not None:
-            logger.error(f"Streamlit process failed to start with return code {streamlit_process.returncode}")
-        else:
-            logger.info("Streamlit server started successfully at http://localhost:8501")
+        # Check if process started successfully, without holding up API startup
+        def check_started(process):
+            try:
+                process.wait(timeout=2)
+                logger.error(f"Streamlit process failed to start with return code {process.returncode}")
+            except subprocess.TimeoutExpired:
+                logger.info("Streamlit server started successfully at http://localhost:8501")
+        
+        threading.Thread(target=check_started, args=(streamlit_process,), daemon=True).start()
     
     except Exception as e:
         logger.error(f"Failed to start Streamlit server: {str(e)}")
@@ -177,14 +200,27 @@ def start_streamlit_server():
 @app.on_event("startup")
 async def startup_event():
     """Initialize components on application startup."""
+    global warmup_task
     logger.info("Starting SecondBrain API")
+    started = time.perf_counter()
+    
+    # Start the ingest job workers (requeues jobs interrupted by a previous shutdown)
+    await ingest_workers.start()
+    mark_ready("job_workers", round(time.perf_counter() - started, 3))
+    
+    # Expire sources past their TTL, if any are configured
+    await ttl_sweeper.start()
+    
+    # Warm the model and vector store in the background while Streamlit starts
+    if WARMUP_ENABLED:
+        warmup_task = asyncio.get_event_loop().create_task(warm_up())
     
     # Start Streamlit server
     start_streamlit_server()
     
     # Print helpful message
     logger.info("==========================================================")
-    logger.info("SecondBrain is running!")
+    logger.info(f"SecondBrain is running! (startup took {time.perf_counter() - started:.2f}s, check /ready for warmup)")
     logger.info("API server is available at: http://localhost:8000")
     logger.info("Streamlit UI is available at: http://localhost:8501")
     logger.info("==========================================================")
@@ -195,6 +231,19 @@ async def shutdown_event():
     """Clean up resources on application shutdown."""
     logger.info("Shutting down SecondBrain API")
     
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    
+    # Stop the ingest job workers; unfinished jobs stay queued on disk
+    await ingest_workers.stop()
+    await ttl_sweeper.stop()
+    
+    # Close pooled LLM connections
+    await llm_clients.aclose()
+    
+    # Stop the embedding worker processes, if any were started
+    shutdown_embedding_pool()
+    
     # Terminate Streamlit process if it's running
     global streamlit_process
     if streamlit_process and streamlit_process.poll() is None:
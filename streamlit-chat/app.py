@@ -1,3 +1,5 @@
+import json
+import re
 import streamlit as st
 import requests
 
@@ -238,6 +240,27 @@ def render_sidebar():
             st.session_state.chat_history = []
             st.rerun()
 
+# Parse a Server-Sent Events response into (event, data) pairs
+def iter_sse_events(response):
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            # A blank line ends the event
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+# Split a completion into (reasoning, answer) the same way the server does for <think> tags
+def split_reasoning(text):
+    match = re.search(r"<think>(.*?)(?:</think>|$)(.*)", text, re.DOTALL)
+    if not match:
+        return "", text.strip()
+    return match.group(1).strip(), match.group(2).strip()
+
 # Process user message and get response
 def process_message(question):
     # Create a loading placeholder
@@ -283,30 +306,61 @@ def process_message(question):
                 # Use default URL for backend
                 base_url = "http://localhost:8000"
             
-            status.update(label="Getting answer...")
+            status.update(label="Searching knowledge base...")
             
-            # Send request to backend using the appropriate URL
+            # Stream the answer from the backend using the appropriate URL
             response = requests.post(
-                f"{base_url}/query", 
+                f"{base_url}/query/stream", 
                 json=payload,
-                timeout=60
+                stream=True,
+                timeout=(10, 60)
             )
             
             if response.ok:
-                data = response.json()
-                answer = data.get("answer", "")
-                reasoning = data.get("reasoning", "")
-                source_urls = data.get("source_urls", [])
+                answer_placeholder = st.empty()
+                streamed_text = ""
+                thinking = False
+                final = None
+                error_detail = None
                 
-                # Add response to chat history with reasoning
-                st.session_state.chat_history.append({
-                    "role": "assistant", 
-                    "content": answer,
-                    "reasoning": reasoning,
-                    "sources": source_urls
-                })
+                for event, data in iter_sse_events(response):
+                    if event == "sources":
+                        status.update(label="Generating answer...")
+                    elif event == "token":
+                        streamed_text += data.get("text", "")
+                        # Keep reasoning out of the answer, including an open <think> block
+                        _, answer = split_reasoning(streamed_text)
+                        if "<think>".startswith(answer):
+                            # Nothing yet, or the start of a <think> tag still arriving
+                            answer = ""
+                        if thinking != (not answer):
+                            thinking = not answer
+                            status.update(label="Thinking..." if thinking else "Generating answer...")
+                        answer_placeholder.markdown(answer)
+                    elif event == "final":
+                        final = data
+                    elif event == "error":
+                        error_detail = data.get("detail", "Unknown error")
                 
-                status.update(label="Done", state="complete", expanded=False)
+                if final is not None:
+                    # Add response to chat history with reasoning
+                    st.session_state.chat_history.append({
+                        "role": "assistant", 
+                        "content": final.get("answer", ""),
+                        "reasoning": final.get("reasoning", ""),
+                        "sources": final.get("source_urls", [])
+                    })
+                    
+                    status.update(label="Done", state="complete", expanded=False)
+                else:
+                    error_msg = error_detail or "The response stream ended unexpectedly"
+                    
+                    # Add error to chat history
+                    st.session_state.chat_history.append({
+                        "role": "assistant", 
+                        "content": f"⚠️ I encountered an error: {error_msg}",
+                        "sources": []
+                    })
                 
             else:
                 error_msg = f"Server error: {response.status_code} - {response.text}"
@@ -0,0 +1,77 @@
+"""
+Shared fixtures for the SecondBrain server tests.
+
+The tests run offline: every store lives in a scratch directory and the
+embedding model is replaced by a deterministic stub backend.
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "fastapi-server"))
+
+# Module-level settings are read at import time, so point them at scratch paths first
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="secondbrain-test-")
+os.environ.setdefault("SECONDBRAIN_VECTOR_STORE", "numpy")
+os.environ.setdefault("SECONDBRAIN_VECTOR_STORE_PATH", os.path.join(_SCRATCH_DIR, "vector_store"))
+os.environ.setdefault("SECONDBRAIN_KEYWORD_INDEX_PATH", os.path.join(_SCRATCH_DIR, "keyword_index.sqlite3"))
+os.environ.setdefault("SECONDBRAIN_JOB_QUEUE_PATH", os.path.join(_SCRATCH_DIR, "job_queue.sqlite3"))
+os.environ.setdefault("SECONDBRAIN_EMBEDDING_CACHE_DIR", os.path.join(_SCRATCH_DIR, "embedding_cache"))
+os.environ.setdefault("SECONDBRAIN_SNAPSHOT_DIR", os.path.join(_SCRATCH_DIR, "snapshots"))
+os.environ.setdefault("SECONDBRAIN_EMBEDDING_PROCESSES", "0")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+STUB_DIM = 32
+
+def stub_vector(text: str) -> np.ndarray:
+    """Deterministic unit vector for a text: a hashed bag of words, so shared words mean similar vectors."""
+    vector = np.zeros(STUB_DIM, dtype=np.float32)
+    for word in text.lower().split():
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        vector[int.from_bytes(digest[:4], "little") % STUB_DIM] += 1.0
+    if not vector.any():
+        vector[0] = 1.0
+    return vector / np.linalg.norm(vector)
+
+class StubBackend:
+    """Embedding backend with the interface of models.embedding_backends, without a model."""
+    name = "stub"
+    tokenizer = None
+    max_seq_length = 256
+
+    def encode(self, texts, batch_size: int = 32):
+        return np.stack([stub_vector(text) for text in texts]) if texts else np.zeros((0, STUB_DIM), dtype=np.float32)
+
+@pytest.fixture
+def stub_embeddings(tmp_path, monkeypatch):
+    """Replace the embedding model with StubBackend and an empty cache in a scratch directory."""
+    from models import embedding_model
+    from models.disk_cache import DiskEmbeddingCache
+
+    monkeypatch.setattr(embedding_model, "_model", object())
+    monkeypatch.setattr(embedding_model, "_backend", StubBackend())
+    monkeypatch.setattr(embedding_model, "_embedding_cache", DiskEmbeddingCache("stub", str(tmp_path / "embedding_cache")))
+    return StubBackend()
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    """An empty NumPy vector store and keyword index in a scratch directory, installed as the server's store."""
+    from db import vector_db
+    from db.keyword_index import KeywordIndex
+    from db.numpy_store import NumpyVectorStore
+
+    index = KeywordIndex(str(tmp_path / "keyword_index.sqlite3"))
+    store = NumpyVectorStore(str(tmp_path / "vector_store"), "test")
+    monkeypatch.setattr(vector_db, "keyword_index", index)
+    monkeypatch.setattr(vector_db, "store", store)
+    return store
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SCRATCH_DIR, ignore_errors=True)
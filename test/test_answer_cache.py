@@ -0,0 +1,48 @@
+import asyncio
+
+from conftest import stub_vector
+from api import ingest
+from api.answer_cache import SemanticAnswerCache
+from api.ingest import WebpageContent, process_content_async
+
+QUESTION = "how do heat pumps work in winter"
+
+def cache_with_answer(rank_floor: float = 0.5) -> SemanticAnswerCache:
+    cache = SemanticAnswerCache(max_size=10, max_distance=0.05, ttl_seconds=60)
+    cache.put("ollama/llama3", stub_vector(QUESTION), ["a", "b"], rank_floor, {"answer": "cached"})
+    return cache
+
+def test_hit_needs_same_model_and_chunks():
+    cache = cache_with_answer()
+
+    assert cache.get("ollama/llama3", stub_vector(QUESTION), ["b", "a"]) == {"answer": "cached"}
+    assert cache.get("openai/gpt-4o", stub_vector(QUESTION), ["a", "b"]) is None
+    assert cache.get("ollama/llama3", stub_vector(QUESTION), ["a", "b", "c"]) is None
+    assert cache.get("ollama/llama3", stub_vector("bread baking at home"), ["a", "b"]) is None
+
+def test_new_chunk_that_would_rank_evicts_the_answer():
+    cache = cache_with_answer(rank_floor=0.5)
+
+    assert cache.invalidate_for_embeddings([stub_vector("sourdough starter feeding schedule")]) == 0
+    assert cache.get("ollama/llama3", stub_vector(QUESTION), ["a", "b"]) is not None
+
+    assert cache.invalidate_for_embeddings([stub_vector("how heat pumps work in winter weather")]) == 1
+    assert cache.get("ollama/llama3", stub_vector(QUESTION), ["a", "b"]) is None
+    assert cache.invalidations == 1
+
+def test_deleting_a_source_chunk_evicts_the_answer():
+    cache = cache_with_answer()
+
+    assert cache.invalidate_for_chunks(["c"]) == 0
+    assert cache.invalidate_for_chunks(["b"]) == 1
+    assert cache.stats()["size"] == 0
+
+def test_ingest_invalidates_answers_the_new_page_would_change(stub_embeddings, vector_store, monkeypatch):
+    cache = cache_with_answer(rank_floor=0.5)
+    monkeypatch.setattr(ingest, "answer_cache", cache)
+
+    page = WebpageContent(url="https://example.com/heat-pumps", title="Heat pumps",
+                          textContent="How heat pumps work in winter.", timestamp="2026-01-01T00:00:00Z")
+    asyncio.run(process_content_async(page))
+
+    assert cache.stats()["size"] == 0 and cache.invalidations == 1
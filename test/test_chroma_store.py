@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+
+from db.vector_db import distance_to_similarity
+from db.vector_stores import ChromaVectorStore
+
+HNSW = {"space": "cosine", "max_neighbors": 16, "ef_construction": 100, "ef_search": 100}
+
+def fill(collection, start: int, count: int):
+    rng = np.random.default_rng(start)
+    ids = [f"id-{i}" for i in range(start, start + count)]
+    collection.add(ids=ids, embeddings=rng.standard_normal((count, 8)).astype(np.float32),
+                   documents=[f"text {i}" for i in range(start, start + count)],
+                   metadatas=[{"n": i} for i in range(start, start + count)])
+
+def reopen(path, hnsw=HNSW) -> ChromaVectorStore:
+    from chromadb.api.client import SharedSystemClient
+    SharedSystemClient.clear_system_cache()
+    return ChromaVectorStore(str(path), "docs", hnsw)
+
+def unit_vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, 8)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def similarities(store: ChromaVectorStore, vectors: np.ndarray, query: np.ndarray) -> list:
+    """Nearest-first similarities from the store, converted from its distance space."""
+    result = store.query([query.tolist()], n_results=len(vectors), include=["distances"])
+    return [distance_to_similarity(distance, store.space) for distance in result["distances"][0]]
+
+def test_compaction_keeps_the_collection(tmp_path):
+    store = ChromaVectorStore(str(tmp_path), "docs", HNSW)
+    fill(store.collection, 0, 20)
+    store.delete([f"id-{i}" for i in range(5)])
+    store.compact()
+    assert store.count() == 15
+    assert reopen(tmp_path).count() == 15
+
+def test_copy_left_alone_by_a_crash_takes_over_the_name(tmp_path):
+    store = ChromaVectorStore(str(tmp_path), "docs", HNSW)
+    fill(store.collection, 0, 20)
+    # Crash between dropping the original and renaming the copy
+    copy = store.client.create_collection("docs_compacting", configuration={"hnsw": HNSW})
+    page = store.collection.get(include=["embeddings", "documents", "metadatas"])
+    copy.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"], metadatas=page["metadatas"])
+    store.client.delete_collection("docs")
+
+    reopened = reopen(tmp_path)
+    assert reopened.count() == 20
+    assert reopened._get_collection("docs_compacting") is None
+
+def test_leftover_copy_is_merged_before_it_is_dropped(tmp_path):
+    store = ChromaVectorStore(str(tmp_path), "docs", HNSW)
+    fill(store.collection, 0, 10)
+    # The copy holds chunks the collection lacks, as after a restart that created an empty one
+    copy = store.client.create_collection("docs_compacting", configuration={"hnsw": HNSW})
+    fill(copy, 5, 10)
+
+    store.compact()
+    assert sorted(store.get(include=[])["ids"], key=lambda chunk_id: int(chunk_id[3:])) == \
+        [f"id-{i}" for i in range(15)]
+    assert store._get_collection("docs_compacting") is None
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_query_distances_convert_to_cosine_similarity(tmp_path, space):
+    store = ChromaVectorStore(str(tmp_path), "docs", {**HNSW, "space": space})
+    vectors = unit_vectors(10)
+    store.add(ids=[f"id-{i}" for i in range(10)], embeddings=vectors.tolist(),
+              documents=[f"text {i}" for i in range(10)], metadatas=[{"n": i} for i in range(10)])
+
+    expected = sorted((vectors @ vectors[0]).tolist(), reverse=True)
+    assert store.space == space
+    assert similarities(store, vectors, vectors[0]) == pytest.approx(expected, abs=1e-5)
+
+def test_migrate_rebuilds_an_l2_collection_as_cosine(tmp_path):
+    store = ChromaVectorStore(str(tmp_path), "docs", {**HNSW, "space": "l2"})
+    vectors = unit_vectors(30)
+    store.add(ids=[f"id-{i}" for i in range(30)], embeddings=vectors.tolist(),
+              documents=[f"text {i}" for i in range(30)], metadatas=[{"n": i} for i in range(30)])
+    before = similarities(store, vectors, vectors[3])
+
+    # Reopening with new settings keeps the old space until migrate()
+    store = reopen(tmp_path)
+    assert store.space == "l2"
+    report = store.migrate()
+
+    assert report["migrated"] is True
+    assert report["hnsw_before"]["space"] == "l2" and report["hnsw"]["space"] == "cosine"
+    assert store.count() == 30 and reopen(tmp_path).space == "cosine"
+    assert similarities(store, vectors, vectors[3]) == pytest.approx(before, abs=1e-5)
+    assert store.get(ids=["id-7"], include=["metadatas"])["metadatas"] == [{"n": 7}]
+    assert store.migrate()["migrated"] is False
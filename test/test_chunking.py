@@ -0,0 +1,90 @@
+import re
+
+from api.ingest import chunk_text, iter_sentences
+
+class PieceTokenizer:
+    """Fake subword tokenizer: every word is cut into pieces of up to 3 characters, with offsets."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _offsets(self, text):
+        return [(match.start() + i, min(match.start() + i + 3, match.end()))
+                for match in re.finditer(r"\S+", text) for i in range(0, len(match.group(0)), 3)]
+
+    def __call__(self, texts, add_special_tokens=True, return_offsets_mapping=False):
+        self.calls += 1
+        if isinstance(texts, str):
+            offsets = self._offsets(texts)
+            encoded = {"input_ids": list(range(len(offsets)))}
+            if return_offsets_mapping:
+                encoded["offset_mapping"] = offsets
+            return encoded
+        return {"input_ids": [list(range(len(self._offsets(text)))) for text in texts]}
+
+def test_splits_on_end_punctuation_and_line_breaks():
+    text = "First sentence. Second one! Third?\nFourth line"
+    assert list(iter_sentences(text)) == ["First sentence.", "Second one!", "Third?", "Fourth line"]
+
+def test_keeps_closing_quotes_with_their_sentence():
+    text = 'She said "Stop here." Then she left. \'Really?\' Yes.'
+    assert list(iter_sentences(text)) == ['She said "Stop here."', "Then she left.", "'Really?'", "Yes."]
+
+def test_keeps_closing_brackets_with_their_sentence():
+    text = "Results improved (see Table 2.) Next we tested [as planned.] The end."
+    assert list(iter_sentences(text)) == ["Results improved (see Table 2.)", "Next we tested [as planned.]", "The end."]
+
+def test_abbreviations_do_not_end_a_sentence():
+    text = "Ask Dr. Smith about it, e.g. Tuesday. Then decide."
+    assert list(iter_sentences(text)) == ["Ask Dr. Smith about it, e.g. Tuesday.", "Then decide."]
+
+def test_words_that_double_as_abbreviations_end_a_sentence():
+    assert list(iter_sentences("I said no. Then I left.")) == ["I said no.", "Then I left."]
+    assert list(iter_sentences("Turn onto Main st. Then left.")) == ["Turn onto Main st.", "Then left."]
+    assert list(iter_sentences("Acme & Co. The rest.")) == ["Acme & Co.", "The rest."]
+    assert list(iter_sentences("See No. 5 in St. Louis. Done.")) == ["See No. 5 in St. Louis.", "Done."]
+
+def test_chunks_fit_the_size_and_cover_the_text(stub_embeddings):
+    sentences = [f"Sentence {i} has a few words in it." for i in range(100)]
+    chunks = list(chunk_text(" ".join(sentences), chunk_size=40, chunk_overlap=10))
+
+    # Without a tokenizer an 8-word sentence counts as 11 tokens, so at most 3 fit in 40
+    assert all(1 <= chunk.count("Sentence ") <= 3 for chunk in chunks)
+    assert chunks[0].startswith("Sentence 0 ") and chunks[-1].endswith("Sentence 99 has a few words in it.")
+    assert all(sentence in " ".join(chunks) for sentence in sentences)
+
+def test_overlap_repeats_trailing_sentences(stub_embeddings):
+    sentences = [f"Sentence {i} has a few words in it." for i in range(20)]
+    chunks = list(chunk_text(" ".join(sentences), chunk_size=40, chunk_overlap=12))
+    first_last = chunks[0].split(". ")[-1]
+    assert chunks[1].startswith(first_last.rstrip("."))
+
+def test_oversized_sentence_is_split_into_windows(stub_embeddings):
+    sentence = " ".join(f"word{i}" for i in range(200))
+    chunks = list(chunk_text(sentence, chunk_size=40, chunk_overlap=8))
+    assert len(chunks) > 1
+    assert chunks[0].split()[0] == "word0" and chunks[-1].split()[-1] == "word199"
+
+def test_tokenizer_counts_size_the_chunks():
+    tokenizer = PieceTokenizer()
+    # "Sentence" is 3 pieces, so each sentence is 12 tokens but only 8 words
+    sentences = [f"Sentence {i} has a few words in it." for i in range(30)]
+
+    chunks = list(chunk_text(" ".join(sentences), chunk_size=40, chunk_overlap=0, tokenizer=tokenizer))
+
+    assert all(len(tokenizer(chunk)["input_ids"]) <= 40 for chunk in chunks)
+    assert [chunk.count("Sentence ") for chunk in chunks] == [3] * 10
+    # Sentences are tokenized in blocks, not one call each
+    assert tokenizer.calls < len(sentences)
+
+def test_oversized_sentence_is_cut_on_token_offsets():
+    tokenizer = PieceTokenizer()
+    sentence = " ".join(f"alphabet{i:03d}" for i in range(30))  # 4 pieces per word, 120 tokens
+
+    chunks = list(chunk_text(sentence, chunk_size=40, chunk_overlap=8, tokenizer=tokenizer))
+
+    # Windows of 40 tokens starting every 32: 10 words each, overlapping by 2 words
+    assert chunks[0] == " ".join(f"alphabet{i:03d}" for i in range(10))
+    assert chunks[1].startswith("alphabet008 ")
+    assert chunks[-1].endswith("alphabet029")
+    assert all(len(tokenizer(chunk)["input_ids"]) <= 40 for chunk in chunks)
@@ -0,0 +1,49 @@
+from api.context_packer import SECTION_SEPARATOR, estimate_tokens, merge_overlap, pack_context
+
+def chunk(document_id: str, index: int, text: str, url: str = "https://example.com/a"):
+    return {
+        "id": f"{document_id}-{index}",
+        "text": text,
+        "metadata": {"document_id": document_id, "chunk_index": index, "title": "Page", "source_url": url},
+    }
+
+def test_estimate_counts_dense_text_per_character():
+    prose = "the quick brown fox jumps over the lazy dog"
+    assert estimate_tokens(prose) == 12
+    # Hex digits and URL punctuation cost a token each rather than a third of one
+    assert estimate_tokens("0123456789") == 10
+    assert estimate_tokens("a/b.c") == 1 + 2
+    assert estimate_tokens("") == 0
+
+def test_merge_overlap_drops_repeated_span():
+    assert merge_overlap("alpha beta gamma delta", "gamma delta epsilon") == "alpha beta gamma delta epsilon"
+    assert merge_overlap("alpha beta", "unrelated text") == "alpha beta unrelated text"
+
+def test_adjacent_chunks_are_merged_into_one_passage():
+    chunks = [(chunk("d", 0, "one two three four five six"), 0.9), (chunk("d", 1, "four five six seven eight"), 0.8)]
+    context, used_ids = pack_context(chunks, 1000)
+    assert context.count("Source ") == 1
+    assert "one two three four five six seven eight" in context
+    assert used_ids == ["d-0", "d-1"]
+
+def test_packing_stops_at_the_budget_and_reports_used_chunks():
+    chunks = [(chunk(f"d{i}", 0, f"passage {i} " + "word " * 100, url=f"https://example.com/{i}"), 1 - i / 10)
+              for i in range(5)]
+    context, used_ids = pack_context(chunks, 400)
+
+    assert estimate_tokens(context) <= 400
+    assert used_ids == [f"d{i}-0" for i in range(len(context.split(SECTION_SEPARATOR)))]
+    assert len(used_ids) < 5
+    for i in range(5):
+        assert (f"https://example.com/{i}" in context) == (f"d{i}-0" in used_ids)
+
+def test_build_prompt_returns_only_packed_chunks():
+    from api.query import build_prompt, get_source_urls
+
+    chunks = [(chunk(f"d{i}", 0, "word " * 200, url=f"https://example.com/{i}"), 1 - i / 10) for i in range(4)]
+    prompt, used_chunks = build_prompt("What is it?", chunks, 500)
+    source_urls = get_source_urls(used_chunks)
+
+    assert 0 < len(used_chunks) < len(chunks)
+    assert all(url in prompt for url in source_urls)
+    assert "https://example.com/3" not in source_urls
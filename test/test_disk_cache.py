@@ -0,0 +1,66 @@
+import numpy as np
+
+from models.disk_cache import _KEY_BYTES, DiskEmbeddingCache
+
+DIM = 8
+ROW_BYTES = DIM * 4 + _KEY_BYTES
+
+def vector_for(i: int) -> np.ndarray:
+    return np.full(DIM, i, dtype=np.float32)
+
+def texts_with_trailing_nul(cache: DiskEmbeddingCache, count: int):
+    """Texts whose digest ends in a NUL byte, the case an "S" dtype key read would corrupt."""
+    found, i = [], 0
+    while len(found) < count:
+        text = f"nul-{i}"
+        if cache._key(text).endswith(b"\0"):
+            found.append(text)
+        i += 1
+    return found
+
+def test_round_trip_survives_reopen(tmp_path):
+    cache = DiskEmbeddingCache("stub", str(tmp_path), max_mb=1)
+    cache.put_many(["a", "b"], [vector_for(1), vector_for(2)])
+    assert cache.get_many(["a", "c"])[1] is None
+
+    reopened = DiskEmbeddingCache("stub", str(tmp_path), max_mb=1)
+    hits = reopened.get_many(["a", "b"])
+    assert np.array_equal(hits[0], vector_for(1))
+    assert np.array_equal(hits[1], vector_for(2))
+
+def test_compaction_keeps_every_surviving_key(tmp_path):
+    max_rows = 50
+    max_mb = max_rows * ROW_BYTES / (1024 * 1024)
+    cache = DiskEmbeddingCache("stub", str(tmp_path), max_mb=max_mb)
+    nul_texts = texts_with_trailing_nul(cache, 3)
+
+    # Three rounds past capacity compact the cache at least twice, with NUL-ending keys
+    # written in each round so they are rewritten by the later compactions
+    texts = []
+    for round_number in range(3):
+        batch = [f"text-{round_number}-{i}" for i in range(40)] + [nul_texts[round_number]]
+        cache.put_many(batch, [vector_for(len(texts) + i) for i in range(len(batch))])
+        texts.extend(batch)
+    assert len(cache._index) < len(texts)
+
+    expected = {text: vector_for(i) for i, text in enumerate(texts)}
+    survivors = [text for text in texts if cache._key(text) in cache._index]
+    assert nul_texts[-1] in survivors
+
+    for reader in (cache, DiskEmbeddingCache("stub", str(tmp_path), max_mb=max_mb)):
+        hits = reader.get_many(survivors)
+        for text, hit in zip(survivors, hits):
+            assert hit is not None, text
+            assert np.array_equal(hit, expected[text])
+
+    assert (tmp_path / "stub" / "keys.bin").stat().st_size == len(survivors) * _KEY_BYTES
+
+def test_torn_append_is_truncated_on_load(tmp_path):
+    cache = DiskEmbeddingCache("stub", str(tmp_path), max_mb=1)
+    cache.put_many(["a", "b"], [vector_for(1), vector_for(2)])
+    with open(tmp_path / "stub" / "keys.bin", "ab") as f:
+        f.write(b"\1" * (_KEY_BYTES + 3))
+
+    reopened = DiskEmbeddingCache("stub", str(tmp_path), max_mb=1)
+    assert all(hit is not None for hit in reopened.get_many(["a", "b"]))
+    assert (tmp_path / "stub" / "keys.bin").stat().st_size == 2 * _KEY_BYTES
@@ -0,0 +1,134 @@
+import types
+
+import numpy as np
+import pytest
+
+from models.embedding_backends import EmbeddingBackend, OnnxBackend, TorchBackend, create_backend
+
+HIDDEN_DIM = 3
+
+class StubTokenizer:
+    """Tokenizes on whitespace; a word's id is its length and 0 is padding."""
+
+    def __call__(self, texts, padding=True, truncation=True, max_length=None, return_tensors=None):
+        ids = [[len(word) for word in text.split()][:max_length] for text in texts]
+        width = max(len(row) for row in ids)
+        return {
+            "input_ids": np.array([row + [0] * (width - len(row)) for row in ids]),
+            "attention_mask": np.array([[1] * len(row) + [0] * (width - len(row)) for row in ids]),
+        }
+
+class Pooling:
+    def __init__(self, config):
+        self.config = config
+
+    def get_config_dict(self):
+        return self.config
+
+class Normalize:
+    pass
+
+class StubSentenceTransformer(list):
+    """The parts of a SentenceTransformer the backends use: its modules, tokenizer and encode()."""
+
+    tokenizer = StubTokenizer()
+    max_seq_length = 8
+
+    def get_sentence_embedding_dimension(self):
+        return HIDDEN_DIM
+
+    def encode(self, texts, batch_size=32, show_progress_bar=True):
+        return np.ones((len(texts), HIDDEN_DIM), dtype=np.float32)
+
+class FakeSession:
+    """
+    Stands in for an ONNX Runtime session. The hidden state of token t is
+    [id, t + 1, 1], so each pooling mode gives a distinct, predictable vector.
+    """
+
+    feeds = []
+
+    def __init__(self, path, options=None, providers=None):
+        self.path = path
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name=name) for name in ("input_ids", "attention_mask", "token_type_ids")]
+
+    def run(self, output_names, feeds):
+        FakeSession.feeds.append(feeds)
+        ids = feeds["input_ids"].astype(np.float32)
+        positions = np.broadcast_to(np.arange(1, ids.shape[1] + 1, dtype=np.float32), ids.shape)
+        return [np.stack([ids, positions, np.ones_like(ids)], axis=-1)]
+
+@pytest.fixture
+def onnx_backend(tmp_path, monkeypatch):
+    """Build "onnx" backends through create_backend without exporting a model."""
+    onnxruntime = pytest.importorskip("onnxruntime")
+    FakeSession.feeds = []
+    monkeypatch.setattr(onnxruntime, "InferenceSession", FakeSession)
+    monkeypatch.setattr(OnnxBackend, "_export", lambda self: str(tmp_path / "model.onnx"))
+
+    def build(pooling_config, normalize=False):
+        st_model = StubSentenceTransformer([object(), Pooling(pooling_config)] + ([Normalize()] if normalize else []))
+        return create_backend("onnx", st_model, "stub/model")
+    return build
+
+def test_base_backend_is_abstract():
+    with pytest.raises(TypeError):
+        EmbeddingBackend(StubSentenceTransformer())
+
+def test_create_backend_torch():
+    backend = create_backend("torch", StubSentenceTransformer(), "stub/model")
+
+    assert isinstance(backend, TorchBackend)
+    assert backend.name == "torch"
+    assert backend.max_seq_length == 8
+    assert backend.encode(["a", "b"]).shape == (2, HIDDEN_DIM)
+
+def test_create_backend_rejects_unknown_name():
+    with pytest.raises(ValueError, match="tensorrt"):
+        create_backend("tensorrt", StubSentenceTransformer(), "stub/model")
+
+@pytest.mark.parametrize("config, mode, expected", [
+    ({}, "mean", [[3.0, 1.0, 1.0], [3.0, 1.5, 1.0]]),
+    ({"pooling_mode_mean_tokens": True}, "mean", [[3.0, 1.0, 1.0], [3.0, 1.5, 1.0]]),
+    ({"pooling_mode_cls_token": True}, "cls", [[3.0, 1.0, 1.0], [2.0, 1.0, 1.0]]),
+    ({"pooling_mode_max_tokens": True}, "max", [[3.0, 1.0, 1.0], [4.0, 2.0, 1.0]]),
+    ({"pooling_mode": "max"}, "max", [[3.0, 1.0, 1.0], [4.0, 2.0, 1.0]]),
+])
+def test_onnx_pooling_modes(onnx_backend, config, mode, expected):
+    backend = onnx_backend(config)
+
+    # "xyz" is padded to the length of "ab cdef"; padding must not reach any pooling mode
+    embeddings = backend.encode(["xyz", "ab cdef"], batch_size=2)
+
+    assert backend.name == "onnx"
+    assert backend.pooling_mode == mode
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(embeddings, expected)
+    assert set(FakeSession.feeds[0]) == {"input_ids", "attention_mask", "token_type_ids"}
+
+def test_onnx_encode_keeps_input_order_across_batches(onnx_backend):
+    backend = onnx_backend({})
+    texts = ["a", "abc de fghi", "ab", "abcd efg"]
+
+    embeddings = backend.encode(texts, batch_size=2)
+
+    np.testing.assert_allclose(embeddings[:, 0], [1.0, 3.0, 2.0, 3.5])
+    assert backend.encode([]).shape == (0, HIDDEN_DIM)
+
+def test_onnx_normalizes_when_the_model_does(onnx_backend):
+    embeddings = onnx_backend({}, normalize=True).encode(["ab cdef", "xyz"])
+
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-6)
+    np.testing.assert_allclose(embeddings[0], np.array([3.0, 1.5, 1.0]) / np.linalg.norm([3.0, 1.5, 1.0]), rtol=1e-6)
+
+def test_onnx_int8_quantizes_the_export(onnx_backend, monkeypatch):
+    quantized = []
+    monkeypatch.setattr(OnnxBackend, "_quantize", lambda self, path: quantized.append(path) or path + ".int8")
+    st_model = StubSentenceTransformer([object(), Pooling({})])
+
+    backend = create_backend("onnx-int8", st_model, "stub/model")
+
+    assert backend.name == "onnx-int8"
+    assert len(quantized) == 1 and backend.session.path == quantized[0] + ".int8"
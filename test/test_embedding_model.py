@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+
+from conftest import StubBackend, stub_vector
+from models.embedding_model import EmbeddingBatcher, create_embeddings_batch
+
+class CountingBackend(StubBackend):
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size: int = 32):
+        self.calls.append(list(texts))
+        return super().encode(texts, batch_size)
+
+def install_counting_backend(monkeypatch) -> CountingBackend:
+    from models import embedding_model
+
+    backend = CountingBackend()
+    monkeypatch.setattr(embedding_model, "_backend", backend)
+    return backend
+
+def test_batch_is_encoded_in_one_call_in_input_order(stub_embeddings, monkeypatch):
+    backend = install_counting_backend(monkeypatch)
+    texts = [f"chunk number {i} about topic {i % 3}" for i in range(10)]
+
+    embeddings = asyncio.run(create_embeddings_batch(texts))
+
+    assert backend.calls == [texts]
+    for text, embedding in zip(texts, embeddings):
+        np.testing.assert_allclose(embedding, stub_vector(text), atol=1e-6)
+
+def test_batch_only_encodes_texts_missing_from_the_cache(stub_embeddings, monkeypatch):
+    backend = install_counting_backend(monkeypatch)
+    asyncio.run(create_embeddings_batch(["cached one", "cached two"]))
+
+    embeddings = asyncio.run(create_embeddings_batch(["cached two", "new text", "cached one"]))
+
+    assert backend.calls[1:] == [["new text"]]
+    np.testing.assert_allclose(embeddings[0], stub_vector("cached two"), atol=1e-6)
+    np.testing.assert_allclose(embeddings[1], stub_vector("new text"), atol=1e-6)
+    assert asyncio.run(create_embeddings_batch([])) == []
+
+class RecordingEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if any(text.startswith("fail") for text in texts):
+            raise RuntimeError("encode failed")
+        return [stub_vector(text) for text in texts]
+
+def test_batcher_flushes_at_max_batch_size():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=4, max_wait_ms=200)
+    texts = [f"text {i}" for i in range(10)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(text) for text in texts))
+    vectors = asyncio.run(run())
+
+    assert [len(batch) for batch in encoder.batches] == [4, 4, 2]
+    assert sum(encoder.batches, []) == texts
+    for text, vector in zip(texts, vectors):
+        np.testing.assert_allclose(vector, stub_vector(text))
+
+def test_batcher_flushes_after_max_wait():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=100, max_wait_ms=100)
+
+    async def embed_later(text, delay):
+        await asyncio.sleep(delay)
+        return await batcher.embed(text)
+
+    async def run():
+        return await asyncio.gather(embed_later("first", 0), embed_later("joins first", 0.01),
+                                    embed_later("after the flush", 0.4))
+    asyncio.run(run())
+
+    assert encoder.batches == [["first", "joins first"], ["after the flush"]]
+
+def test_batcher_fails_only_the_failing_batch():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=2, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(batcher.embed("fail me"), batcher.embed("same batch"), batcher.embed("next batch"),
+                                    return_exceptions=True)
+    failed, same_batch, next_batch = asyncio.run(run())
+
+    assert isinstance(failed, RuntimeError) and isinstance(same_batch, RuntimeError)
+    np.testing.assert_allclose(next_batch, stub_vector("next batch"))
+    assert batcher.batches == 1 and batcher.items == 1
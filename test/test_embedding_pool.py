@@ -0,0 +1,53 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from conftest import STUB_DIM, StubBackend
+from models import embedding_pool
+
+class SlowOrFailingBackend(StubBackend):
+    def encode(self, texts, batch_size: int = 32):
+        if texts[0].startswith("fail"):
+            raise RuntimeError("encode failed")
+        time.sleep(0.2)
+        return super().encode(texts, batch_size)
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    """An EmbeddingProcessPool running its worker function on threads, recording each slice's outcome."""
+    outcomes = []
+    encode_into = embedding_pool._encode_into
+
+    def recording_encode_into(*args):
+        try:
+            outcomes.append(encode_into(*args))
+        except Exception as e:
+            outcomes.append(e)
+            raise
+
+    monkeypatch.setattr(embedding_pool, "_worker_backend", SlowOrFailingBackend())
+    monkeypatch.setattr(embedding_pool, "_encode_into", recording_encode_into)
+    pool = embedding_pool.EmbeddingProcessPool(2, "stub", "stub")
+    pool._executor = ThreadPoolExecutor(2)
+    pool._dim = STUB_DIM
+    yield pool, outcomes
+    pool.shutdown()
+
+def test_encode_writes_every_slice(thread_pool):
+    pool, outcomes = thread_pool
+    texts = [f"text {i}" for i in range(5)]
+    vectors = asyncio.run(pool.encode(texts, batch_size=1))
+    assert vectors.shape == (5, STUB_DIM)
+    assert np.allclose(vectors, StubBackend().encode(texts))
+
+def test_failed_slice_waits_for_the_others_before_freeing_memory(thread_pool):
+    pool, outcomes = thread_pool
+    with pytest.raises(RuntimeError, match="encode failed"):
+        asyncio.run(pool.encode(["fail first", "slow second"], batch_size=1))
+
+    # The slow slice attached to the shared block after the failure and still wrote its row
+    assert len(outcomes) == 2
+    assert 1 in outcomes
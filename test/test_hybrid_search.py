@@ -0,0 +1,55 @@
+import asyncio
+
+from conftest import stub_vector
+from db import vector_db
+
+def store_chunks(texts_by_id: dict):
+    asyncio.run(vector_db.add_many_to_vector_db(
+        ids=list(texts_by_id),
+        texts=list(texts_by_id.values()),
+        embeddings=[stub_vector(text).tolist() for text in texts_by_id.values()],
+        metadatas=[{"source_url": f"https://example.com/{chunk_id}"} for chunk_id in texts_by_id],
+    ))
+
+def search(query: str, query_embedding, limit: int = 3, threshold: float = 0.5, candidates: int = 20,
+           keyword_threshold: float = 0.3):
+    docs, _ = asyncio.run(vector_db.hybrid_query_vector_db(query, query_embedding, limit=limit, threshold=threshold,
+                                                           candidates=candidates, keyword_threshold=keyword_threshold))
+    return [doc["id"] for doc in docs or []]
+
+def test_hits_in_both_lists_rank_first(stub_embeddings, vector_store):
+    store_chunks({
+        "both": "solar panel efficiency",
+        "vector": "solar panel",
+        "keyword": "efficiency of heat pumps",
+        "neither": "bread baking at home",
+    })
+    ids = search("efficiency", stub_vector("solar panel efficiency"), threshold=0.6, keyword_threshold=0)
+    assert ids[0] == "both"
+    assert set(ids) == {"both", "vector", "keyword"}
+
+def test_stale_keyword_hits_do_not_crowd_out_results(stub_embeddings, vector_store):
+    store_chunks({
+        **{f"zebra-{i}": f"zebra crossing number {i}" for i in range(3)},
+        **{f"filler-{i}": f"unrelated filler words {i}" for i in range(10)},
+    })
+    # Chunks still in the keyword index but gone from the vector store, ranking above the live ones
+    vector_db.keyword_index.add([f"stale-{i}" for i in range(3)], ["zebra zebra zebra"] * 3)
+
+    ids = search("zebra", stub_vector("unrelated filler words"), threshold=0.99, candidates=6, keyword_threshold=0)
+    assert sorted(ids) == ["zebra-0", "zebra-1", "zebra-2"]
+
+def test_unrelated_question_sharing_a_word_finds_nothing(stub_embeddings, vector_store):
+    store_chunks({
+        "bank": "the river bank flooded after the storm",
+        "other": "sourdough starter needs daily feeding",
+    })
+    question = "which bank offers the best mortgage rates"
+    assert vector_db.keyword_index.search(question, 5)
+    assert search(question, stub_vector("mortgage rates interest loans"), threshold=0.55) == []
+
+def test_keyword_only_hit_with_some_similarity_is_kept(stub_embeddings, vector_store):
+    store_chunks({"bank": "the river bank flooded after the storm"})
+    # Too weak for the vector threshold, strong enough for the keyword floor
+    ids = search("river bank", stub_vector("river bank"), threshold=0.99, keyword_threshold=0.3)
+    assert ids == ["bank"]
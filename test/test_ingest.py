@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from api import ingest
+from api.ingest import WebpageContent, process_content_async
+from db.vector_db import get_chunks_by_url
+
+def capture(url: str, text: str, timestamp: str = "2026-01-01T00:00:00Z") -> WebpageContent:
+    return WebpageContent(url=url, title="Test page", textContent=text, timestamp=timestamp)
+
+def test_concurrent_captures_of_one_url_store_one_version(stub_embeddings, vector_store):
+    url = "https://example.com/page"
+    text = " ".join(f"Sentence number {i} about topic {i % 7}." for i in range(200))
+
+    async def run():
+        return await asyncio.gather(*(process_content_async(capture(url, text)) for _ in range(3)))
+
+    results = asyncio.run(run())
+    chunks = asyncio.run(get_chunks_by_url(url))
+
+    assert sorted(result["status"] for result in results) == ["stored", "unchanged", "unchanged"]
+    assert {chunk["metadata"]["document_id"] for chunk in chunks} == {results[0]["document_id"]}
+    assert len(chunks) == results[0]["chunks"]
+
+def test_unchanged_recapture_moves_capture_time_up(stub_embeddings, vector_store):
+    url = "https://example.com/page"
+    text = "A page that does not change between captures."
+
+    first = asyncio.run(process_content_async(capture(url, text, "2026-01-01T00:00:00Z")))
+    second = asyncio.run(process_content_async(capture(url, text, "2026-03-01T00:00:00Z")))
+    # Replaying an older capture must not move the time back
+    asyncio.run(process_content_async(capture(url, text, "2026-02-01T00:00:00Z")))
+    chunks = asyncio.run(get_chunks_by_url(url))
+
+    assert (first["status"], second["status"]) == ("stored", "unchanged")
+    assert {chunk["metadata"]["timestamp"] for chunk in chunks} == {"2026-03-01T00:00:00Z"}
+    assert {chunk["metadata"]["timestamp_epoch"] for chunk in chunks} == {1772323200.0}
+
+class StreamedRequest:
+    """Stand-in for a Starlette request whose body arrives one record at a time."""
+
+    def __init__(self, records):
+        self.records = records
+
+    async def stream(self):
+        for record in self.records:
+            await asyncio.sleep(0.01)
+            yield (json.dumps(record) + "\n").encode("utf-8")
+
+class RawRequest:
+    """Stand-in for a Starlette request whose body arrives in the given pieces."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    async def stream(self):
+        for piece in self.pieces:
+            yield piece
+
+def read_lines(pieces):
+    async def run():
+        return [pair async for pair in ingest.iter_ndjson_lines(RawRequest(pieces))]
+    return asyncio.run(run())
+
+def test_ndjson_lines_are_rebuilt_across_any_split():
+    body = b'{"a": 1}\n\n{"b": "two"}\n{"c": 3}'
+    expected = [(1, b'{"a": 1}'), (2, b""), (3, b'{"b": "two"}'), (4, b'{"c": 3}')]
+
+    for size in range(1, len(body) + 1):
+        pieces = [body[i:i + size] for i in range(0, len(body), size)]
+        assert read_lines(pieces) == expected, size
+    assert read_lines([body + b"\n"]) == expected
+    assert read_lines([]) == []
+
+def test_bulk_ingest_reports_every_record(stub_embeddings, vector_store):
+    page = {"url": "https://example.com/a", "title": "Test page", "timestamp": "2026-01-01T00:00:00Z"}
+    lines = [
+        json.dumps({**page, "textContent": "First version of the page."}),
+        "",
+        "{not json",
+        json.dumps({**page, "url": "https://example.com/b", "textContent": "Another page."}),
+        # The same URL again later in the body is stored over the first version
+        json.dumps({**page, "textContent": "Second version of the page."}),
+    ]
+    body = ("\n".join(lines) + "\n").encode("utf-8")
+
+    summary = asyncio.run(ingest.bulk_ingest_content(RawRequest([body[:10], body[10:]])))
+
+    assert [(result["line"], result["status"]) for result in summary["results"]] == \
+        [(1, "stored"), (3, "error"), (4, "stored"), (5, "stored")]
+    assert (summary["records"], summary["stored"], summary["errors"]) == (4, 3, 1)
+    chunks = asyncio.run(get_chunks_by_url("https://example.com/a"))
+    assert [chunk["text"] for chunk in chunks] == ["Title: Test page Content: Second version of the page."]
+
+    # Re-sending the latest records finds them already stored
+    again = asyncio.run(ingest.bulk_ingest_content(RawRequest([(lines[3] + "\n" + lines[4]).encode("utf-8")])))
+    assert [result["status"] for result in again["results"]] == ["unchanged", "unchanged"]
+
+def test_concurrent_bulk_requests_in_opposite_order_finish(stub_embeddings, vector_store, monkeypatch):
+    monkeypatch.setattr(ingest, "BULK_INGEST_POOL_CHUNKS", 1000)
+    urls = [f"https://example.com/{i}" for i in range(4)]
+    records = [{"url": url, "title": "Test page", "textContent": f"Text of page {url}.",
+                "timestamp": "2026-01-01T00:00:00Z"} for url in urls]
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            ingest.bulk_ingest_content(StreamedRequest(records)),
+            ingest.bulk_ingest_content(StreamedRequest(records[::-1])),
+        ), timeout=10)
+
+    summaries = asyncio.run(run())
+    assert [summary["errors"] for summary in summaries] == [0, 0]
+    # Each page is stored by one request and found unchanged by the other
+    assert sum(summary["stored"] for summary in summaries) == len(urls)
+    for url in urls:
+        chunks = asyncio.run(get_chunks_by_url(url))
+        assert len({chunk["metadata"]["document_id"] for chunk in chunks}) == 1
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+from db.job_queue import JobQueue, JobWorkerPool, QueueFullError
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "job_queue.sqlite3"), max_depth=3)
+
+def test_claim_takes_each_job_once_in_order(queue):
+    first = queue.enqueue("ingest", {"n": 1})
+    second = queue.enqueue("ingest", {"n": 2})
+
+    claimed = queue.claim()
+    assert (claimed["id"], claimed["payload"], claimed["attempts"]) == (first, {"n": 1}, 1)
+    assert queue.claim()["id"] == second
+    assert queue.claim() is None
+    assert queue.get(first)["status"] == "running"
+
+def test_full_queue_rejects_new_jobs(queue):
+    for n in range(3):
+        queue.enqueue("ingest", {"n": n})
+    with pytest.raises(QueueFullError):
+        queue.enqueue("ingest", {"n": 3})
+
+    queue.complete(queue.claim()["id"], {"ok": True})
+    queue.enqueue("ingest", {"n": 3})
+
+def test_retry_waits_for_its_delay(queue):
+    job_id = queue.enqueue("ingest", {})
+    queue.fail(queue.claim()["id"], "boom", retry_delay=0.2)
+
+    assert queue.get(job_id)["status"] == "queued"
+    assert queue.claim() is None
+    time.sleep(0.25)
+    retried = queue.claim()
+    assert (retried["id"], retried["attempts"]) == (job_id, 2)
+
+def test_recover_requeues_jobs_left_running(queue):
+    job_id = queue.enqueue("ingest", {})
+    queue.claim()
+
+    # A new process over the same file finds the job still running from the crashed one
+    restarted = JobQueue(queue.path)
+    assert restarted.recover() == 1
+    assert restarted.claim()["id"] == job_id
+    assert restarted.get(job_id)["attempts"] == 2
+
+def run_workers(queue: JobQueue, handler, job_ids, timeout: float = 5):
+    async def run():
+        pool = JobWorkerPool(queue, {"ingest": handler}, workers=2, retry_base_seconds=0, poll_interval=0.01)
+        await pool.start()
+        try:
+            deadline = time.monotonic() + timeout
+            while any(queue.get(job_id)["status"] in ("queued", "running") for job_id in job_ids):
+                assert time.monotonic() < deadline
+                await asyncio.sleep(0.01)
+        finally:
+            await pool.stop()
+    asyncio.run(run())
+
+def test_worker_retries_until_the_handler_succeeds(queue):
+    calls = []
+
+    async def flaky(payload):
+        calls.append(payload)
+        if len(calls) < 3:
+            raise RuntimeError(f"attempt {len(calls)} failed")
+        return {"stored": True}
+
+    job_id = queue.enqueue("ingest", {"url": "https://example.com"}, max_attempts=3)
+    run_workers(queue, flaky, [job_id])
+
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"], job["result"], job["error"]) == ("succeeded", 3, {"stored": True}, None)
+
+def test_worker_gives_up_after_max_attempts(queue):
+    async def broken(payload):
+        raise RuntimeError("always fails")
+
+    job_id = queue.enqueue("ingest", {}, max_attempts=2)
+    unknown_id = queue.enqueue("unknown", {}, max_attempts=1)
+    run_workers(queue, broken, [job_id, unknown_id])
+
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"], job["error"]) == ("failed", 2, "always fails")
+    assert "No handler" in queue.get(unknown_id)["error"]
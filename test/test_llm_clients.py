@@ -0,0 +1,51 @@
+import asyncio
+
+from api.llm_clients import LLMClientRegistry
+
+GROQ_URL = "https://api.groq.com/openai/v1"
+
+def pools(registry: LLMClientRegistry) -> dict:
+    """The connection pool each cached wrapper uses, in LRU order."""
+    return {key: pool for key, (_, pool) in registry._clients.items()}
+
+def test_clients_are_reused_per_key_and_share_one_pool():
+    registry = LLMClientRegistry()
+
+    first = registry.get("groq", GROQ_URL, "key-a")
+    again = registry.get("groq", GROQ_URL, "key-a")
+    other_key = registry.get("groq", GROQ_URL, "key-b")
+    registry.get("local", "http://localhost:1234/v1", "lm-studio")
+
+    assert again is first
+    assert other_key is not first and other_key.api_key == "key-b"
+    groq_pool = registry._http_clients[("groq", GROQ_URL)]
+    assert [pool is groq_pool for pool in pools(registry).values()] == [True, True, False]
+    asyncio.run(registry.aclose())
+
+def test_least_recently_used_client_is_evicted():
+    registry = LLMClientRegistry(max_clients=2)
+    first = registry.get("groq", GROQ_URL, "key-a")
+    second = registry.get("groq", GROQ_URL, "key-b")
+    assert registry.get("groq", GROQ_URL, "key-a") is first
+
+    registry.get("groq", GROQ_URL, "key-c")
+
+    assert len(registry._clients) == 2
+    assert registry.get("groq", GROQ_URL, "key-a") is first
+    # key-b was evicted: it gets a new wrapper, and the shared pool stayed open
+    assert registry.get("groq", GROQ_URL, "key-b") is not second
+    assert not registry._http_clients[("groq", GROQ_URL)].is_closed
+    asyncio.run(registry.aclose())
+
+def test_aclose_closes_the_pools_and_later_gets_open_new_ones():
+    registry = LLMClientRegistry()
+    client = registry.get("groq", GROQ_URL, "key-a")
+    pool = registry._http_clients[("groq", GROQ_URL)]
+
+    asyncio.run(registry.aclose())
+
+    assert pool.is_closed and not registry._clients
+    reopened = registry.get("groq", GROQ_URL, "key-a")
+    assert reopened is not client
+    assert not registry._http_clients[("groq", GROQ_URL)].is_closed
+    asyncio.run(registry.aclose())
@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timezone
+
+from api.ingest import WebpageContent, process_content_async
+from db import vector_db
+from db.maintenance import delete_expired, parse_source_ttls
+
+DAY = 86400
+
+def test_parse_source_ttls_normalizes_domains():
+    ttls = parse_source_ttls(" WWW.News.Example.com=7, *=365 ,docs.example.org=0.5,")
+    assert ttls == {"news.example.com": 7.0, "*": 365.0, "docs.example.org": 0.5}
+
+def test_parse_source_ttls_skips_invalid_entries():
+    assert parse_source_ttls("news.example.com=soon,*=30,=") == {"*": 30.0}
+    assert parse_source_ttls("") == {}
+
+def test_delete_expired_applies_per_source_and_default_ttls(stub_embeddings, vector_store):
+    now = 1772323200.0
+    pages = {
+        "https://news.example.com/old": now - 10 * DAY,
+        "https://news.example.com/new": now - 1 * DAY,
+        "https://blog.example.com/old": now - 400 * DAY,
+        "https://blog.example.com/new": now - 100 * DAY,
+    }
+
+    async def run():
+        for url, epoch in pages.items():
+            timestamp = datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+            await process_content_async(WebpageContent(url=url, title="Page", textContent=f"Text of {url}.",
+                                                       timestamp=timestamp))
+        await delete_expired(parse_source_ttls("news.example.com=7,*=365"), now=now)
+        return {url: len(await vector_db.get_chunks_by_url(url)) > 0 for url in pages}
+
+    assert asyncio.run(run()) == {
+        "https://news.example.com/old": False,
+        "https://news.example.com/new": True,
+        "https://blog.example.com/old": False,
+        "https://blog.example.com/new": True,
+    }
@@ -0,0 +1,30 @@
+import asyncio
+
+from api.ingest import WebpageContent, process_content_async
+from db import vector_db
+from monitoring import metrics
+from monitoring.metrics import STAGE_LATENCY, register_cache, status_snapshot
+
+def test_status_snapshot_reads_live_numbers(stub_embeddings, vector_store, monkeypatch):
+    monkeypatch.setattr(metrics._cache_collector, "_caches", dict(metrics._cache_collector._caches))
+    before = status_snapshot()
+    page = WebpageContent(url="https://example.com/status", title="Status page",
+                          textContent=" ".join(f"Sentence {i} for the status test." for i in range(60)),
+                          timestamp="2026-01-01T00:00:00Z")
+    result = asyncio.run(process_content_async(page))
+    STAGE_LATENCY.labels("status_test").observe(0.25)
+    STAGE_LATENCY.labels("status_test").observe(0.75)
+    register_cache("status_test", lambda: {"hits": 3, "misses": 1, "hit_rate": 0.75})
+
+    snapshot = status_snapshot()
+
+    assert result["chunks"] > 1
+    # Chunks, not documents: one page stored several
+    assert snapshot["total_chunks"] == vector_store.count() == result["chunks"]
+    assert snapshot["ingested_chunks"] - (before["ingested_chunks"] or 0) == result["chunks"]
+    assert snapshot["stage_latency"]["status_test"] == {"count": 2, "mean_seconds": 0.5}
+    assert snapshot["cache_hit_rates"]["status_test"] == 0.75
+
+def test_status_snapshot_before_the_store_opens(monkeypatch):
+    monkeypatch.setattr(vector_db, "store", None)
+    assert status_snapshot()["total_chunks"] is None
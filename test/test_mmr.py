@@ -0,0 +1,31 @@
+import numpy as np
+
+from api.query import diversify_chunks, mmr_select
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+QUERY = unit(1, 0, 0)
+# Two near-duplicates of the most relevant direction, and one less relevant but different chunk
+CANDIDATES = [unit(1, 0.1, 0), unit(1, 0.12, 0), unit(0.7, 0, 0.7)]
+
+def test_pure_relevance_keeps_rank_order():
+    assert mmr_select(QUERY, CANDIDATES, k=3, lambda_mult=1.0) == [0, 1, 2]
+
+def test_diversity_skips_near_duplicates():
+    assert mmr_select(QUERY, CANDIDATES, k=2, lambda_mult=0.5) == [0, 2]
+
+def test_selects_at_most_the_candidates_available():
+    assert mmr_select(QUERY, CANDIDATES, k=10, lambda_mult=0.5) == [0, 2, 1]
+    assert mmr_select(QUERY, [], k=3) == []
+    assert mmr_select(QUERY, CANDIDATES, k=0) == []
+
+def test_explicit_relevance_overrides_query_similarity():
+    assert mmr_select(QUERY, CANDIDATES, k=1, relevance=[0.1, 0.2, 0.9]) == [2]
+
+def test_diversify_uses_rerank_scores_when_present():
+    chunks = [({"id": str(i), "embedding": embedding, "rerank_score": score}, 0.5)
+              for i, (embedding, score) in enumerate(zip(CANDIDATES, [-2.0, 5.0, 1.0]))]
+    picked = diversify_chunks(QUERY, chunks, k=2)
+    assert [chunk["id"] for chunk, _ in picked] == ["1", "2"]
@@ -0,0 +1,75 @@
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+from db.numpy_store import NumpyVectorStore, where_to_sql
+from db.vector_stores import VectorStore
+
+ROWS = [
+    {"source_domain": "a.com", "timestamp_epoch": 100},
+    {"source_domain": "b.com", "timestamp_epoch": 200},
+    {"source_domain": "c.com", "timestamp_epoch": 300, "document_id": "doc"},
+    {"timestamp_epoch": 400},
+]
+
+@pytest.fixture(scope="module")
+def metadata_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE chunks (row INTEGER, metadata TEXT)")
+    conn.executemany("INSERT INTO chunks VALUES (?, ?)", [(i, json.dumps(row)) for i, row in enumerate(ROWS)])
+    return conn
+
+def matching_rows(conn, where):
+    sql, params = where_to_sql(where)
+    return [row for row, in conn.execute(f"SELECT row FROM chunks WHERE {sql} ORDER BY row", params)]
+
+@pytest.mark.parametrize("where, expected", [
+    (None, [0, 1, 2, 3]),
+    ({"source_domain": "a.com"}, [0]),
+    ({"source_domain": {"$eq": "b.com"}}, [1]),
+    ({"timestamp_epoch": {"$gte": 200, "$lt": 400}}, [1, 2]),
+    ({"timestamp_epoch": {"$gt": 300}}, [3]),
+    ({"timestamp_epoch": {"$lte": 100}}, [0]),
+    ({"source_domain": {"$in": ["a.com", "c.com"]}}, [0, 2]),
+    ({"source_domain": {"$in": []}}, []),
+    # As in Chroma, $ne and $nin also match chunks without the field
+    ({"source_domain": {"$ne": "a.com"}}, [1, 2, 3]),
+    ({"source_domain": {"$nin": ["a.com", "b.com"]}}, [2, 3]),
+    ({"$and": [{"timestamp_epoch": {"$gte": 200}}, {"source_domain": {"$ne": "c.com"}}]}, [1, 3]),
+    ({"$or": [{"source_domain": "a.com"}, {"document_id": "doc"}]}, [0, 2]),
+    ({"$or": [{"$and": [{"source_domain": "b.com"}, {"timestamp_epoch": 200}]}, {"timestamp_epoch": 400}]}, [1, 3]),
+])
+def test_where_to_sql_matches_chroma_semantics(metadata_table, where, expected):
+    assert matching_rows(metadata_table, where) == expected
+
+@pytest.mark.parametrize("where", [
+    {"source_domain": {"$like": "a%"}},
+    {"bad key'); DROP TABLE chunks; --": "x"},
+])
+def test_where_to_sql_rejects_unsupported_clauses(where):
+    with pytest.raises(ValueError):
+        where_to_sql(where)
+
+def test_store_filters_and_searches_exactly(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), "test")
+    vectors = np.eye(4, dtype=np.float32)
+    store.add(ids=[f"id-{i}" for i in range(4)], embeddings=vectors, documents=[f"text {i}" for i in range(4)],
+              metadatas=ROWS)
+
+    assert store.get(where={"timestamp_epoch": {"$gte": 300}}, include=[])["ids"] == ["id-2", "id-3"]
+    results = store.query(query_embeddings=[vectors[1]], n_results=2, where={"source_domain": {"$ne": "a.com"}},
+                          include=["distances"])
+    assert results["ids"][0][0] == "id-1"
+    assert results["distances"][0][0] == pytest.approx(0, abs=1e-3)
+    assert "id-0" not in results["ids"][0]
+
+def test_vector_store_requires_every_operation():
+    class NoCompactStore(VectorStore):
+        count = add = update = delete = get = query = lambda self, *args, **kwargs: None
+
+    with pytest.raises(TypeError, match="compact"):
+        NoCompactStore()
+    with pytest.raises(TypeError):
+        VectorStore()
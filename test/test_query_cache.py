@@ -0,0 +1,40 @@
+from models import query_cache
+from models.query_cache import QueryEmbeddingCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache.time, "monotonic", clock)
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=60)
+    cache.put("What is HNSW?", [1.0])
+
+    clock.now += 59
+    assert cache.get("  what is   hnsw? ") == [1.0]
+    clock.now += 2
+    assert cache.get("What is HNSW?") is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache(max_size=2, ttl_seconds=60)
+    cache.put("first", [1.0])
+    cache.put("second", [2.0])
+    # Reading "first" makes "second" the least recently used
+    assert cache.get("first") == [1.0]
+
+    cache.put("third", [3.0])
+
+    assert cache.get("second") is None
+    assert cache.get("first") == [1.0]
+    assert cache.get("third") == [3.0]
+
+def test_zero_size_disables_the_cache():
+    cache = QueryEmbeddingCache(max_size=0, ttl_seconds=60)
+    cache.put("question", [1.0])
+    assert cache.get("question") is None
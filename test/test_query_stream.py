@@ -0,0 +1,104 @@
+import asyncio
+import json
+import types
+
+import pytest
+
+from conftest import stub_vector
+from api import query
+from api.answer_cache import SemanticAnswerCache
+
+CHUNK = {
+    "id": "chunk-1",
+    "text": "Heat pumps move heat instead of making it.",
+    "metadata": {"title": "Heat pumps", "source_url": "https://example.com/heat-pumps", "document_id": "doc-1",
+                 "chunk_index": 0},
+}
+
+class FakeCompletions:
+    def __init__(self, deltas, error=None):
+        self.deltas = deltas
+        self.error = error
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        assert kwargs["stream"] is True
+
+        async def stream():
+            for delta in self.deltas:
+                yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=delta))])
+            if self.error:
+                raise self.error
+        return stream()
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Serve retrieval and the LLM stream from fakes; returns a function installing the LLM's deltas."""
+    chunks = [(CHUNK, 0.9)]
+
+    async def retrieve_context(question, filters=None):
+        return stub_vector(question), list(chunks)
+
+    monkeypatch.setattr(query, "retrieve_context", retrieve_context)
+    monkeypatch.setattr(query, "answer_cache", SemanticAnswerCache(max_size=10, max_distance=0.05, ttl_seconds=60))
+
+    def install(deltas, error=None, found=True):
+        if not found:
+            chunks.clear()
+        completions = FakeCompletions(deltas, error)
+        client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+        monkeypatch.setattr(query, "get_openai_client", lambda llm_choice, api_key=None: client)
+        return completions
+    return install
+
+def stream_events(question: str = "how do heat pumps work"):
+    async def run():
+        return [event async for event in query.stream_query_llm(question, "local")]
+
+    events = []
+    for raw in asyncio.run(run()):
+        event_line, data_line = raw.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+def test_sources_then_tokens_then_final(fake_llm):
+    fake_llm(["<think>They", " move heat.</think>", "Heat pumps ", "move heat."])
+
+    events = stream_events()
+
+    assert [name for name, _ in events] == ["sources", "token", "token", "token", "token", "final"]
+    assert events[0][1]["source_urls"] == ["https://example.com/heat-pumps"]
+    assert events[0][1]["chunks"][0]["similarity"] == 0.9
+    assert "".join(data["text"] for name, data in events if name == "token").endswith("Heat pumps move heat.")
+    final = events[-1][1]
+    assert final["answer"] == "Heat pumps move heat."
+    assert final["reasoning"] == "They move heat."
+    assert final["source_urls"] == ["https://example.com/heat-pumps"]
+
+def test_repeated_question_is_answered_from_the_cache(fake_llm):
+    completions = fake_llm(["Heat pumps ", "move heat."])
+    stream_events()
+
+    events = stream_events()
+
+    assert completions.calls == 1
+    assert [name for name, _ in events] == ["sources", "token", "final"]
+    assert events[1][1]["text"] == "Heat pumps move heat."
+
+def test_no_context_skips_the_llm(fake_llm):
+    completions = fake_llm(["unused"], found=False)
+
+    events = stream_events()
+
+    assert completions.calls == 0
+    assert [name for name, _ in events] == ["sources", "token", "final"]
+    assert events[0][1] == {"source_urls": [], "chunks": []}
+
+def test_llm_failure_ends_with_an_error_event(fake_llm):
+    fake_llm(["Heat pumps "], error=ConnectionError("connection reset"))
+
+    events = stream_events()
+
+    assert [name for name, _ in events] == ["sources", "token", "error"]
+    assert events[-1][1]["detail"]
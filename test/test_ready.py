@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import ready
+
+@pytest.fixture
+def client(monkeypatch):
+    """A client for /ready with every component back to pending and nothing loaded."""
+    monkeypatch.setattr(ready, "_components", {name: {"status": "pending"} for name in ready._components})
+    monkeypatch.setattr(ready, "_loaded_checks", {name: lambda: False for name in ready._loaded_checks})
+    app = FastAPI()
+    app.include_router(ready.router)
+    return TestClient(app)
+
+def test_not_ready_before_warm_up(client):
+    response = client.get("/ready/")
+
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+    assert {state["status"] for state in response.json()["components"].values()} == {"pending"}
+
+def test_ready_once_every_component_is_warm(client, monkeypatch):
+    monkeypatch.setattr(ready, "warmup_model", lambda: None)
+    monkeypatch.setattr(ready, "get_vector_store", lambda: None)
+
+    asyncio.run(ready.warm_up())
+    assert client.get("/ready/").status_code == 503
+    ready.mark_ready("job_workers")
+
+    response = client.get("/ready/")
+    assert response.status_code == 200
+    assert response.json()["components"]["embedding_model"]["status"] == "ready"
+
+def test_failed_warm_up_keeps_reporting_not_ready(client, monkeypatch):
+    def fail():
+        raise OSError("model files missing")
+
+    monkeypatch.setattr(ready, "warmup_model", fail)
+    monkeypatch.setattr(ready, "get_vector_store", lambda: None)
+    asyncio.run(ready.warm_up())
+    ready.mark_ready("job_workers")
+
+    response = client.get("/ready/")
+    assert response.status_code == 503
+    assert response.json()["components"]["embedding_model"] == {"status": "failed", "error": "model files missing"}
+
+def test_components_loaded_by_a_request_count_as_ready(client, monkeypatch):
+    monkeypatch.setitem(ready._loaded_checks, "embedding_model", lambda: True)
+
+    components = client.get("/ready/").json()["components"]
+
+    assert components["embedding_model"]["status"] == "ready"
+    assert components["vector_store"]["status"] == "pending"
@@ -0,0 +1,82 @@
+import asyncio
+import sys
+import time
+import types
+
+from models.reranker import Reranker
+
+CHUNKS = [({"id": str(i), "text": f"text {i}"}, 0.9 - i / 10) for i in range(4)]
+
+class FakeCrossEncoder:
+    """Scores a pair by the number at the end of its text, so the last chunk ranks first."""
+
+    def __init__(self, delay: float = 0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [float(text.split()[-1]) for _, text in pairs]
+
+def reranker_with(model) -> Reranker:
+    reranker = Reranker("fake")
+    reranker._model = model
+    return reranker
+
+def ids(chunks):
+    return [chunk["id"] for chunk, _ in chunks]
+
+def test_reorders_by_cross_encoder_score():
+    reranked = asyncio.run(reranker_with(FakeCrossEncoder()).rerank("q", CHUNKS, top_k=2))
+    assert ids(reranked) == ["3", "2"]
+    assert reranked[0][0]["rerank_score"] == 3.0
+    # The retrieval similarity is kept alongside the new score
+    assert reranked[0][1] == CHUNKS[3][1]
+
+def test_timeout_keeps_retrieval_order_and_skips_while_busy():
+    reranker = reranker_with(FakeCrossEncoder(delay=0.3))
+
+    async def run():
+        first = await reranker.rerank("q", CHUNKS, top_k=2, budget_ms=50)
+        # The overrun pass still holds the scoring thread, so the next query does not queue behind it
+        start = time.perf_counter()
+        second = await reranker.rerank("q", CHUNKS, top_k=2, budget_ms=1000)
+        busy_seconds = time.perf_counter() - start
+        await asyncio.sleep(0.35)
+        third = await reranker.rerank("q", CHUNKS, top_k=2, budget_ms=1000)
+        return first, second, busy_seconds, third
+
+    first, second, busy_seconds, third = asyncio.run(run())
+    assert ids(first) == ids(second) == ["0", "1"]
+    assert busy_seconds < 0.1
+    assert ids(third) == ["3", "2"]
+
+def test_scoring_error_keeps_retrieval_order():
+    reranker = reranker_with(FakeCrossEncoder(error=RuntimeError("boom")))
+    assert ids(asyncio.run(reranker.rerank("q", CHUNKS, top_k=3))) == ["0", "1", "2"]
+    assert reranker.available
+
+def install_cross_encoder(monkeypatch, factory):
+    """Stand in for sentence_transformers, which is slow to import and would download the model."""
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=factory))
+
+def test_failed_model_load_disables_reranking(monkeypatch):
+    def broken_cross_encoder(*args, **kwargs):
+        raise OSError("model not found")
+
+    install_cross_encoder(monkeypatch, broken_cross_encoder)
+    reranker = Reranker("missing")
+    reranker.warmup()
+    assert not reranker.available
+    assert ids(asyncio.run(reranker.rerank("q", CHUNKS, top_k=2))) == ["0", "1"]
+
+def test_model_load_is_not_counted_against_the_budget(monkeypatch):
+    def slow_cross_encoder(*args, **kwargs):
+        time.sleep(0.3)
+        return FakeCrossEncoder()
+
+    install_cross_encoder(monkeypatch, slow_cross_encoder)
+    reranker = Reranker("slow-loading")
+    assert ids(asyncio.run(reranker.rerank("q", CHUNKS, top_k=2, budget_ms=100))) == ["3", "2"]
@@ -0,0 +1,78 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from conftest import stub_vector
+from db import vector_db
+from db.keyword_index import KeywordIndex
+from db.numpy_store import NumpyVectorStore
+from db.snapshot import export_snapshot, import_snapshot, iter_snapshot, read_manifest
+
+def fill(count: int):
+    texts = [f"chunk {i} about topic {i % 5} ünïcode" for i in range(count)]
+    asyncio.run(vector_db.add_many_to_vector_db(
+        ids=[f"id-{i}" for i in range(count)],
+        texts=texts,
+        embeddings=[stub_vector(text).tolist() for text in texts],
+        metadatas=[{"source_url": f"https://example.com/{i}", "chunk_index": i, "timestamp_epoch": 1.5 * i}
+                   for i in range(count)],
+    ))
+
+def contents(store) -> dict:
+    stored = store.get(include=["documents", "metadatas", "embeddings"])
+    return {
+        chunk_id: (text, metadata, np.asarray(embedding, dtype=np.float32))
+        for chunk_id, text, metadata, embedding in zip(stored["ids"], stored["documents"], stored["metadatas"],
+                                                       stored["embeddings"])
+    }
+
+def switch_store(monkeypatch, directory):
+    """Point the server at a new, empty store, as a fresh install would have."""
+    store = NumpyVectorStore(str(directory / "vector_store"), "test")
+    monkeypatch.setattr(vector_db, "store", store)
+    monkeypatch.setattr(vector_db, "keyword_index", KeywordIndex(str(directory / "keyword_index.sqlite3")))
+    return store
+
+@pytest.mark.parametrize("float16", [False, True])
+def test_round_trip_restores_every_chunk(vector_store, tmp_path, monkeypatch, float16):
+    fill(23)
+    path = str(tmp_path / "kb.sbsnap")
+    report = asyncio.run(export_snapshot(path, float16=float16, embedding_model="stub", page_size=7))
+    assert (report["count"], report["dimension"]) == (23, len(stub_vector("x")))
+    assert read_manifest(path)["dtype"] == ("float16" if float16 else "float32")
+    assert sum(len(ids) for ids, _, _, _ in iter_snapshot(path, batch_size=5)) == 23
+
+    target = switch_store(monkeypatch, tmp_path / "restored")
+    assert asyncio.run(import_snapshot(path, embedding_model="stub", batch_size=4))["imported"] == 23
+
+    original, restored = contents(vector_store), contents(target)
+    assert restored.keys() == original.keys()
+    for chunk_id, (text, metadata, embedding) in original.items():
+        assert restored[chunk_id][:2] == (text, metadata)
+        assert np.allclose(restored[chunk_id][2], embedding, atol=1e-3)
+    # The keyword index is rebuilt from the imported text
+    assert vector_db.keyword_index.count() == 23
+
+def test_import_skips_or_overwrites_existing_chunks(vector_store, tmp_path):
+    fill(5)
+    path = str(tmp_path / "kb.sbsnap")
+    asyncio.run(export_snapshot(path))
+
+    report = asyncio.run(import_snapshot(path))
+    assert (report["imported"], report["skipped"]) == (0, 5)
+    assert asyncio.run(import_snapshot(path, overwrite=True))["imported"] == 5
+    assert vector_store.count() == 5
+
+def test_import_refuses_another_embedding_model(vector_store, tmp_path):
+    fill(2)
+    path = str(tmp_path / "kb.sbsnap")
+    asyncio.run(export_snapshot(path, embedding_model="stub"))
+    with pytest.raises(ValueError, match="embedded with stub"):
+        asyncio.run(import_snapshot(path, embedding_model="other-model"))
+
+def test_empty_store_round_trips(vector_store, tmp_path, monkeypatch):
+    path = str(tmp_path / "empty.sbsnap")
+    assert asyncio.run(export_snapshot(path))["count"] == 0
+    switch_store(monkeypatch, tmp_path / "restored")
+    assert asyncio.run(import_snapshot(path))["imported"] == 0
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from conftest import stub_vector
+from db import vector_db
+
+def test_add_many_stores_every_chunk_in_both_indexes(stub_embeddings, vector_store):
+    texts = {f"chunk-{i}": f"page section {i} about gardening" for i in range(5)}
+    metadatas = [{"source_url": "https://example.com/garden", "chunk_index": i} for i in range(5)]
+
+    stored = asyncio.run(vector_db.add_many_to_vector_db(
+        ids=list(texts), texts=list(texts.values()),
+        embeddings=[stub_vector(text) for text in texts.values()], metadatas=metadatas,
+    ))
+
+    assert stored == list(texts)
+    assert vector_store.count() == 5
+    chunks = asyncio.run(vector_db.get_chunks_by_url("https://example.com/garden"))
+    assert sorted((chunk["id"], chunk["text"], chunk["metadata"]["chunk_index"]) for chunk in chunks) == \
+        [(chunk_id, text, i) for i, (chunk_id, text) in enumerate(texts.items())]
+    assert {chunk_id for chunk_id, _ in vector_db.keyword_index.search("gardening", 10)} == set(texts)
+
+    got = vector_store.get(ids=["chunk-3"], include=["embeddings"])
+    np.testing.assert_allclose(got["embeddings"][0], stub_vector(texts["chunk-3"]), atol=1e-3)
+
+def test_add_many_with_nothing_to_add(vector_store):
+    assert asyncio.run(vector_db.add_many_to_vector_db(ids=[], texts=[], embeddings=[], metadatas=[])) == []
+    assert vector_store.count() == 0
+
+@pytest.mark.parametrize("value", [
+    "2026-01-01T00:00:00Z",
+    "2026-01-01T00:00:00+00:00",
+    "2026-01-01T01:00:00+01:00",
+    "2026-01-01T00:00:00",
+    datetime(2026, 1, 1),
+    datetime(2025, 12, 31, 19, tzinfo=timezone(timedelta(hours=-5))),
+    1767225600,
+])
+def test_to_epoch_accepts_iso_datetimes_and_numbers(value):
+    assert vector_db.to_epoch(value) == 1767225600.0
+
+def test_filter_metadata_normalizes_the_domain():
+    metadata = vector_db.filter_metadata("https://WWW.Example.com:8443/a?b=c", "2026-01-01T00:00:00Z")
+    assert metadata == {"source_domain": "example.com", "timestamp_epoch": 1767225600.0}
+
+def test_to_epoch_rejects_other_types():
+    with pytest.raises(TypeError):
+        vector_db.to_epoch(None)
+
+def test_filter_metadata_falls_back_to_now_for_bad_timestamps():
+    for timestamp in (None, "yesterday"):
+        before = time.time()
+        epoch = vector_db.filter_metadata("https://example.com/", timestamp)["timestamp_epoch"]
+        assert before - 1 <= epoch <= time.time() + 1
+
+@pytest.mark.parametrize("filters, expected", [
+    (None, None),
+    ({}, None),
+    ({"domain": "www.Example.com"}, {"source_domain": "example.com"}),
+    ({"url_prefix": "https://docs.example.com/guide/"}, {"source_domain": "docs.example.com"}),
+    ({"domain": "a.com", "url_prefix": "https://b.com/x"}, {"source_domain": "a.com"}),
+    ({"document_id": "doc-1", "since": "2026-01-01T00:00:00Z", "until": 1767312000}, {"$and": [
+        {"document_id": "doc-1"},
+        {"timestamp_epoch": {"$gte": 1767225600.0}},
+        {"timestamp_epoch": {"$lte": 1767312000.0}},
+    ]}),
+    ({"since": 0}, {"timestamp_epoch": {"$gte": 0.0}}),
+])
+def test_build_where(filters, expected):
+    assert vector_db.build_where(filters) == expected
+
+def test_filtered_query_only_returns_matching_chunks(stub_embeddings, vector_store):
+    pages = [
+        ("a", "https://docs.example.com/guide/intro", "2026-01-01T00:00:00Z"),
+        ("b", "https://docs.example.com/blog/post", "2026-01-01T00:00:00Z"),
+        ("c", "https://other.com/guide/intro", "2026-01-01T00:00:00Z"),
+        ("d", "https://docs.example.com/guide/old", "2024-01-01T00:00:00Z"),
+    ]
+    text = "heat pumps move heat"
+    asyncio.run(vector_db.add_many_to_vector_db(
+        ids=[chunk_id for chunk_id, _, _ in pages], texts=[text] * len(pages),
+        embeddings=[stub_vector(text)] * len(pages),
+        metadatas=[{"source_url": url, **vector_db.filter_metadata(url, timestamp)} for _, url, timestamp in pages],
+    ))
+
+    docs, _ = asyncio.run(vector_db.query_vector_db(
+        stub_vector(text).tolist(), limit=10, threshold=0.5,
+        filters={"url_prefix": "https://docs.example.com/guide/", "since": "2025-01-01T00:00:00Z"},
+    ))
+
+    assert [doc["id"] for doc in docs] == ["a"]
+
+def test_backfill_adds_filter_fields_to_old_chunks(vector_store):
+    vector_store.add(ids=["old", "undated"], embeddings=[stub_vector("old"), stub_vector("undated")],
+                     documents=["old", "undated"],
+                     metadatas=[{"source_url": "https://www.example.com/a", "timestamp": "2026-01-01T00:00:00Z"},
+                                {"source_url": "https://example.com/b"}])
+
+    vector_db.backfill_filter_metadata(vector_store)
+
+    metadatas = dict(zip(*(vector_store.get(include=["metadatas"])[key] for key in ("ids", "metadatas"))))
+    assert metadatas["old"]["source_domain"] == "example.com"
+    assert metadatas["old"]["timestamp_epoch"] == 1767225600.0
+    assert metadatas["undated"]["timestamp_epoch"] > 1767225600.0
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_distance_to_similarity_gives_cosine_in_every_space(space):
+    rng = np.random.default_rng(0)
+    a, b = (vector / np.linalg.norm(vector) for vector in rng.standard_normal((2, 16)))
+    cosine = float(a @ b)
+    distance = {"l2": float(np.sum((a - b) ** 2)), "cosine": 1 - cosine, "ip": 1 - float(a @ b)}[space]
+
+    assert vector_db.distance_to_similarity(distance, space) == pytest.approx(cosine)